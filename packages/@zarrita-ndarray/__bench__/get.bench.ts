@@ -0,0 +1,52 @@
+import { FileSystemStore } from "@zarrita/storage";
+import { describe } from "vitest";
+import * as zarr from "zarrita";
+
+import {
+	bench,
+	CHUNK_SHAPE,
+	COLUMNS,
+	field,
+	rowsFor,
+	tempDir,
+} from "./util.js";
+import { get } from "../src/index.js";
+
+const LITTLE = { name: "bytes", configuration: { endian: "little" } };
+
+let rows = rowsFor(4);
+let data = field(Float32Array, rows);
+let root = zarr.root(new FileSystemStore(tempDir()));
+let arrays = {
+	// chunks decode in C order and copy with ndarray-ops' fast path
+	bytes: await zarr.create(root.resolve("bytes"), {
+		shape: [rows, COLUMNS],
+		chunkShape: CHUNK_SHAPE,
+		dtype: "float32",
+		codecs: [LITTLE],
+	}),
+	// chunks decode as transposed views, so every copy is strided
+	transpose: await zarr.create(root.resolve("transpose"), {
+		shape: [rows, COLUMNS],
+		chunkShape: CHUNK_SHAPE,
+		dtype: "float32",
+		codecs: [{ name: "transpose", configuration: { order: [1, 0] } }, LITTLE],
+	}),
+};
+
+let chunkSize = CHUNK_SHAPE[0] * CHUNK_SHAPE[1];
+let whole = { bytes: data.byteLength, chunks: data.length / chunkSize };
+// Every other column of the first five rows of chunks.
+let slab = [zarr.slice(0, CHUNK_SHAPE[0] * 5), zarr.slice(null, null, 2)];
+let slabWorkload = {
+	bytes: CHUNK_SHAPE[0] * 5 * (COLUMNS / 2) * 4,
+	chunks: 5 * (COLUMNS / CHUNK_SHAPE[1]),
+};
+
+for (let [name, arr] of Object.entries(arrays)) {
+	await zarr.set(arr, null, { data, shape: arr.shape, stride: [COLUMNS, 1] });
+	describe(name, () => {
+		bench(`ndarray get ${name} whole`, whole, () => get(arr));
+		bench(`ndarray get ${name} strided`, slabWorkload, () => get(arr, slab));
+	});
+}
@@ -0,0 +1,141 @@
+import * as fs from "node:fs";
+import * as os from "node:os";
+import * as path from "node:path";
+import { bench as vitestBench } from "vitest";
+
+// A copy of the helpers from packages/zarrita/__bench__/util.ts that these
+// benchmarks use (a package's build can't include another's sources). Keep
+// the two in step, so that results from both packages compare.
+
+/**
+ * Decoded size of each generated array, in MiB. Override with
+ * `ZARRITA_BENCH_SIZE=64 pnpm bench`.
+ */
+export const SIZE_MIB: number = Number(process.env.ZARRITA_BENCH_SIZE ?? 8);
+
+/** Columns of the generated 2D arrays (rows scale with `SIZE_MIB`). */
+export const COLUMNS = 512;
+
+/** A chunk of the generated arrays: 128 KiB of float32. */
+export const CHUNK_SHAPE: [number, number] = [64, COLUMNS / 2];
+
+/** The number of rows giving about `SIZE_MIB` of `itemsize`-byte elements. */
+export function rowsFor(itemsize: number): number {
+	let rows = Math.ceil((SIZE_MIB * 2 ** 20) / itemsize / COLUMNS);
+	return Math.ceil(rows / CHUNK_SHAPE[0]) * CHUNK_SHAPE[0];
+}
+
+/**
+ * Deterministic contents for a `rows` x `COLUMNS` array: a smooth field plus
+ * noise, so that compressors see realistic (not constant) data. Integers
+ * are the field scaled by 1000.
+ */
+export function field<T extends Float32Array | Float64Array | Int32Array>(
+	Ctr: new (length: number) => T,
+	rows: number,
+): T {
+	let data = new Ctr(rows * COLUMNS);
+	let seed = 42;
+	let scale = data instanceof Int32Array ? 1000 : 1;
+	for (let i = 0; i < rows; i++) {
+		for (let j = 0; j < COLUMNS; j++) {
+			// xorshift, for noise that is the same on every run
+			seed ^= seed << 13;
+			seed ^= seed >>> 17;
+			seed ^= seed << 5;
+			let noise = ((seed >>> 0) / 2 ** 32 - 0.5) * 0.1;
+			let value = Math.sin(i * 0.013) + Math.sin(j * 0.026) + noise;
+			data[i * COLUMNS + j] = scale === 1 ? value : Math.round(value * scale);
+		}
+	}
+	return data;
+}
+
+let tempDirs: string[] = [];
+
+process.on("exit", () => {
+	for (let dir of tempDirs) {
+		fs.rmSync(dir, { recursive: true, force: true });
+	}
+});
+
+/** A fresh directory, removed when the process exits. */
+export function tempDir(): string {
+	let dir = fs.mkdtempSync(path.join(os.tmpdir(), "zarrita-bench-"));
+	tempDirs.push(dir);
+	return dir;
+}
+
+/** What one run of a benchmark moves, for reporting throughput. */
+export interface Workload {
+	/** Decoded bytes read or written. */
+	bytes: number;
+	/** Chunks decoded or encoded. */
+	chunks: number;
+}
+
+/**
+ * The workload is written into the benchmark's name, e.g.
+ * `"read fs whole [8.0 MiB, 64 chunks]"`, which is where
+ * `scripts/bench-compare.mjs` reads it from to derive MB/s and chunks/s.
+ */
+function label(name: string, { bytes, chunks }: Workload): string {
+	let size =
+		bytes < 2 ** 20
+			? `${(bytes / 2 ** 10).toFixed(1)} KiB`
+			: `${(bytes / 2 ** 20).toFixed(1)} MiB`;
+	return `${name} [${size}, ${chunks} chunks]`;
+}
+
+/**
+ * Run `fn` once, outside of the timed runs, sampling memory. `alloc` is the
+ * growth of the JS heap and of `ArrayBuffer` memory over the run: it counts
+ * what was allocated, less whatever the garbage collector reclaimed
+ * meanwhile (run node with `--expose-gc` to collect before starting).
+ * `peakRss` is the highest resident set size sampled during the run.
+ */
+async function profile(fn: () => unknown) {
+	(globalThis as { gc?: () => void }).gc?.();
+	let before = process.memoryUsage();
+	let peakRss = before.rss;
+	let timer = setInterval(() => {
+		peakRss = Math.max(peakRss, process.memoryUsage.rss());
+	}, 1);
+	try {
+		await fn();
+	} finally {
+		clearInterval(timer);
+	}
+	let after = process.memoryUsage();
+	let heap = after.heapUsed - before.heapUsed;
+	return {
+		alloc: Math.max(0, heap + after.arrayBuffers - before.arrayBuffers),
+		peakRss: Math.max(peakRss, after.rss),
+	};
+}
+
+/**
+ * Register a benchmark of `fn`, labelled with its `workload`. When
+ * `ZARRITA_BENCH_MEMORY` names a file, a memory profile of one extra run is
+ * appended to it as a JSON line.
+ */
+export function bench(
+	name: string,
+	workload: Workload,
+	fn: () => Promise<unknown>,
+): void {
+	let fullName = label(name, workload);
+	let out = process.env.ZARRITA_BENCH_MEMORY;
+	let profiled = false;
+	vitestBench(fullName, fn, {
+		async setup(_task, mode) {
+			if (!out || profiled || mode !== "run") return;
+			profiled = true;
+			let memory = await profile(fn);
+			fs.appendFileSync(
+				out,
+				`${JSON.stringify({ name: fullName, ...memory })}\n`,
+			);
+		},
+	});
+}
@@ -111,8 +111,16 @@ function view<D extends zarr.DataType>(
 			pick.push(s);
 			return;
 		}
-		lo.push(s[0]);
-		hi.push(s[1]);
+		if (s[2] < 0) {
+			// ndarray walks a negative step down from the end of [lo, hi),
+			// so the range must end at `start` and begin at the last index.
+			const count = Math.floor((s[0] - s[1] - 1) / -s[2]) + 1;
+			lo.push(count > 0 ? s[0] + (count - 1) * s[2] : s[0] + 1);
+			hi.push(s[0] + 1);
+		} else {
+			lo.push(s[0]);
+			hi.push(s[1]);
+		}
 		step.push(s[2]);
 		pick.push(null);
 	});
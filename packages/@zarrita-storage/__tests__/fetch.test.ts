@@ -277,4 +277,145 @@ describe("FetchStore", () => {
 			).rejects.toThrow();
 		});
 	});
+
+	describe("object sizes and suffix reads", () => {
+		let data = Uint8Array.from({ length: 100 }, (_, i) => i);
+
+		/** A fake server for one object, optionally without suffix support. */
+		function serve({ suffix }: { suffix: boolean }) {
+			return vi.fn(async (request: Request) => {
+				if (!request.url.endsWith("/c/0")) {
+					return new Response(null, { status: 404 });
+				}
+				if (request.method === "HEAD") {
+					return new Response(null, {
+						headers: { "Content-Length": String(data.length) },
+					});
+				}
+				let range = request.headers.get("Range") ?? "";
+				let match = range.match(/^bytes=(\d*)-(\d*)$/);
+				if (!match) {
+					return new Response(data);
+				}
+				let [start, end] = [Number(match[1]), Number(match[2])];
+				if (match[1] === "") {
+					if (!suffix) {
+						return new Response(null, { status: 416 });
+					}
+					[start, end] = [data.length - end, data.length - 1];
+				}
+				return new Response(data.slice(start, end + 1), {
+					status: 206,
+					headers: {
+						"Content-Range": `bytes ${start}-${end}/${data.length}`,
+					},
+				});
+			});
+		}
+
+		function requests(fetch: ReturnType<typeof serve>) {
+			return fetch.mock.calls.map(
+				([r]) => `${r.method} ${r.headers.get("Range") ?? ""}`.trim(),
+			);
+		}
+
+		it("looks up the size once", async () => {
+			let fetch = serve({ suffix: false });
+			let store = new FetchStore("http://sizes.test/data.zarr", { fetch });
+			let tail = await store.getRange("/c/0", { suffixLength: 4 });
+			expect(tail).toStrictEqual(new Uint8Array([96, 97, 98, 99]));
+			await store.getRange("/c/0", { suffixLength: 8 });
+			expect(requests(fetch)).toStrictEqual([
+				"HEAD",
+				"GET bytes=96-99",
+				"GET bytes=92-99",
+			]);
+		});
+
+		it("uses sizes from a manifest", async () => {
+			let fetch = serve({ suffix: false });
+			let store = new FetchStore("http://manifest.test/data.zarr", {
+				fetch,
+				sizes: { "/c/0": 100 },
+			});
+			await store.getRange("/c/0", { suffixLength: 4 });
+			expect(requests(fetch)).toStrictEqual(["GET bytes=96-99"]);
+		});
+
+		it("detects suffix support per origin", async () => {
+			let fetch = serve({ suffix: true });
+			let opts = { fetch, useSuffixRequest: "auto" as const };
+			let store = new FetchStore("http://suffix.test/a.zarr", opts);
+			let tail = await store.getRange("/c/0", { suffixLength: 2 });
+			expect(tail).toStrictEqual(new Uint8Array([98, 99]));
+			let other = new FetchStore("http://suffix.test/a.zarr", opts);
+			await other.getRange("/c/0", { suffixLength: 2 });
+			expect(requests(fetch)).toStrictEqual([
+				"GET bytes=-2",
+				"GET bytes=-2",
+			]);
+		});
+
+		it("falls back to HEAD when suffix requests fail", async () => {
+			let fetch = serve({ suffix: false });
+			let opts = { fetch, useSuffixRequest: "auto" as const };
+			let store = new FetchStore("http://no-suffix.test/a.zarr", opts);
+			let tail = await store.getRange("/c/0", { suffixLength: 2 });
+			expect(tail).toStrictEqual(new Uint8Array([98, 99]));
+			let other = new FetchStore("http://no-suffix.test/a.zarr", opts);
+			await other.getRange("/c/0", { suffixLength: 2 });
+			expect(requests(fetch)).toStrictEqual([
+				"GET bytes=-2",
+				"HEAD",
+				"GET bytes=98-99",
+				"HEAD",
+				"GET bytes=98-99",
+			]);
+		});
+
+		it("does not give up on suffix requests over an error", async () => {
+			let fetch = serve({ suffix: true });
+			fetch.mockResolvedValueOnce(new Response(null, { status: 503 }));
+			let opts = { fetch, useSuffixRequest: "auto" as const };
+			let store = new FetchStore("http://flaky.test/a.zarr", opts);
+			await expect(
+				store.getRange("/c/0", { suffixLength: 2 }),
+			).rejects.toThrow("503");
+			let tail = await store.getRange("/c/0", { suffixLength: 2 });
+			expect(tail).toStrictEqual(new Uint8Array([98, 99]));
+			expect(requests(fetch)).toStrictEqual([
+				"GET bytes=-2",
+				"GET bytes=-2",
+			]);
+		});
+
+		it("reads the suffix of an empty object without a request", async () => {
+			let fetch = serve({ suffix: false });
+			let store = new FetchStore("http://empty.test/data.zarr", {
+				fetch,
+				sizes: { "/c/0": 0 },
+			});
+			let tail = await store.getRange("/c/0", { suffixLength: 4 });
+			expect(tail).toStrictEqual(new Uint8Array(0));
+			expect(fetch).not.toHaveBeenCalled();
+		});
+
+		it("serves reads inside a prefetched tail", async () => {
+			let fetch = serve({ suffix: true });
+			let store = new FetchStore("http://tail.test/data.zarr", {
+				fetch,
+				useSuffixRequest: true,
+				tailPrefetch: 32,
+			});
+			let index = await store.getRange("/c/0", { suffixLength: 4 });
+			let chunk = await store.getRange("/c/0", { offset: 80, length: 10 });
+			expect(index).toStrictEqual(new Uint8Array([96, 97, 98, 99]));
+			expect(chunk).toStrictEqual(data.slice(80, 90));
+			await store.getRange("/c/0", { offset: 0, length: 10 });
+			expect(requests(fetch)).toStrictEqual([
+				"GET bytes=-32",
+				"GET bytes=0-9",
+			]);
+		});
+	});
 });
@@ -1,7 +1,8 @@
+import { promises as fsPromises } from "node:fs";
 import * as fs from "node:fs/promises";
 import * as path from "node:path";
 import * as url from "node:url";
-import { afterAll, beforeAll, describe, expect, it } from "vitest";
+import { afterAll, beforeAll, describe, expect, it, vi } from "vitest";
 
 import FileSystemStore from "../src/fs.js";
 
@@ -63,4 +64,78 @@ describe("FileSystemStore", () => {
 		const bytes2 = await store.getRange("/foo-partial", { suffixLength: 6 });
 		expect(new TextDecoder().decode(bytes2)).toBe("World!");
 	});
+
+	it("reuses open files across range reads", async () => {
+		const store = new FileSystemStore(store_path);
+		await fs.writeFile(path.join(store_path, "foo-pooled"), "Hello, World!");
+		const open = vi.spyOn(fsPromises, "open");
+		try {
+			const parts = await Promise.all([
+				store.getRange("/foo-pooled", { offset: 0, length: 5 }),
+				store.getRange("/foo-pooled", { suffixLength: 6 }),
+				store.getRange("/foo-pooled", { offset: 5, length: 2 }),
+			]);
+			expect(parts.map((b) => new TextDecoder().decode(b))).toStrictEqual([
+				"Hello",
+				"World!",
+				", ",
+			]);
+			expect(open).toHaveBeenCalledTimes(1);
+		} finally {
+			open.mockRestore();
+			await store.close();
+		}
+	});
+
+	it("sees its own writes in range reads", async () => {
+		const store = new FileSystemStore(store_path);
+		const encoder = new TextEncoder();
+		await store.set("/foo-rewrite", encoder.encode("Hello, World!"));
+		await store.getRange("/foo-rewrite", { suffixLength: 6 });
+		await store.set("/foo-rewrite", encoder.encode("Bye"));
+		const bytes = await store.getRange("/foo-rewrite", { suffixLength: 2 });
+		expect(new TextDecoder().decode(bytes)).toBe("ye");
+		await store.delete("/foo-rewrite");
+		expect(
+			await store.getRange("/foo-rewrite", { offset: 0, length: 1 }),
+		).toBe(undefined);
+	});
+
+	it("reads several ranges at once", async () => {
+		const store = new FileSystemStore(store_path, { maxOpenFiles: 1 });
+		await fs.writeFile(path.join(store_path, "foo-ranges"), "Hello, World!");
+		const parts = await store.getRanges("/foo-ranges", [
+			{ offset: 7, length: 5 },
+			{ offset: 0, length: 5 },
+			{ suffixLength: 1 },
+		]);
+		expect(parts?.map((b) => new TextDecoder().decode(b))).toStrictEqual([
+			"World",
+			"Hello",
+			"!",
+		]);
+		expect(await store.getRanges("/foo-missing", [{ suffixLength: 1 }])).toBe(
+			undefined,
+		);
+		await store.close();
+	});
+
+	it("reads into a reusable arena", async () => {
+		const store = new FileSystemStore(store_path, { arenaBlockSize: 64 });
+		await fs.writeFile(path.join(store_path, "foo-arena"), "Hello, World!");
+		const whole = await store.get("/foo-arena");
+		const part = await store.getRange("/foo-arena", { offset: 7, length: 5 });
+		expect(new TextDecoder().decode(whole)).toBe("Hello, World!");
+		expect(new TextDecoder().decode(part)).toBe("World");
+		expect(part?.buffer).toBe(whole?.buffer);
+		expect((part?.byteOffset ?? 0) % 8).toBe(0);
+		store.release();
+		// Views from before the release are detached rather than left to
+		// alias bytes of later reads.
+		expect(whole?.byteLength).toBe(0);
+		expect(part?.byteLength).toBe(0);
+		const again = await store.get("/foo-arena");
+		expect(new TextDecoder().decode(again)).toBe("Hello, World!");
+		await store.close();
+	});
 });
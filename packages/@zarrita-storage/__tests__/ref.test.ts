@@ -151,4 +151,102 @@ describe("ReferenceStore", () => {
 		await store.get("/data.bin");
 		expect(customFetch).not.toHaveBeenCalled();
 	});
+
+	describe("byte-range manifest", () => {
+		let file = Uint8Array.from({ length: 256 }, (_, i) => i);
+
+		function serveFile() {
+			return vi.fn(async (request: Request) => {
+				let range = request.headers.get("Range");
+				if (!range) return new Response(file);
+				let [start, stop] = range.slice(6).split("-");
+				let bytes = start
+					? file.slice(Number(start), Number(stop) + 1)
+					: file.slice(-Number(stop));
+				return new Response(bytes, { status: 206 });
+			});
+		}
+
+		it("coalesces nearby references into the same file", async () => {
+			let fetch = serveFile();
+			let store = ReferenceStore.fromSpec(
+				{
+					version: 1,
+					refs: {
+						"a/0": ["https://example.com/data.h5", 16, 8],
+						"a/1": ["https://example.com/data.h5", 32, 8],
+					},
+				},
+				{ fetch },
+			);
+			let [first, second] = await Promise.all([
+				store.get("/a/0"),
+				store.getRange("/a/1", { offset: 2, length: 2 }),
+			]);
+			expect(fetch).toHaveBeenCalledOnce();
+			expect(fetch.mock.calls[0][0].headers.get("Range")).toBe("bytes=16-35");
+			expect(first).toStrictEqual(file.slice(16, 24));
+			expect(second).toStrictEqual(file.slice(34, 36));
+		});
+
+		it("fetches references separately with coalesceSize: -1", async () => {
+			let fetch = serveFile();
+			let store = ReferenceStore.fromSpec(
+				{
+					version: 1,
+					refs: {
+						"a/0": ["https://example.com/data.h5", 16, 8],
+						"a/1": ["https://example.com/data.h5", 24, 8],
+					},
+				},
+				{ fetch, coalesceSize: -1 },
+			);
+			await Promise.all([store.get("/a/0"), store.get("/a/1")]);
+			expect(fetch).toHaveBeenCalledTimes(2);
+		});
+
+		it("reads whole-file references", async () => {
+			let fetch = serveFile();
+			let store = ReferenceStore.fromSpec(
+				{ version: 1, refs: { whole: ["https://example.com/data.h5"] } },
+				{ fetch },
+			);
+			expect(await store.get("/whole")).toStrictEqual(file);
+			let tail = await store.getRange("/whole", { suffixLength: 4 });
+			expect(tail).toStrictEqual(file.slice(252));
+			expect(fetch.mock.calls[1][0].headers.get("Range")).toBe("bytes=-4");
+		});
+
+		it("slices the window when the server ignores the range", async () => {
+			let store = ReferenceStore.fromSpec(
+				{
+					version: 1,
+					refs: { chunk: ["https://example.com/data.h5", 8, 4] },
+				},
+				{ fetch: async () => new Response(file) },
+			);
+			expect(await store.get("/chunk")).toStrictEqual(file.slice(8, 12));
+		});
+
+		it("resolves references on first access", async () => {
+			let refs: Record<string, unknown> = {
+				".zattrs": { title: "lazy" },
+				"data.bin": "base64:aGVsbG8=",
+			};
+			let store = ReferenceStore.fromSpec({ version: 1, refs });
+			// Entries added after the spec was loaded are visible: nothing was
+			// copied up front.
+			refs.late = "late";
+			let attrs = await store.get("/.zattrs");
+			assert(attrs instanceof Uint8Array);
+			expect(JSON.parse(new TextDecoder().decode(attrs))).toEqual({
+				title: "lazy",
+			});
+			let first = await store.get("/data.bin");
+			expect(await store.get("/data.bin")).toBe(first);
+			expect(await store.get("/late")).toStrictEqual(
+				new TextEncoder().encode("late"),
+			);
+		});
+	});
 });
@@ -1,5 +1,5 @@
 import type { AbsolutePath, AsyncReadable, RangeQuery } from "./types.js";
-import { mergeInit } from "./util.js";
+import { handleResponse, mergeInit } from "./util.js";
 
 function resolve(root: string | URL, path: AbsolutePath): URL {
 	const base = typeof root === "string" ? new URL(root) : root;
@@ -13,20 +13,6 @@ function resolve(root: string | URL, path: AbsolutePath): URL {
 	return resolved;
 }
 
-async function handleResponse(
-	response: Response,
-): Promise<Uint8Array | undefined> {
-	if (response.status === 404) {
-		return undefined;
-	}
-	if (response.status === 200 || response.status === 206) {
-		return new Uint8Array(await response.arrayBuffer());
-	}
-	throw new Error(
-		`Unexpected response status ${response.status} ${response.statusText}`,
-	);
-}
-
 /** Options for configuring a {@link FetchStore}. */
 interface FetchStoreOptions {
 	/**
@@ -88,8 +74,61 @@ interface FetchStoreOptions {
 	 * to intercept and modify requests.
 	 */
 	overrides?: RequestInit;
-	/** Whether to use suffix-length range requests (e.g., `Range: bytes=-N`). */
-	useSuffixRequest?: boolean;
+	/**
+	 * Whether to use suffix-length range requests (e.g., `Range: bytes=-N`)
+	 * for reads from the end of an object whose size isn't known yet.
+	 * Otherwise the size is looked up with a `HEAD` request first.
+	 *
+	 * `"auto"` tries a suffix request once per origin and keeps using them
+	 * if the server answers with a partial response. Note that in browsers
+	 * a suffix `Range` header is not CORS-safelisted, so cross-origin
+	 * requests need a preflight that the server must allow.
+	 *
+	 * @default false
+	 */
+	useSuffixRequest?: boolean | "auto";
+	/**
+	 * Known object sizes by key, e.g. from a manifest written alongside the
+	 * data. Reads from the end of these objects become plain range requests.
+	 * Sizes are also learned from responses (`Content-Range`, `HEAD`, and
+	 * full reads).
+	 */
+	sizes?: Record<AbsolutePath, number>;
+	/**
+	 * When reading from the end of an object (e.g. a shard index), fetch at
+	 * least this many trailing bytes and keep them, so that later reads
+	 * falling inside the tail (e.g. the last inner chunks of the shard) are
+	 * served without a request.
+	 *
+	 * @default 0
+	 */
+	tailPrefetch?: number;
+}
+
+/** Origins known to support (or not) suffix range requests. */
+const SUFFIX_SUPPORT = new Map<string, boolean>();
+
+/** Tails kept for `tailPrefetch`, per store. */
+const MAX_TAILS = 64;
+
+/** Bytes from a (possibly partial) response, and where they start. */
+type Fetched = {
+	bytes: Uint8Array;
+	/** Offset of `bytes` in the object, if known. */
+	offset?: number;
+	/** Total size of the object, if known. */
+	size?: number;
+	partial: boolean;
+};
+
+/** Parse `Content-Range: bytes <start>-<end>/<size>` (size may be `*`). */
+function parseContentRange(
+	header: string | null,
+): { offset: number; size?: number } | undefined {
+	let match = header?.match(/^bytes (\d+)-\d+\/(\d+|\*)$/);
+	if (!match) return undefined;
+	let size = match[2] === "*" ? undefined : Number(match[2]);
+	return { offset: Number(match[1]), size };
 }
 
 /**
@@ -134,7 +173,11 @@ interface FetchStoreOptions {
 class FetchStore implements AsyncReadable {
 	#fetch: (request: Request) => Promise<Response>;
 	#overrides: RequestInit;
-	#useSuffixRequest: boolean;
+	#useSuffixRequest: boolean | "auto";
+	#sizes: Map<AbsolutePath, number>;
+	#tailPrefetch: number;
+	// Map iteration order doubles as recency order (oldest first).
+	#tails = new Map<AbsolutePath, { offset: number; bytes: Uint8Array }>();
 
 	constructor(
 		public url: string | URL,
@@ -143,6 +186,10 @@ class FetchStore implements AsyncReadable {
 		this.#fetch = options.fetch ?? ((request) => fetch(request));
 		this.#overrides = options.overrides ?? {};
 		this.#useSuffixRequest = options.useSuffixRequest ?? false;
+		this.#sizes = new Map(
+			Object.entries(options.sizes ?? {}) as [AbsolutePath, number][],
+		);
+		this.#tailPrefetch = options.tailPrefetch ?? 0;
 	}
 
 	#buildRequest(url: string | URL, init: RequestInit): Request {
@@ -156,7 +203,11 @@ class FetchStore implements AsyncReadable {
 		let href = resolve(this.url, key).href;
 		let request = this.#buildRequest(href, options);
 		let response = await this.#fetch(request);
-		return handleResponse(response);
+		let bytes = await handleResponse(response);
+		if (bytes && response.status === 200) {
+			this.#sizes.set(key, bytes.byteLength);
+		}
+		return bytes;
 	}
 
 	async getRange(
@@ -164,55 +215,213 @@ class FetchStore implements AsyncReadable {
 		range: RangeQuery,
 		options: RequestInit = {},
 	): Promise<Uint8Array | undefined> {
-		let url = resolve(this.url, key);
-		let response: Response;
 		if ("suffixLength" in range) {
-			response = await this.#fetchSuffix(url, range.suffixLength, options);
+			return this.#getSuffix(key, range.suffixLength, options);
+		}
+		let { offset, length } = range;
+		let cached = this.#readTail(key, offset, length);
+		if (cached) {
+			return cached;
+		}
+		let fetched = await this.#fetchRange(
+			key,
+			`bytes=${offset}-${offset + length - 1}`,
+			options,
+		);
+		if (!fetched) {
+			return undefined;
+		}
+		// The server ignored the range and sent the whole object.
+		if (!fetched.partial) {
+			return fetched.bytes.subarray(offset, offset + length);
+		}
+		return fetched.bytes;
+	}
+
+	async #getSuffix(
+		key: AbsolutePath,
+		suffixLength: number,
+		options: RequestInit,
+	): Promise<Uint8Array | undefined> {
+		let wanted = Math.max(suffixLength, this.#tailPrefetch);
+		let size = this.#sizes.get(key);
+		let fetched: Fetched | undefined;
+		if (size !== undefined && size < 1) {
+			// There is no byte range to ask for in an empty object.
+			return new Uint8Array(0);
+		}
+		if (size !== undefined) {
+			let cached = this.#readTail(key, size - suffixLength, suffixLength);
+			if (cached) {
+				return cached;
+			}
+			let offset = Math.max(0, size - wanted);
+			fetched = await this.#fetchRange(
+				key,
+				`bytes=${offset}-${size - 1}`,
+				options,
+			);
+		} else if (this.#suffixSupported() !== false) {
+			let result = await this.#trySuffixRequest(key, wanted, options);
+			if (result === "unsupported") {
+				return this.#getSuffixAfterHead(key, suffixLength, options);
+			}
+			fetched = result;
 		} else {
-			let rangeInit: RequestInit = {
-				...options,
-				headers: {
-					...options.headers,
-					Range: `bytes=${range.offset}-${range.offset + range.length - 1}`,
-				},
-			};
-			let request = this.#buildRequest(url, rangeInit);
-			response = await this.#fetch(request);
-		}
-		return handleResponse(response);
+			return this.#getSuffixAfterHead(key, suffixLength, options);
+		}
+		if (!fetched) {
+			return undefined;
+		}
+		this.#keepTail(key, fetched);
+		let { bytes } = fetched;
+		return bytes.subarray(Math.max(0, bytes.byteLength - suffixLength));
 	}
 
-	async #fetchSuffix(
-		url: URL,
+	/** Learn the object's size with a `HEAD` request, then read the suffix. */
+	async #getSuffixAfterHead(
+		key: AbsolutePath,
 		suffixLength: number,
 		options: RequestInit,
-	): Promise<Response> {
-		if (this.#useSuffixRequest) {
-			let init: RequestInit = {
-				...options,
-				headers: { ...options.headers, Range: `bytes=-${suffixLength}` },
-			};
-			return this.#fetch(this.#buildRequest(url, init));
-		}
-		let headRequest = this.#buildRequest(url, {
-			...options,
-			method: "HEAD",
-		});
-		let response = await this.#fetch(headRequest);
+	): Promise<Uint8Array | undefined> {
+		let url = resolve(this.url, key);
+		let response = await this.#fetch(
+			this.#buildRequest(url, { ...options, method: "HEAD" }),
+		);
 		if (!response.ok) {
-			return response;
+			return handleResponse(response);
+		}
+		let size = Number(response.headers.get("Content-Length") ?? Number.NaN);
+		if (!Number.isFinite(size)) {
+			throw new Error(`Missing Content-Length for ${url.href}`);
 		}
-		let contentLength = response.headers.get("Content-Length");
-		let length = Number(contentLength);
-		let offset = length - suffixLength;
-		let rangeInit: RequestInit = {
+		this.#sizes.set(key, size);
+		return this.#getSuffix(key, suffixLength, options);
+	}
+
+	/** Whether suffix requests are known to work (or not) for this store. */
+	#suffixSupported(): boolean | undefined {
+		if (this.#useSuffixRequest !== "auto") {
+			return this.#useSuffixRequest;
+		}
+		return SUFFIX_SUPPORT.get(resolve(this.url, "/").origin);
+	}
+
+	/**
+	 * Issue a suffix request, or (in `"auto"` mode) probe whether the origin
+	 * supports them: a partial response means yes, and a full response, a
+	 * `400` or `416` status or a network error (e.g. a refused CORS
+	 * preflight) means no. Other error statuses (which may be transient, or
+	 * about credentials) are thrown without concluding anything.
+	 */
+	async #trySuffixRequest(
+		key: AbsolutePath,
+		suffixLength: number,
+		options: RequestInit,
+	): Promise<Fetched | undefined | "unsupported"> {
+		let header = `bytes=-${suffixLength}`;
+		if (this.#useSuffixRequest !== "auto") {
+			return this.#fetchRange(key, header, options);
+		}
+		let origin = resolve(this.url, "/").origin;
+		let response: Response;
+		try {
+			response = await this.#sendRange(key, header, options);
+		} catch (err) {
+			options.signal?.throwIfAborted();
+			if (!(err instanceof TypeError)) {
+				throw err;
+			}
+			SUFFIX_SUPPORT.set(origin, false);
+			return "unsupported";
+		}
+		if (response.status === 400 || response.status === 416) {
+			SUFFIX_SUPPORT.set(origin, false);
+			return "unsupported";
+		}
+		let fetched = await this.#readRange(key, response);
+		if (fetched) {
+			SUFFIX_SUPPORT.set(origin, fetched.partial);
+		}
+		return fetched;
+	}
+
+	/** Send a ranged `GET`, recording the object size if the response has it. */
+	async #fetchRange(
+		key: AbsolutePath,
+		range: string,
+		options: RequestInit,
+	): Promise<Fetched | undefined> {
+		return this.#readRange(key, await this.#sendRange(key, range, options));
+	}
+
+	#sendRange(
+		key: AbsolutePath,
+		range: string,
+		options: RequestInit,
+	): Promise<Response> {
+		let init: RequestInit = {
 			...options,
-			headers: {
-				...options.headers,
-				Range: `bytes=${offset}-${length - 1}`,
-			},
+			headers: { ...options.headers, Range: range },
 		};
-		return this.#fetch(this.#buildRequest(url, rangeInit));
+		let url = resolve(this.url, key);
+		return this.#fetch(this.#buildRequest(url, init));
+	}
+
+	async #readRange(
+		key: AbsolutePath,
+		response: Response,
+	): Promise<Fetched | undefined> {
+		let bytes = await handleResponse(response);
+		if (!bytes) {
+			return undefined;
+		}
+		if (response.status === 200) {
+			this.#sizes.set(key, bytes.byteLength);
+			return { bytes, offset: 0, size: bytes.byteLength, partial: false };
+		}
+		let contentRange = parseContentRange(
+			response.headers.get("Content-Range"),
+		);
+		if (contentRange?.size !== undefined) {
+			this.#sizes.set(key, contentRange.size);
+		}
+		return { bytes, ...contentRange, partial: true };
+	}
+
+	/** Keep the tail of an object read for `tailPrefetch`. */
+	#keepTail(key: AbsolutePath, fetched: Fetched) {
+		let size = fetched.size ?? this.#sizes.get(key);
+		let offset =
+			fetched.offset ??
+			(size === undefined ? undefined : size - fetched.bytes.byteLength);
+		if (this.#tailPrefetch === 0 || offset === undefined) {
+			return;
+		}
+		this.#tails.delete(key);
+		this.#tails.set(key, { offset, bytes: fetched.bytes });
+		for (let oldest of this.#tails.keys()) {
+			if (this.#tails.size <= MAX_TAILS) break;
+			this.#tails.delete(oldest);
+		}
+	}
+
+	/** Bytes `[offset, offset + length)` from a kept tail, if it covers them. */
+	#readTail(
+		key: AbsolutePath,
+		offset: number,
+		length: number,
+	): Uint8Array | undefined {
+		let tail = this.#tails.get(key);
+		if (!tail) {
+			return undefined;
+		}
+		let start = Math.max(0, offset) - tail.offset;
+		let end = offset + length - tail.offset;
+		if (start < 0 || end > tail.bytes.byteLength) {
+			return undefined;
+		}
+		return tail.bytes.subarray(start, end);
 	}
 }
 
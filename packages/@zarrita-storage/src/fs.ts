@@ -15,14 +15,177 @@ function isErrorNoEntry(err: unknown): err is { code: "ENOENT" } {
 	return isObject && "code" in err && err.code === "ENOENT";
 }
 
+/** Options for configuring a {@link FileSystemStore}. */
+export interface FileSystemStoreOptions {
+	/**
+	 * Maximum number of files kept open for range reads. Handles are reused
+	 * across `getRange`/`getRanges` calls and the least recently used one is
+	 * closed once the limit is reached.
+	 *
+	 * @default 64
+	 */
+	maxOpenFiles?: number;
+	/**
+	 * Read into a reusable arena of blocks this many bytes large, instead of
+	 * allocating (and zero-filling) a fresh buffer for every read. The bytes
+	 * returned by `get`, `getRange` and `getRanges` are then views into the
+	 * arena that stay valid until {@linkcode FileSystemStore.release} is
+	 * called. Reads larger than a block get a buffer of their own.
+	 */
+	arenaBlockSize?: number;
+}
+
+/** Round up so that any typed array can view the bytes in place. */
+function align(offset: number): number {
+	return Math.ceil(offset / 8) * 8;
+}
+
+/**
+ * Bump allocator over reusable `ArrayBuffer` blocks. Releasing detaches every
+ * buffer handed out so far (views of them become empty), and recycles the
+ * blocks' memory for the next round of reads.
+ */
+class Arena {
+	#blockSize: number;
+	#blocks: ArrayBuffer[] = [];
+	#large: ArrayBuffer[] = [];
+	#spare: ArrayBuffer[] = [];
+	#used = 0;
+
+	constructor(blockSize: number) {
+		this.#blockSize = blockSize;
+	}
+
+	alloc(length: number): Uint8Array {
+		if (length > this.#blockSize) {
+			let buffer = new ArrayBuffer(length);
+			this.#large.push(buffer);
+			return new Uint8Array(buffer);
+		}
+		let block = this.#blocks.at(-1);
+		let offset = align(this.#used);
+		if (!block || offset + length > this.#blockSize) {
+			block = this.#spare.pop() ?? new ArrayBuffer(this.#blockSize);
+			this.#blocks.push(block);
+			offset = 0;
+		}
+		this.#used = offset + length;
+		return new Uint8Array(block, offset, length);
+	}
+
+	release() {
+		// Transferring moves the memory to a new ArrayBuffer without copying
+		// and detaches the old one, along with every view of it.
+		for (let block of this.#blocks) {
+			this.#spare.push(structuredClone(block, { transfer: [block] }));
+		}
+		for (let buffer of this.#large) {
+			structuredClone(buffer, { transfer: [buffer] });
+		}
+		this.#blocks = [];
+		this.#large = [];
+		this.#used = 0;
+	}
+}
+
+/** An open file shared by concurrent range reads. */
+type PooledFile = {
+	handle: fs.promises.FileHandle;
+	/** File size at open time, for suffix reads. */
+	size: number;
+	/** Reads currently using the handle. */
+	users: number;
+	/** Dropped from the pool; close once the last user releases it. */
+	evicted: boolean;
+	closed: boolean;
+};
+
 class FileSystemStore implements AsyncMutable {
-	constructor(public root: string) {}
+	#maxOpenFiles: number;
+	// Map iteration order doubles as recency order (oldest first).
+	#files = new Map<string, Promise<PooledFile>>();
+	#arena: Arena | undefined;
+
+	constructor(
+		public root: string,
+		options: FileSystemStoreOptions = {},
+	) {
+		this.#maxOpenFiles = Math.max(1, options.maxOpenFiles ?? 64);
+		if (options.arenaBlockSize) {
+			this.#arena = new Arena(options.arenaBlockSize);
+		}
+	}
+
+	async #acquire(fp: string): Promise<PooledFile> {
+		let pending = this.#files.get(fp);
+		if (pending) {
+			this.#files.delete(fp);
+			this.#files.set(fp, pending);
+		} else {
+			let opening = (async () => {
+				let handle = await fs.promises.open(fp, "r");
+				try {
+					let { size } = await handle.stat();
+					return { handle, size, users: 0, evicted: false, closed: false };
+				} catch (err) {
+					await handle.close();
+					throw err;
+				}
+			})();
+			opening.catch(() => {
+				if (this.#files.get(fp) === opening) this.#files.delete(fp);
+			});
+			this.#files.set(fp, opening);
+			for (let oldest of this.#files.keys()) {
+				if (this.#files.size <= this.#maxOpenFiles) break;
+				this.#evict(oldest).catch(() => {});
+			}
+			pending = opening;
+		}
+		let file = await pending;
+		if (file.closed) {
+			// Evicted and closed while we were waiting; open it again.
+			return this.#acquire(fp);
+		}
+		file.users++;
+		return file;
+	}
+
+	#close(file: PooledFile): Promise<void> {
+		file.closed = true;
+		return file.handle.close();
+	}
+
+	#release(file: PooledFile): Promise<void> | undefined {
+		file.users--;
+		if (file.evicted && file.users === 0) {
+			return this.#close(file);
+		}
+	}
+
+	/** Drop a file from the pool, closing it once no read is using it. */
+	async #evict(fp: string): Promise<void> {
+		let pending = this.#files.get(fp);
+		if (!pending) return;
+		this.#files.delete(fp);
+		let file = await pending.catch(() => undefined);
+		if (!file) return;
+		file.evicted = true;
+		if (file.users === 0 && !file.closed) {
+			await this.#close(file);
+		}
+	}
 
 	async get(
 		key: AbsolutePath,
 		opts: GetOptions = {},
 	): Promise<Uint8Array | undefined> {
 		opts.signal?.throwIfAborted();
+		if (this.#arena) {
+			let whole = (size: number) => [{ offset: 0, length: size }];
+			let data = await this.#read(key, whole, opts);
+			return data?.[0];
+		}
 		let fp = path.join(this.root, stripPrefix(key));
 		return fs.promises
 			.readFile(fp, { signal: opts.signal })
@@ -37,35 +200,83 @@ class FileSystemStore implements AsyncMutable {
 		range: RangeQuery,
 		opts: GetOptions = {},
 	): Promise<Uint8Array | undefined> {
+		let data = await this.getRanges(key, [range], opts);
+		return data?.[0];
+	}
+
+	/**
+	 * Read several byte ranges of one file with a single pooled handle.
+	 *
+	 * The ranges are read concurrently and returned in the order given, or
+	 * `undefined` if the file does not exist.
+	 */
+	async getRanges(
+		key: AbsolutePath,
+		ranges: RangeQuery[],
+		opts: GetOptions = {},
+	): Promise<Uint8Array[] | undefined> {
+		return this.#read(
+			key,
+			(size) =>
+				ranges.map((range) =>
+					"suffixLength" in range
+						? { offset: size - range.suffixLength, length: range.suffixLength }
+						: range,
+				),
+			opts,
+		);
+	}
+
+	/**
+	 * Read the byte ranges computed from the file's size, into the arena if
+	 * there is one (trimmed at the end of the file), or else into a single
+	 * zero-filled buffer.
+	 */
+	async #read(
+		key: AbsolutePath,
+		locate: (size: number) => Array<{ offset: number; length: number }>,
+		opts: GetOptions,
+	): Promise<Uint8Array[] | undefined> {
 		opts.signal?.throwIfAborted();
 		let fp = path.join(this.root, stripPrefix(key));
-		let filehandle: fs.promises.FileHandle | undefined;
+		let file: PooledFile;
 		try {
-			filehandle = await fs.promises.open(fp, "r");
-			if ("suffixLength" in range) {
-				let stats = await filehandle.stat();
-				let data = Buffer.alloc(range.suffixLength);
-				await filehandle.read(
-					data,
-					0,
-					range.suffixLength,
-					stats.size - range.suffixLength,
-				);
-				opts.signal?.throwIfAborted();
-				return data;
-			}
-			let data = Buffer.alloc(range.length);
-			await filehandle.read(data, 0, range.length, range.offset);
-			opts.signal?.throwIfAborted();
-			return data;
+			file = await this.#acquire(fp);
 		} catch (err: unknown) {
 			// return undefined is no file or directory
 			if (isErrorNoEntry(err)) {
 				return undefined;
 			}
 			throw err;
+		}
+		try {
+			let positions = locate(file.size);
+			let arena = this.#arena;
+			let views: Uint8Array[];
+			if (arena) {
+				views = positions.map(({ length }) => arena.alloc(length));
+			} else {
+				let total = positions.reduce((sum, { length }) => sum + length, 0);
+				let buffer = Buffer.alloc(total);
+				let start = 0;
+				views = positions.map(({ length }) => {
+					let view = buffer.subarray(start, start + length);
+					start += length;
+					return view;
+				});
+			}
+			let reads = await Promise.all(
+				views.map((view, i) =>
+					file.handle.read(view, 0, view.length, positions[i].offset),
+				),
+			);
+			opts.signal?.throwIfAborted();
+			if (arena) {
+				return views.map((view, i) => view.subarray(0, reads[i].bytesRead));
+			}
+			return views;
 		} finally {
-			await filehandle?.close();
+			await this.#release(file);
 		}
 	}
 
@@ -79,15 +290,36 @@ class FileSystemStore implements AsyncMutable {
 
 	async set(key: AbsolutePath, value: Uint8Array): Promise<void> {
 		const fp = path.join(this.root, stripPrefix(key));
+		await this.#evict(fp);
 		await fs.promises.mkdir(path.dirname(fp), { recursive: true });
 		await fs.promises.writeFile(fp, value, null);
 	}
 
 	async delete(key: AbsolutePath): Promise<boolean> {
 		const fp = path.join(this.root, stripPrefix(key));
+		await this.#evict(fp);
 		await fs.promises.unlink(fp);
 		return true;
 	}
+
+	/**
+	 * Recycle the read arena (see `arenaBlockSize`). Every `Uint8Array` read
+	 * from the store so far is detached and reads as empty afterwards, so
+	 * copy out anything that must outlive this call. Don't call it while
+	 * reads are in flight.
+	 */
+	release(): void {
+		this.#arena?.release();
+	}
+
+	/**
+	 * Close the files held open for range reads. The store stays usable and
+	 * reopens files as needed. Files changed by other processes may be read
+	 * through a stale handle (and size) until they are closed.
+	 */
+	async close(): Promise<void> {
+		await Promise.all([...this.#files.keys()].map((fp) => this.#evict(fp)));
+	}
 }
 
 export default FileSystemStore;
@@ -1,5 +1,6 @@
 export type { FetchStoreOptions } from "./fetch.js";
 export { default as FetchStore } from "./fetch.js";
+export type { FileSystemStoreOptions } from "./fs.js";
 export { default as FileSystemStore } from "./fs.js";
 export { default as ReferenceStore } from "./ref.js";
 export type * from "./types.js";
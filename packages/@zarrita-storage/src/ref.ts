@@ -1,8 +1,12 @@
 import { parse } from "reference-spec-reader";
 import type { FetchStoreOptions } from "./fetch.js";
-import FetchStore from "./fetch.js";
 import type { AbsolutePath, AsyncReadable, RangeQuery } from "./types.js";
-import { resolveUri } from "./util.js";
+import {
+	handleResponse,
+	mergeInit,
+	resolveUri,
+	stripPrefix,
+} from "./util.js";
 
 /**
  * Decode base64 to bytes. Uses Uint8Array.fromBase64 when available (ES2025),
@@ -40,13 +44,18 @@ const toBinary: (base64: string) => Uint8Array<ArrayBuffer> =
 				};
 			})();
 
-/** A resolved reference entry — base64 strings are decoded upfront. */
+/** A resolved reference entry — base64 strings are decoded. */
 type ResolvedEntry =
 	| Uint8Array<ArrayBuffer>
 	| string
 	| [url: string | null]
 	| [url: string | null, offset: number, length: number];
 
+/** Looks up the reference for a key (without the leading slash). */
+interface ReferenceLookup {
+	get(key: string): ResolvedEntry | undefined;
+}
+
 interface ReferenceStoreOptions {
 	target?: string | URL;
 	/**
@@ -59,19 +68,31 @@ interface ReferenceStoreOptions {
 	 * @deprecated Prefer providing a custom {@link ReferenceStoreOptions.fetch}.
 	 */
 	overrides?: RequestInit;
+	/**
+	 * Reads of references into the same file, issued in the same microtask
+	 * and separated by at most this many bytes, are fetched with a single
+	 * range request. Set to `-1` to fetch every reference on its own.
+	 *
+	 * @default 32768
+	 */
+	coalesceSize?: number;
 }
 
+const DEFAULT_COALESCE_SIZE = 32768;
+/** Coalesced requests stop growing past this many bytes. */
+const MAX_MERGED_BYTES = 8 * 1024 * 1024;
+
 /**
- * Compose a caller's Range header with a reference entry's byte window.
+ * The byte window of a reference entry to read for a caller's range.
  *
- * The incoming range (from FetchStore's getRange) is relative to the key's
- * logical data. The entry's offset/length is relative to the remote file.
+ * The incoming range is relative to the key's logical data. The entry's
+ * offset/length is relative to the remote file.
  */
 function composeRange(
-	range: string | null,
+	range: RangeQuery | undefined,
 	offset: number,
 	length: number,
-): string {
+): { offset: number; length: number } {
 	const end = offset + length;
 	let start: number;
 	let stop: number;
@@ -79,23 +100,30 @@ function composeRange(
 	if (!range) {
 		start = offset;
 		stop = end - 1;
-	} else if (range.startsWith("bytes=-")) {
-		const n = Number.parseInt(range.slice(7), 10);
-		start = end - Math.min(n, length);
+	} else if ("suffixLength" in range) {
+		start = end - Math.min(range.suffixLength, length);
 		stop = end - 1;
 	} else {
-		const [s, e] = range.slice(6).split("-").map(Number);
-		start = offset + s;
-		stop = Math.min(offset + e, end - 1);
+		start = offset + range.offset;
+		stop = Math.min(offset + range.offset + range.length - 1, end - 1);
 	}
 
 	if (start < offset || start > stop) {
 		throw new Error(
-			`Range out of bounds: requested ${range} for entry at offset=${offset}, length=${length}`,
+			`Range out of bounds: requested ${JSON.stringify(range)} for entry at offset=${offset}, length=${length}`,
 		);
 	}
 
-	return `bytes=${start}-${stop}`;
+	return { offset: start, length: stop - start + 1 };
+}
+
+/** Slice a caller's range out of inline bytes. */
+function sliceRange(bytes: Uint8Array, range?: RangeQuery): Uint8Array {
+	if (!range) return bytes;
+	if ("suffixLength" in range) {
+		return bytes.subarray(Math.max(0, bytes.length - range.suffixLength));
+	}
+	return bytes.subarray(range.offset, range.offset + range.length);
 }
 
 /** Default fetch that translates `s3://` and `gc://` URIs to HTTPS. */
@@ -108,12 +136,65 @@ function defaultFetch(request: Request): Promise<Response> {
 }
 
 /**
- * Decode base64 entries upfront into Uint8Array. Saves ~2.5x memory
- * (base64 string as UTF-16 vs raw bytes) and avoids decoding on every access.
+ * References of a spec without templates or generators, resolved on first
+ * access. Nothing is copied up front, so opening a spec with millions of
+ * keys costs no more than the `JSON.parse` that produced it. Base64 entries
+ * are decoded once and kept, which also saves memory (base64 strings are
+ * stored as UTF-16).
  */
-function parseReferencesJson(refsJson: unknown): Map<string, ResolvedEntry> {
+class LazyReferences implements ReferenceLookup {
+	#raw: Record<string, unknown>;
+	#resolved = new Map<string, ResolvedEntry>();
+
+	constructor(raw: Record<string, unknown>) {
+		this.#raw = raw;
+	}
+
+	get(key: string): ResolvedEntry | undefined {
+		let resolved = this.#resolved.get(key);
+		if (resolved !== undefined || !Object.hasOwn(this.#raw, key)) {
+			return resolved;
+		}
+		let ref = this.#raw[key];
+		if (typeof ref === "string" && ref.startsWith("base64:")) {
+			resolved = toBinary(ref.slice(7));
+		} else if (typeof ref === "string" || globalThis.Array.isArray(ref)) {
+			return ref as ResolvedEntry;
+		} else {
+			// Some writers inline JSON metadata as an object.
+			resolved = JSON.stringify(ref);
+		}
+		this.#resolved.set(key, resolved);
+		return resolved;
+	}
+}
+
+function hasEntries(value: unknown): boolean {
+	if (globalThis.Array.isArray(value)) return value.length > 0;
+	return (
+		typeof value === "object" &&
+		value !== null &&
+		Object.keys(value).length > 0
+	);
+}
+
+/**
+ * Index a reference spec. Plain specs (v0, or v1 without `templates` and
+ * `gen`) are resolved lazily; templated specs are expanded up front.
+ */
+function loadReferences(spec: Record<string, unknown>): ReferenceLookup {
+	if (!("version" in spec)) {
+		return new LazyReferences(spec);
+	}
+	if (
+		spec.version === 1 &&
+		!hasEntries(spec.templates) &&
+		!hasEntries(spec.gen)
+	) {
+		return new LazyReferences((spec.refs ?? {}) as Record<string, unknown>);
+	}
 	// @ts-expect-error - TS doesn't like the type of `parse`
-	const refs = parse(refsJson);
+	const refs = parse(spec);
 	const resolved = new Map<string, ResolvedEntry>();
 	for (const [key, ref] of refs) {
 		if (typeof ref === "string" && ref.startsWith("base64:")) {
@@ -125,16 +206,26 @@ function parseReferencesJson(refsJson: unknown): Map<string, ResolvedEntry> {
 	return resolved;
 }
 
+interface PendingRead {
+	offset: number;
+	length: number;
+	signal?: AbortSignal;
+	resolve: (value: Uint8Array | undefined) => void;
+	reject: (reason: unknown) => void;
+}
+
 /**
  * A store backed by a
  * [kerchunk reference spec](https://fsspec.github.io/kerchunk/spec.html),
  * enabling random access to data in monolithic files (HDF5, TIFF, etc.)
  * that have been mapped to Zarr.
  *
- * Uses {@link FetchStore} internally. The default fetch handler translates
- * cloud-storage URIs (`s3://`, `gs://`, `gcs://`) to HTTPS via
- * {@link ReferenceStore.resolveUri}. Inline entries (plain strings and
- * base64) are served directly without making any network requests.
+ * The default fetch handler translates cloud-storage URIs (`s3://`, `gs://`,
+ * `gcs://`) to HTTPS via {@link ReferenceStore.resolveUri}. Inline entries
+ * (plain strings and base64) are served directly without making any network
+ * requests. References without templates are resolved on first access, and
+ * reads of nearby byte ranges in the same file are fetched together (see
+ * {@link ReferenceStoreOptions.coalesceSize}).
  *
  * @example Basic usage
  * ```ts
@@ -164,53 +255,23 @@ function parseReferencesJson(refsJson: unknown): Map<string, ResolvedEntry> {
  * @experimental
  */
 class ReferenceStore implements AsyncReadable {
-	#inner: FetchStore;
+	#refs: ReferenceLookup;
+	#target: string | URL | undefined;
+	#fetch: (request: Request) => Promise<Response>;
+	#overrides: RequestInit;
+	#coalesceSize: number;
+	#pending = new Map<string, PendingRead[]>();
 
-	constructor(
-		refs: Map<string, ResolvedEntry>,
-		opts: ReferenceStoreOptions = {},
-	) {
-		const target = opts.target;
-		const fetchFn = opts.fetch ?? defaultFetch;
-
-		this.#inner = new FetchStore(target ?? "https://ref.invalid", {
-			overrides: opts.overrides,
-			async fetch(request) {
-				const key = new URL(request.url).pathname.slice(1);
-				const ref = refs.get(key);
-
-				if (!ref) {
-					return new Response(null, { status: 404 });
-				}
-
-				if (ref instanceof Uint8Array) {
-					return new Response(ref, { status: 200 });
-				}
-
-				if (typeof ref === "string") {
-					return new Response(ref);
-				}
-
-				const [url, offset, length] = ref;
-				const resolved = url ?? target;
-				if (!resolved) {
-					return new Response(null, { status: 404 });
-				}
-
-				const newRequest = new Request(String(resolved), request);
-				const range = composeRange(
-					request.headers.get("Range"),
-					offset ?? 0,
-					length ?? 0,
-				);
-				newRequest.headers.set("Range", range);
-				return fetchFn(newRequest);
-			},
-		});
+	constructor(refs: ReferenceLookup, opts: ReferenceStoreOptions = {}) {
+		this.#refs = refs;
+		this.#target = opts.target;
+		this.#fetch = opts.fetch ?? defaultFetch;
+		this.#overrides = opts.overrides ?? {};
+		this.#coalesceSize = opts.coalesceSize ?? DEFAULT_COALESCE_SIZE;
 	}
 
 	get(key: AbsolutePath, opts?: RequestInit): Promise<Uint8Array | undefined> {
-		return this.#inner.get(key, opts);
+		return this.#read(key, undefined, opts);
 	}
 
 	getRange(
@@ -218,7 +279,135 @@ class ReferenceStore implements AsyncReadable {
 		range: RangeQuery,
 		opts?: RequestInit,
 	): Promise<Uint8Array | undefined> {
-		return this.#inner.getRange(key, range, opts);
+		return this.#read(key, range, opts);
+	}
+
+	async #read(
+		key: AbsolutePath,
+		range: RangeQuery | undefined,
+		opts: RequestInit = {},
+	): Promise<Uint8Array | undefined> {
+		const ref = this.#refs.get(stripPrefix(key));
+		if (ref === undefined) {
+			return undefined;
+		}
+		if (typeof ref === "string") {
+			return sliceRange(new TextEncoder().encode(ref), range);
+		}
+		if (ref instanceof Uint8Array) {
+			return sliceRange(ref, range);
+		}
+		const url = ref[0] ?? this.#target;
+		if (!url) {
+			return undefined;
+		}
+		if (ref.length === 1) {
+			// Whole-file reference: the caller's range applies to the file as is.
+			if (range && !("suffixLength" in range)) {
+				return this.#enqueue(String(url), range, opts);
+			}
+			return this.#fetchRange(String(url), range, opts);
+		}
+		const window = composeRange(range, ref[1], ref[2]);
+		return this.#enqueue(String(url), window, opts);
+	}
+
+	/** Fetch (part of) a file, slicing the body if the range was ignored. */
+	async #fetchRange(
+		url: string,
+		range: RangeQuery | undefined,
+		opts: RequestInit,
+	): Promise<Uint8Array | undefined> {
+		const request = new Request(url, mergeInit(this.#overrides, opts));
+		if (range) {
+			request.headers.set(
+				"Range",
+				"suffixLength" in range
+					? `bytes=-${range.suffixLength}`
+					: `bytes=${range.offset}-${range.offset + range.length - 1}`,
+			);
+		}
+		const response = await this.#fetch(request);
+		const bytes = await handleResponse(response);
+		if (bytes && range && response.status === 200) {
+			return sliceRange(bytes, range);
+		}
+		return bytes;
+	}
+
+	/**
+	 * Queue a read of `offset..offset+length` in `url`, to be fetched along
+	 * with the other reads of that file made in the same microtask. Reads
+	 * with request options other than a signal are fetched on their own.
+	 */
+	#enqueue(
+		url: string,
+		window: { offset: number; length: number },
+		opts: RequestInit,
+	): Promise<Uint8Array | undefined> {
+		const { signal, ...rest } = opts;
+		if (this.#coalesceSize < 0 || Object.keys(rest).length > 0) {
+			return this.#fetchRange(url, window, opts);
+		}
+		return new Promise((resolve, reject) => {
+			let reads = this.#pending.get(url);
+			if (!reads) {
+				reads = [];
+				this.#pending.set(url, reads);
+				queueMicrotask(() => {
+					this.#pending.delete(url);
+					this.#flush(url, reads ?? []);
+				});
+			}
+			reads.push({ ...window, signal: signal ?? undefined, resolve, reject });
+		});
+	}
+
+	#flush(url: string, reads: PendingRead[]) {
+		reads.sort((a, b) => a.offset - b.offset);
+		let group: PendingRead[] = [];
+		let start = 0;
+		let end = 0;
+		for (const read of reads) {
+			const readEnd = read.offset + read.length;
+			if (
+				group.length > 0 &&
+				read.offset - end <= this.#coalesceSize &&
+				Math.max(end, readEnd) - start <= MAX_MERGED_BYTES
+			) {
+				group.push(read);
+				end = Math.max(end, readEnd);
+				continue;
+			}
+			if (group.length > 0) this.#fetchGroup(url, start, end, group);
+			group = [read];
+			start = read.offset;
+			end = readEnd;
+		}
+		if (group.length > 0) this.#fetchGroup(url, start, end, group);
+	}
+
+	async #fetchGroup(
+		url: string,
+		start: number,
+		end: number,
+		group: PendingRead[],
+	) {
+		try {
+			const present = group.flatMap((read) => read.signal ?? []);
+			const signal = present.length > 1 ? AbortSignal.any(present) : present[0];
+			const bytes = await this.#fetchRange(
+				url,
+				{ offset: start, length: end - start },
+				signal ? { signal } : {},
+			);
+			for (const read of group) {
+				const offset = read.offset - start;
+				read.resolve(bytes?.subarray(offset, offset + read.length));
+			}
+		} catch (err) {
+			for (const read of group) read.reject(err);
+		}
 	}
 
 	/**
@@ -241,9 +430,9 @@ class ReferenceStore implements AsyncReadable {
 		opts?: ReferenceStoreOptions,
 	): ReferenceStore | Promise<ReferenceStore> {
 		if (spec instanceof Promise) {
-			return spec.then((s) => new ReferenceStore(parseReferencesJson(s), opts));
+			return spec.then((s) => new ReferenceStore(loadReferences(s), opts));
 		}
-		return new ReferenceStore(parseReferencesJson(spec), opts);
+		return new ReferenceStore(loadReferences(spec), opts);
 	}
 
 	static async fromUrl(
@@ -252,7 +441,7 @@ class ReferenceStore implements AsyncReadable {
 	): Promise<ReferenceStore> {
 		const fetchFn = opts.fetch ?? defaultFetch;
 		const resp = await fetchFn(new Request(url));
-		const refs = parseReferencesJson(await resp.json());
+		const refs = loadReferences(await resp.json());
 		return new ReferenceStore(refs, opts);
 	}
 }
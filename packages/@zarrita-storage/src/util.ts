@@ -49,6 +49,21 @@ export function fetchRange(
 	return fetch(url, opts);
 }
 
+/** Read a response body, treating 404 as a missing key. */
+export async function handleResponse(
+	response: Response,
+): Promise<Uint8Array | undefined> {
+	if (response.status === 404) {
+		return undefined;
+	}
+	if (response.status === 200 || response.status === 206) {
+		return new Uint8Array(await response.arrayBuffer());
+	}
+	throw new Error(
+		`Unexpected response status ${response.status} ${response.statusText}`,
+	);
+}
+
 export function mergeInit(
 	storeOverrides: RequestInit,
 	requestOverrides: RequestInit,
@@ -0,0 +1,169 @@
+import { FileSystemStore } from "@zarrita/storage";
+import { describe } from "vitest";
+
+import * as zarr from "../src/index.js";
+import {
+	bench,
+	CHUNK_SHAPE,
+	COLUMNS,
+	field,
+	rowsFor,
+	tempDir,
+} from "./util.js";
+
+type Case = {
+	dtype: "float32" | "int32" | "string";
+	codecs: zarr.CodecMetadata[];
+};
+
+const LITTLE: zarr.CodecMetadata = {
+	name: "bytes",
+	configuration: { endian: "little" },
+};
+
+/**
+ * One array per codec in the registry, named without the `numcodecs.` prefix
+ * (the prefixed names are aliases of the same implementations).
+ */
+const CASES: Record<string, Case> = {
+	bytes: { dtype: "float32", codecs: [LITTLE] },
+	blosc: {
+		dtype: "float32",
+		codecs: [
+			LITTLE,
+			{
+				name: "blosc",
+				configuration: {
+					cname: "lz4",
+					clevel: 5,
+					shuffle: "shuffle",
+					typesize: 4,
+					blocksize: 0,
+				},
+			},
+		],
+	},
+	lz4: {
+		dtype: "float32",
+		codecs: [LITTLE, { name: "lz4", configuration: { acceleration: 1 } }],
+	},
+	zstd: {
+		dtype: "float32",
+		codecs: [
+			LITTLE,
+			{ name: "zstd", configuration: { level: 3, checksum: false } },
+		],
+	},
+	gzip: {
+		dtype: "float32",
+		codecs: [LITTLE, { name: "gzip", configuration: { level: 1 } }],
+	},
+	zlib: {
+		dtype: "float32",
+		codecs: [LITTLE, { name: "zlib", configuration: { level: 1 } }],
+	},
+	transpose: {
+		dtype: "float32",
+		codecs: [{ name: "transpose", configuration: { order: [1, 0] } }, LITTLE],
+	},
+	crc32c: {
+		dtype: "float32",
+		codecs: [LITTLE, { name: "crc32c", configuration: {} }],
+	},
+	"vlen-utf8": {
+		dtype: "string",
+		codecs: [{ name: "vlen-utf8", configuration: {} }],
+	},
+	bitround: {
+		dtype: "float32",
+		codecs: [{ name: "bitround", configuration: { keepbits: 10 } }, LITTLE],
+	},
+	cast_value: {
+		dtype: "int32",
+		codecs: [
+			{
+				name: "cast_value",
+				configuration: { data_type: "int16", out_of_range: "clamp" },
+			},
+			LITTLE,
+		],
+	},
+	scale_offset: {
+		dtype: "float32",
+		codecs: [
+			{ name: "scale_offset", configuration: { scale: 1000, offset: 1 } },
+			LITTLE,
+		],
+	},
+	shuffle: {
+		dtype: "float32",
+		codecs: [
+			LITTLE,
+			{ name: "numcodecs.shuffle", configuration: { elementsize: 4 } },
+		],
+	},
+	delta: {
+		dtype: "int32",
+		codecs: [
+			{ name: "numcodecs.delta", configuration: { dtype: "<i4" } },
+			LITTLE,
+		],
+	},
+};
+
+// json2 encodes v2 object arrays, which can't be created here.
+const SKIPPED = new Set(["json2"]);
+
+for (let name of zarr.registry.keys()) {
+	let bare = name.replace(/^numcodecs\./, "");
+	if (!(bare in CASES) && !SKIPPED.has(bare)) {
+		throw new Error(`No benchmark for codec "${name}"; add it to CASES.`);
+	}
+}
+
+/** The data written to an array of `dtype`, with its decoded size. */
+function contents(dtype: Case["dtype"]) {
+	let data: zarr.TypedArray<Case["dtype"]>;
+	let bytes: number;
+	let rows: number;
+	if (dtype === "string") {
+		// About 16 bytes per element, to compare with the numeric arrays' 4.
+		rows = rowsFor(16);
+		data = Array.from({ length: rows * COLUMNS }, (_, i) => `v${i}`);
+		bytes = rows * COLUMNS * 16;
+	} else {
+		rows = rowsFor(4);
+		data = field(dtype === "int32" ? Int32Array : Float32Array, rows);
+		bytes = data.byteLength;
+	}
+	let chunk = { data, shape: [rows, COLUMNS], stride: [COLUMNS, 1] };
+	return { chunk, bytes };
+}
+
+let store = new FileSystemStore(tempDir());
+let arrays = await Promise.all(
+	Object.entries(CASES).map(async ([name, { dtype, codecs }]) => {
+		let { chunk, bytes } = contents(dtype);
+		let arr = await zarr.create(zarr.root(store).resolve(name), {
+			shape: chunk.shape,
+			chunkShape: CHUNK_SHAPE,
+			dtype,
+			codecs,
+		});
+		await zarr.set(arr, null, chunk);
+		let chunks = chunk.data.length / (CHUNK_SHAPE[0] * CHUNK_SHAPE[1]);
+		return { name, arr, chunk, workload: { bytes, chunks } };
+	}),
+);
+
+describe("decode", () => {
+	for (let { name, arr, workload } of arrays) {
+		bench(`codec decode ${name}`, workload, () => zarr.get(arr));
+	}
+});
+
+describe("encode", () => {
+	for (let { name, arr, chunk, workload } of arrays) {
+		bench(`codec encode ${name}`, workload, () => zarr.set(arr, null, chunk));
+	}
+});
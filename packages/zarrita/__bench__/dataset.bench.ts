@@ -0,0 +1,82 @@
+import * as crypto from "node:crypto";
+import * as fs from "node:fs";
+import * as path from "node:path";
+import { FetchStore, FileSystemStore } from "@zarrita/storage";
+import { describe } from "vitest";
+
+import * as zarr from "../src/index.js";
+import { bench, serve } from "./util.js";
+
+/**
+ * Reads from a dataset written by `scripts/generate-bench.py`, which is far
+ * larger than what the other benchmarks generate. Point
+ * `ZARRITA_BENCH_DATA` at its output to run these, e.g.
+ *
+ *     uv run scripts/generate-bench.py --size 1GiB
+ *     ZARRITA_BENCH_DATA=fixtures/bench/data.zarr pnpm bench
+ */
+let dir = process.env.ZARRITA_BENCH_DATA;
+
+type Manifest = {
+	arrays: Record<
+		string,
+		{
+			chunks: number[];
+			regions: { selection: [number, number][]; sha256: string }[];
+		}
+	>;
+};
+
+/** The checksum `generate-bench.py` records for a region's contents. */
+function checksum(data: zarr.TypedArray<zarr.DataType>): string {
+	let hash = crypto.createHash("sha256");
+	if (Array.isArray(data)) {
+		for (let value of data) hash.update(`${value}\0`);
+	} else {
+		let { buffer, byteOffset, byteLength } = data as ArrayBufferView;
+		hash.update(new Uint8Array(buffer, byteOffset, byteLength));
+	}
+	return hash.digest("hex");
+}
+
+function decodedSize(data: zarr.TypedArray<zarr.DataType>): number {
+	if (Array.isArray(data)) {
+		return data.reduce((n: number, s: string) => n + s.length, 0);
+	}
+	return (data as ArrayBufferView).byteLength;
+}
+
+describe.skipIf(!dir)("dataset", async () => {
+	if (!dir) return;
+	let manifest: Manifest = JSON.parse(
+		fs.readFileSync(path.join(dir, "manifest.json"), "utf8"),
+	);
+	let stores = {
+		fs: new FileSystemStore(dir),
+		http: new FetchStore(await serve(dir)),
+	};
+	for (let [name, { chunks, regions }] of Object.entries(manifest.arrays)) {
+		// The first region is a whole chunk (or shard) and checked once.
+		let { selection, sha256 } = regions[0];
+		let slices = selection.map(([start, stop]) => zarr.slice(start, stop));
+		for (let [storeName, store] of Object.entries(stores)) {
+			let arr = await zarr.open.v3(zarr.root(store).resolve(name), {
+				kind: "array",
+			});
+			let { data } = await zarr.get(arr, slices);
+			if (checksum(data) !== sha256) {
+				throw new Error(`${name} read from ${storeName} has wrong contents`);
+			}
+			let workload = {
+				bytes: decodedSize(data),
+				chunks: selection.reduce(
+					(n, [start, stop], i) => n * Math.ceil((stop - start) / chunks[i]),
+					1,
+				),
+			};
+			bench(`dataset ${storeName} ${name}`, workload, () =>
+				zarr.get(arr, slices),
+			);
+		}
+	}
+});
@@ -0,0 +1,108 @@
+import { FetchStore, FileSystemStore } from "@zarrita/storage";
+import { describe } from "vitest";
+
+import * as zarr from "../src/index.js";
+import {
+	bench,
+	CHUNK_SHAPE,
+	COLUMNS,
+	field,
+	rowsFor,
+	serve,
+	tempDir,
+} from "./util.js";
+
+const LITTLE = { name: "bytes", configuration: { endian: "little" } };
+const ZSTD = { name: "zstd", configuration: { level: 3, checksum: false } };
+
+// Like the arrays written by scripts/generate-bench.py: zstd-compressed
+// chunks, either stored one per key or eight to a shard.
+let root = tempDir();
+let rows = rowsFor(4);
+let data = field(Float32Array, rows);
+let source = zarr.root(new FileSystemStore(root));
+let written = [
+	await zarr.create(source.resolve("plain"), {
+		shape: [rows, COLUMNS],
+		chunkShape: CHUNK_SHAPE,
+		dtype: "float32",
+		codecs: [LITTLE, ZSTD],
+	}),
+	await zarr.create(source.resolve("sharded"), {
+		shape: [rows, COLUMNS],
+		chunkShape: [CHUNK_SHAPE[0] * 4, COLUMNS],
+		dtype: "float32",
+		codecs: [
+			{
+				name: "sharding_indexed",
+				configuration: {
+					chunk_shape: CHUNK_SHAPE,
+					codecs: [LITTLE, ZSTD],
+					index_codecs: [LITTLE, { name: "crc32c", configuration: {} }],
+				},
+			},
+		],
+	}),
+];
+for (let arr of written) {
+	await zarr.set(arr, null, { data, shape: arr.shape, stride: [COLUMNS, 1] });
+}
+// Only the first row of chunks is stored; every other read is a fill.
+let partial = await zarr.create(source.resolve("sparse"), {
+	shape: [rows, COLUMNS],
+	chunkShape: CHUNK_SHAPE,
+	dtype: "float32",
+	codecs: [LITTLE, ZSTD],
+	fillValue: -1,
+});
+await zarr.set(partial, [zarr.slice(0, CHUNK_SHAPE[0]), null], {
+	data: data.subarray(0, CHUNK_SHAPE[0] * COLUMNS),
+	shape: [CHUNK_SHAPE[0], COLUMNS],
+	stride: [COLUMNS, 1],
+});
+
+let url = await serve(root);
+
+function open(store: zarr.Readable, path: string) {
+	return zarr.open.v3(zarr.root(store).resolve(path), { kind: "array" });
+}
+
+let chunkSize = CHUNK_SHAPE[0] * CHUNK_SHAPE[1];
+let whole = { bytes: data.byteLength, chunks: data.length / chunkSize };
+// Five rows of chunks, starting halfway into the first.
+let slab = [zarr.slice(CHUNK_SHAPE[0] / 2, CHUNK_SHAPE[0] * 5), null];
+let slabWorkload = {
+	bytes: (CHUNK_SHAPE[0] * 5 - CHUNK_SHAPE[0] / 2) * COLUMNS * 4,
+	chunks: 5 * (COLUMNS / CHUNK_SHAPE[1]),
+};
+// A single row crosses one chunk per column of chunks, in every shard.
+let row = [Math.floor(rows / 2), null];
+let rowWorkload = { bytes: COLUMNS * 4, chunks: COLUMNS / CHUNK_SHAPE[1] };
+
+let stores = {
+	fs: new FileSystemStore(root),
+	http: new FetchStore(url),
+	"http+coalescing": zarr.withRangeCoalescing(new FetchStore(url)),
+	"http+caching": zarr.withByteCaching(new FetchStore(url)),
+};
+
+for (let [storeName, store] of Object.entries(stores)) {
+	let arrays = {
+		plain: await open(store, "plain"),
+		sharded: await open(store, "sharded"),
+		sparse: await open(store, "sparse"),
+	};
+	describe(storeName, () => {
+		let { plain, sharded, sparse } = arrays;
+		bench(`read ${storeName} whole`, whole, () => zarr.get(plain));
+		bench(`read ${storeName} slab`, slabWorkload, () => zarr.get(plain, slab));
+		bench(`read ${storeName} sparse`, whole, () => zarr.get(sparse));
+		bench(`read ${storeName} sharded whole`, whole, () => zarr.get(sharded));
+		bench(`read ${storeName} sharded slab`, slabWorkload, () =>
+			zarr.get(sharded, slab),
+		);
+		bench(`read ${storeName} sharded row`, rowWorkload, () =>
+			zarr.get(sharded, row),
+		);
+	});
+}
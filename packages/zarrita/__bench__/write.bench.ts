@@ -0,0 +1,80 @@
+import { FileSystemStore } from "@zarrita/storage";
+import { describe } from "vitest";
+
+import * as zarr from "../src/index.js";
+import {
+	bench,
+	CHUNK_SHAPE,
+	COLUMNS,
+	field,
+	rowsFor,
+	tempDir,
+} from "./util.js";
+
+let rows = rowsFor(4);
+let data = field(Float32Array, rows);
+let chunkSize = CHUNK_SHAPE[0] * CHUNK_SHAPE[1];
+
+let arr = await zarr.create(new FileSystemStore(tempDir()), {
+	shape: [rows, COLUMNS],
+	chunkShape: CHUNK_SHAPE,
+	dtype: "float32",
+	codecs: [
+		{ name: "bytes", configuration: { endian: "little" } },
+		{ name: "zstd", configuration: { level: 3, checksum: false } },
+	],
+});
+await zarr.set(arr, null, { data, shape: arr.shape, stride: [COLUMNS, 1] });
+
+// Half a chunk's rows, starting mid-chunk, so every touched chunk is only
+// partly written and has to be read first.
+let half = CHUNK_SHAPE[0] / 2;
+let band = [zarr.slice(half / 2, half / 2 + half), null];
+let bandValue = {
+	data: data.subarray(0, half * COLUMNS),
+	shape: [half, COLUMNS],
+	stride: [COLUMNS, 1],
+};
+let bandWorkload = {
+	bytes: bandValue.data.byteLength,
+	chunks: COLUMNS / CHUNK_SHAPE[1],
+};
+
+// One row at a time, for the first row of chunks: many small writes to the
+// same chunks.
+function frame(i: number) {
+	return {
+		data: data.subarray(i * COLUMNS, (i + 1) * COLUMNS),
+		shape: [COLUMNS],
+		stride: [1],
+	};
+}
+let framesWorkload = {
+	bytes: CHUNK_SHAPE[0] * COLUMNS * 4,
+	chunks: COLUMNS / CHUNK_SHAPE[1],
+};
+
+describe("set", () => {
+	bench(
+		"write whole",
+		{ bytes: data.byteLength, chunks: data.length / chunkSize },
+		() => zarr.set(arr, null, { data, shape: arr.shape, stride: [COLUMNS, 1] }),
+	);
+	bench("write band", bandWorkload, () => zarr.set(arr, band, bandValue));
+	bench("write scalar band", bandWorkload, () => zarr.set(arr, band, 0));
+	bench("write rows", framesWorkload, async () => {
+		for (let i = 0; i < CHUNK_SHAPE[0]; i++) {
+			await zarr.set(arr, [i, null], frame(i));
+		}
+	});
+});
+
+describe("batchWrites", () => {
+	bench("write rows batched", framesWorkload, async () => {
+		let batch = zarr.batchWrites(arr);
+		for (let i = 0; i < CHUNK_SHAPE[0]; i++) {
+			await batch.set([i, null], frame(i));
+		}
+		await batch.flush();
+	});
+});
@@ -452,14 +452,33 @@ describe("CastValueCodec", () => {
 			expect(decoded.stride).toStrictEqual([3, 1]);
 		});
 
-		test("encode always throws", () => {
+		test("encode float64 -> int32 rounds to the stored type", () => {
 			const codec = CastValueCodec.fromConfig(
 				{ data_type: "int32" },
 				{ dataType: "float64" },
 			);
-			const chunk = makeChunk(new Int32Array([1]));
-			// @ts-expect-error - encode is typed as (_: never) => never
-			expect(() => codec.encode(chunk)).toThrow();
+			const chunk = makeChunk(new Float64Array([1, 2.5, -3.5]));
+			const encoded = codec.encode(chunk);
+			expect(encoded.data).toStrictEqual(new Int32Array([1, 2, -4]));
+			expect(codec.decode(encoded).data).toStrictEqual(
+				new Float64Array([1, 2, -4]),
+			);
+		});
+
+		test("encode applies the encode scalar_map", () => {
+			const codec = CastValueCodec.fromConfig(
+				{
+					data_type: "uint8",
+					scalar_map: { encode: [["NaN", 255]], decode: [[255, "NaN"]] },
+				},
+				{ dataType: "float32" },
+			);
+			const chunk = makeChunk(new Float32Array([Number.NaN, 7]));
+			const encoded = codec.encode(chunk);
+			expect(encoded.data).toStrictEqual(new Uint8Array([255, 7]));
+			expect(codec.decode(encoded).data).toStrictEqual(
+				new Float32Array([Number.NaN, 7]),
+			);
 		});
 
 		test("throws for unsupported source data type", () => {
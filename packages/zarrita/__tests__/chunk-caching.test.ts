@@ -0,0 +1,113 @@
+import * as path from "node:path";
+import * as url from "node:url";
+import { FileSystemStore } from "@zarrita/storage";
+import { describe, expect, it, vi } from "vitest";
+import * as zarr from "../src/index.js";
+
+let __dirname = path.dirname(url.fileURLToPath(import.meta.url));
+let fixturesRoot = path.resolve(__dirname, "../../../fixtures/v3/data.zarr");
+
+async function openFixture(name: string) {
+	let store = new FileSystemStore(fixturesRoot);
+	return zarr.open.v3(zarr.root(store).resolve(name), { kind: "array" });
+}
+
+describe("withChunkCaching", () => {
+	it("serves repeated reads from the cache", async () => {
+		let arr = await openFixture("2d.chunked.i2");
+		let spy = vi.spyOn(arr, "getChunk");
+		let cached = zarr.withChunkCaching(arr);
+
+		let a = await zarr.get(cached);
+		let b = await zarr.get(cached);
+
+		expect(b).toStrictEqual(a);
+		expect(a).toStrictEqual(await zarr.get(arr));
+		expect(spy).toHaveBeenCalledTimes(4);
+		expect(cached.chunkCacheStats()).toMatchObject({
+			hits: 4,
+			misses: 4,
+			evictions: 0,
+			entries: 4,
+			bytes: 8,
+		});
+	});
+
+	it("deduplicates concurrent reads of the same chunk", async () => {
+		let arr = await openFixture("1d.chunked.i2");
+		let spy = vi.spyOn(arr, "getChunk");
+		let cached = zarr.withChunkCaching(arr);
+
+		let [a, b] = await Promise.all([
+			cached.getChunk([0]),
+			cached.getChunk([0]),
+		]);
+
+		expect(a).toBe(b);
+		expect(spy).toHaveBeenCalledOnce();
+		expect(cached.chunkCacheStats()).toMatchObject({ hits: 1, misses: 1 });
+	});
+
+	it("evicts least-recently-used chunks past maxBytes", async () => {
+		let arr = await openFixture("2d.chunked.i2");
+		// Each chunk is a single int16 (2 bytes); room for two.
+		let cached = zarr.withChunkCaching(arr, { maxBytes: 4 });
+
+		await cached.getChunk([0, 0]);
+		await cached.getChunk([0, 1]);
+		await cached.getChunk([0, 0]); // refresh [0, 0]
+		await cached.getChunk([1, 0]); // evicts [0, 1]
+		await cached.getChunk([0, 0]);
+
+		expect(cached.chunkCacheStats()).toMatchObject({
+			hits: 2,
+			misses: 3,
+			evictions: 1,
+			entries: 2,
+			bytes: 4,
+		});
+	});
+
+	it("uses a custom cache container", async () => {
+		let arr = await openFixture("1d.chunked.i2");
+		let cache = new Map<string, zarr.Chunk<zarr.DataType>>();
+		let cached = zarr.withChunkCaching(arr, { cache });
+
+		await zarr.get(cached);
+
+		expect(cache.size).toBe(arr.shape[0] / arr.chunks[0]);
+		expect([...cache.keys()][0]).toBe(`${arr.path}\0${0}`);
+	});
+
+	it("retries a joined read that was aborted by another caller", async () => {
+		let arr = await openFixture("1d.chunked.i2");
+		let cached = zarr.withChunkCaching(arr);
+		let controller = new AbortController();
+		controller.abort();
+
+		let [first, second] = await Promise.allSettled([
+			cached.getChunk([0], { signal: controller.signal }),
+			cached.getChunk([0]),
+		]);
+
+		expect(first.status).toBe("rejected");
+		expect(second.status).toBe("fulfilled");
+	});
+
+	it("clearChunkCache drops every entry", async () => {
+		let arr = await openFixture("1d.chunked.i2");
+		let cached = zarr.withChunkCaching(arr);
+		await zarr.get(cached);
+		cached.clearChunkCache();
+		expect(cached.chunkCacheStats()).toMatchObject({ entries: 0, bytes: 0 });
+	});
+
+	it("clearChunkCache clears a custom cache container", async () => {
+		let arr = await openFixture("1d.chunked.i2");
+		let cache = new Map<string, zarr.Chunk<zarr.DataType>>();
+		let cached = zarr.withChunkCaching(arr, { cache });
+		await zarr.get(cached);
+		cached.clearChunkCache();
+		expect(cache.size).toBe(0);
+	});
+});
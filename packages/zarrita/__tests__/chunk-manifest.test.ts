@@ -0,0 +1,183 @@
+import { describe, expect, it, vi } from "vitest";
+
+import * as zarr from "../src/index.js";
+
+/** An in-memory store that also serves range reads, as sharding requires. */
+class RangeMap extends Map<string, Uint8Array> {
+	getRange(
+		key: string,
+		range: { offset: number; length: number } | { suffixLength: number },
+	) {
+		let bytes = this.get(key);
+		if (!bytes) return undefined;
+		if ("suffixLength" in range) {
+			return bytes.subarray(bytes.length - range.suffixLength);
+		}
+		return bytes.subarray(range.offset, range.offset + range.length);
+	}
+}
+
+/** A 4x4 array of 2x2 chunks, with only the first and last chunk written. */
+async function sparse(store: RangeMap) {
+	let arr = await zarr.create(zarr.root(store).resolve("/sparse"), {
+		shape: [4, 4],
+		dtype: "int32",
+		chunkShape: [2, 2],
+		fillValue: -1,
+	});
+	await zarr.set(arr, [zarr.slice(0, 2), zarr.slice(0, 2)], 1);
+	await zarr.set(arr, [zarr.slice(2, 4), zarr.slice(2, 4)], 2);
+	return arr;
+}
+
+const EXPECTED = new Int32Array([
+	1, 1, -1, -1, 1, 1, -1, -1, -1, -1, 2, 2, -1, -1, 2, 2,
+]);
+
+describe("buildChunkManifest", () => {
+	it("records stored chunks from a listing without requests", async () => {
+		let store = new RangeMap();
+		let arr = await sparse(store);
+		let get = vi.spyOn(store, "get");
+		let manifest = await zarr.buildChunkManifest([arr], {
+			keys: store.keys(),
+		});
+		expect(get).not.toHaveBeenCalled();
+		expect(manifest).toStrictEqual({
+			zarrita_chunk_manifest: 1,
+			arrays: { "/sparse": { grid: [2, 2], stored: btoa("\x09") } },
+		});
+	});
+
+	it("probes for stored chunks without a listing", async () => {
+		let store = new RangeMap();
+		let arr = await sparse(store);
+		let listed = await zarr.buildChunkManifest([arr], {
+			keys: [...store.keys()].map((key) => key.slice(1)),
+		});
+		expect(await zarr.buildChunkManifest([arr])).toStrictEqual(listed);
+	});
+});
+
+describe("withChunkManifest", () => {
+	it("reads missing chunks without requests", async () => {
+		let store = new RangeMap();
+		let manifest = await zarr.buildChunkManifest([await sparse(store)]);
+		let get = vi.spyOn(store, "get");
+		let wrapped = await zarr.withChunkManifest(store, { manifest });
+		let arr = await zarr.open.v3(zarr.root(wrapped).resolve("sparse"), {
+			kind: "array",
+		});
+		get.mockClear();
+
+		expect((await zarr.get(arr)).data).toStrictEqual(EXPECTED);
+		expect(get.mock.calls.map(([key]) => key)).toStrictEqual([
+			"/sparse/c/0/0",
+			"/sparse/c/1/1",
+		]);
+	});
+
+	it("loads a manifest written to the store", async () => {
+		let store = new RangeMap();
+		let arr = await sparse(store);
+		await zarr.writeChunkManifest(
+			store,
+			await zarr.buildChunkManifest([arr], { keys: store.keys() }),
+		);
+		let wrapped = await zarr.withChunkManifest(store);
+		expect(wrapped.getChunkPresence("/sparse")?.has([0, 1])).toBe(false);
+		expect(wrapped.getChunkPresence("/sparse")?.has([1, 1])).toBe(true);
+		expect(wrapped.getChunkPresence("/other")).toBeUndefined();
+	});
+
+	it("throws when there is no manifest", async () => {
+		await expect(zarr.withChunkManifest(new Map())).rejects.toThrow(
+			zarr.NotFoundError,
+		);
+		let store = new Map([
+			["/chunk_manifest.json", new TextEncoder().encode("{}")],
+		]);
+		await expect(zarr.withChunkManifest(store)).rejects.toThrow(
+			zarr.InvalidMetadataError,
+		);
+	});
+
+	it("forgets arrays written through the store", async () => {
+		let store = new RangeMap();
+		let manifest = await zarr.buildChunkManifest([await sparse(store)], {
+			keys: store.keys(),
+		});
+		let wrapped = await zarr.withChunkManifest(store, { manifest });
+		let arr = await zarr.open.v3(zarr.root(wrapped).resolve("sparse"), {
+			kind: "array",
+		});
+		await zarr.set(arr, [zarr.slice(0, 2), zarr.slice(2, 4)], 3);
+
+		expect(wrapped.getChunkPresence("/sparse")).toBeUndefined();
+		expect((await zarr.get(arr)).data).toStrictEqual(
+			new Int32Array([1, 1, 3, 3, 1, 1, 3, 3, -1, -1, 2, 2, -1, -1, 2, 2]),
+		);
+	});
+
+	it("skips shards with no stored chunks to read", async () => {
+		let store = new RangeMap();
+		let arr = await zarr.create(zarr.root(store).resolve("/sharded"), {
+			shape: [8, 4],
+			dtype: "int32",
+			chunkShape: [4, 4],
+			fillValue: 0,
+			codecs: [
+				{
+					name: "sharding_indexed",
+					configuration: {
+						chunk_shape: [2, 2],
+						codecs: [{ name: "bytes", configuration: { endian: "little" } }],
+						index_codecs: [
+							{ name: "bytes", configuration: { endian: "little" } },
+						],
+					},
+				},
+			],
+		});
+		// One inner chunk of the first shard, and none of the second.
+		await zarr.set(arr, [zarr.slice(0, 2), zarr.slice(0, 2)], 5);
+		let manifest = await zarr.buildChunkManifest([arr], {
+			keys: store.keys(),
+		});
+		expect(manifest.arrays["/sharded"].grid).toStrictEqual([4, 2]);
+
+		let getRange = vi.spyOn(store, "getRange");
+		let wrapped = await zarr.withChunkManifest(store, { manifest });
+		let opened = await zarr.open.v3(zarr.root(wrapped).resolve("sharded"), {
+			kind: "array",
+		});
+		let { data } = await zarr.get(opened);
+
+		expect(data.subarray(0, 4)).toStrictEqual(new Int32Array([5, 5, 0, 0]));
+		expect(data.subarray(8).every((v) => v === 0)).toBe(true);
+		let keys = new Set(getRange.mock.calls.map(([key]) => key));
+		expect(keys).toStrictEqual(new Set(["/sharded/c/0/0"]));
+	});
+
+	it("forgets a root array written through the store", async () => {
+		let store = new RangeMap();
+		let arr = await zarr.create(store, {
+			shape: [4],
+			dtype: "int32",
+			chunkShape: [2],
+			fillValue: -1,
+		});
+		await zarr.set(arr, [zarr.slice(0, 2)], 1);
+		let manifest = await zarr.buildChunkManifest([arr], {
+			keys: store.keys(),
+		});
+		let wrapped = await zarr.withChunkManifest(store, { manifest });
+		let opened = await zarr.open.v3(wrapped, { kind: "array" });
+		await zarr.set(opened, [zarr.slice(2, 4)], 2);
+
+		expect(wrapped.getChunkPresence("/")).toBeUndefined();
+		expect((await zarr.get(opened)).data).toStrictEqual(
+			new Int32Array([1, 1, 2, 2]),
+		);
+	});
+});
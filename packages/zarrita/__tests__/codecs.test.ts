@@ -1,5 +1,12 @@
-import { describe, expect, it } from "vitest";
+import { describe, expect, it, vi } from "vitest";
+import { createCodecPipeline } from "../src/codecs.js";
+import { BitroundCodec } from "../src/codecs/bitround.js";
+import { Crc32cCodec, crc32c } from "../src/codecs/crc32c.js";
+import { GzipCodec } from "../src/codecs/gzip.js";
 import { ShuffleCodec } from "../src/codecs/shuffle.js";
+import { VLenUTF8 } from "../src/codecs/vlen-utf8.js";
+import { ZlibCodec } from "../src/codecs/zlib.js";
+import { compress, decompressWithStreams } from "../src/util.js";
 
 describe("shuffle", () => {
 	it("roundtrips with elementSize=4", () => {
@@ -40,3 +47,154 @@ describe("shuffle", () => {
 		expect(decoded).toEqual(input);
 	});
 });
+
+describe("crc32c", () => {
+	it("appends the little-endian CRC-32C checksum", () => {
+		let codec = Crc32cCodec.fromConfig();
+		let input = new TextEncoder().encode("123456789");
+		let encoded = codec.encode(input);
+		expect(encoded.subarray(0, 9)).toEqual(input);
+		expect(new DataView(encoded.buffer).getUint32(9, true)).toBe(0xe3069283);
+		expect(codec.decode(encoded)).toEqual(input);
+	});
+
+	it("matches a bytewise CRC on unaligned lengths", () => {
+		let bytes = new Uint8Array(1001).map((_, i) => (i * 31) & 0xff);
+		for (let n of [0, 1, 7, 8, 9, 1001]) {
+			let view = bytes.subarray(0, n);
+			let crc = 0xffffffff;
+			for (let b of view) {
+				crc ^= b;
+				for (let k = 0; k < 8; k++) {
+					crc = crc & 1 ? (crc >>> 1) ^ 0x82f63b78 : crc >>> 1;
+				}
+			}
+			expect(crc32c(view)).toBe((crc ^ 0xffffffff) >>> 0);
+		}
+	});
+});
+
+describe.each([
+	["gzip", GzipCodec],
+	["zlib", ZlibCodec],
+])("%s", (_, Codec) => {
+	it("round-trips", async () => {
+		let codec = Codec.fromConfig({ level: 1 });
+		let input = new Uint8Array(100_000).map((_, i) => i % 7);
+		let encoded = await codec.encode(input);
+		expect(encoded.byteLength).toBeLessThan(input.byteLength);
+		expect(await codec.decode(encoded)).toEqual(input);
+	});
+
+	it("decodes into a provided buffer", async () => {
+		let codec = Codec.fromConfig({ level: 1 });
+		let input = new Uint8Array(100_000).map((_, i) => i % 7);
+		let encoded = await codec.encode(input);
+		let out = new Uint8Array(new SharedArrayBuffer(input.byteLength));
+		let decoded = await codec.decode(encoded, out);
+		expect(decoded).toBe(out);
+		expect(decoded).toEqual(input);
+	});
+});
+
+describe("decompressWithStreams", () => {
+	let input = new Uint8Array(100_000).map((_, i) => i % 7);
+
+	it("writes into `out` when the size matches", async () => {
+		let encoded = await compress(input, { format: "gzip" });
+		let out = new Uint8Array(input.byteLength);
+		let decoded = await decompressWithStreams(encoded, {
+			format: "gzip",
+			out,
+		});
+		expect(decoded).toBe(out);
+		expect(decoded).toEqual(input);
+	});
+
+	it("falls back to a new buffer when `out` is too small", async () => {
+		let encoded = await compress(input, { format: "deflate" });
+		let out = new Uint8Array(10);
+		let decoded = await decompressWithStreams(encoded, {
+			format: "deflate",
+			out,
+		});
+		expect(decoded).toEqual(input);
+	});
+
+	it("returns a view when the output is shorter than `out`", async () => {
+		let encoded = await compress(input, { format: "gzip" });
+		let out = new Uint8Array(input.byteLength + 8);
+		let decoded = await decompressWithStreams(encoded, {
+			format: "gzip",
+			out,
+		});
+		expect(decoded.buffer).toBe(out.buffer);
+		expect(decoded).toEqual(input);
+	});
+});
+
+describe("codec pipeline", () => {
+	let BYTES = { name: "bytes", configuration: { endian: "little" } };
+	let chunk = {
+		data: new Int32Array([1, 2, 3, 4]),
+		shape: [2, 2],
+		stride: [2, 1],
+	};
+	function pipeline(name: string) {
+		return createCodecPipeline({
+			dataType: "int32",
+			shape: [2, 2],
+			codecs: [BYTES, { name, configuration: { level: 1 } }],
+			fillValue: 0,
+		});
+	}
+
+	it("does not hand an output buffer to codecs that ignore it", async () => {
+		let spy = vi.spyOn(Crc32cCodec.prototype, "decode");
+		let codec = pipeline("crc32c");
+		let decoded = await codec.decode(await codec.encode(chunk));
+		expect(decoded.data).toStrictEqual(chunk.data);
+		expect(spy.mock.calls[0][1]).toBeUndefined();
+		spy.mockRestore();
+	});
+
+	it("tells codecs that decode into a buffer the decoded size", async () => {
+		let spy = vi.spyOn(GzipCodec.prototype, "decode");
+		let codec = pipeline("gzip");
+		let bytes = await codec.encode(chunk);
+		await codec.decode(bytes);
+		expect(spy.mock.calls[0].slice(1)).toStrictEqual([undefined, 16]);
+		let out = new Uint8Array(16);
+		let decoded = await codec.decode(bytes, { out });
+		expect(spy.mock.calls[1][1]).toBe(out);
+		expect(decoded.data.buffer).toBe(out.buffer);
+		spy.mockRestore();
+	});
+});
+
+describe("vlen-utf8", () => {
+	it("round-trips", () => {
+		let codec = VLenUTF8.fromConfig(undefined, { shape: [4] });
+		let data = ["a", "", "héllo", "🦀"];
+		let encoded = codec.encode({ data, shape: [4], stride: [1] });
+		expect(codec.decode(encoded).data).toEqual(data);
+		// a view at a non-zero offset into a larger buffer
+		let padded = new Uint8Array(encoded.byteLength + 3);
+		padded.set(encoded, 3);
+		expect(codec.decode(padded.subarray(3)).data).toEqual(data);
+	});
+});
+
+describe("bitround", () => {
+	it.each([
+		["float32", Float32Array],
+		["float64", Float64Array],
+	] as const)("keeps the requested mantissa bits (%s)", (dataType, Ctr) => {
+		let codec = BitroundCodec.fromConfig({ keepbits: 2 }, { dataType });
+		let input = new Ctr([1.2345678, -3.14159, 1000.5, 0, 1.5]);
+		let encoded = codec.encode({ data: input, shape: [5], stride: [1] });
+		expect(encoded.data).toStrictEqual(new Ctr([1.25, -3, 1024, 0, 1.5]));
+		// input is left untouched
+		expect(input[0]).toBeCloseTo(1.2345678);
+	});
+});
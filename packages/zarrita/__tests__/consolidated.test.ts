@@ -1,14 +1,14 @@
 import * as path from "node:path";
 import * as url from "node:url";
 import { FileSystemStore } from "@zarrita/storage";
-import { assert, describe, expect, it } from "vitest";
-import { NotFoundError } from "../src/errors.js";
+import { assert, describe, expect, it, vi } from "vitest";
+import { NotFoundError, UnsupportedError } from "../src/errors.js";
 import {
 	withConsolidatedMetadata,
 	withMaybeConsolidatedMetadata,
 } from "../src/extension/consolidation.js";
 import { Array as ZarrArray } from "../src/hierarchy.js";
-import { open } from "../src/open.js";
+import { open, openAll } from "../src/open.js";
 
 let __dirname = path.dirname(url.fileURLToPath(import.meta.url));
 
@@ -226,8 +226,8 @@ describe("withConsolidatedMetadata (v3)", () => {
 		let band = await open(grp.resolve("band"), { kind: "array" });
 		expect(time.dtype).toBe("int64");
 		expect(band.dtype).toBe("int16");
-		// `ensureCorrectScalar` still runs on the freshly-decoded copy inside
-		// `_openV3`, so int64 fill_values are converted to BigInt.
+		// The `Array` constructor converts int64 fill_values to BigInt on its
+		// own copy of the metadata, leaving the shared document alone.
 		expect(typeof time.fillValue).toBe("bigint");
 		// Re-opening the same array must also work — proves the cache entry
 		// stayed JSON-serializable after the first open.
@@ -236,6 +236,117 @@ describe("withConsolidatedMetadata (v3)", () => {
 	});
 });
 
+describe("parsed metadata", () => {
+	it("gives each opened node its own attributes and shape", async () => {
+		let rootMeta = {
+			zarr_format: 3,
+			node_type: "group",
+			attributes: { tags: ["root"] },
+			consolidated_metadata: {
+				kind: "inline",
+				must_understand: false,
+				metadata: {
+					a: {
+						node_type: "array",
+						zarr_format: 3,
+						shape: [4],
+						data_type: "int16",
+						fill_value: 0,
+						chunk_grid: {
+							name: "regular",
+							configuration: { chunk_shape: [4] },
+						},
+						chunk_key_encoding: {
+							name: "default",
+							configuration: { separator: "/" },
+						},
+						codecs: [{ name: "bytes", configuration: { endian: "little" } }],
+						attributes: { units: { name: "m" } },
+						dimension_names: ["x"],
+					},
+				},
+			},
+		};
+		let bytes = new TextEncoder().encode(JSON.stringify(rootMeta));
+		let backing = {
+			async get(key: string) {
+				return key === "/zarr.json" ? bytes : undefined;
+			},
+		};
+		let store = await withConsolidatedMetadata(backing, { format: "v3" });
+		let grp = await open.v3(store, { kind: "group" });
+		let arr = await open.v3(grp.resolve("a"), { kind: "array" });
+		(grp.attrs.tags as string[]).push("changed");
+		(arr.attrs.units as { name: string }).name = "changed";
+		arr.shape[0] = 100;
+		// biome-ignore lint/style/noNonNullAssertion: Fine for a test
+		arr.dimensionNames![0] = "changed";
+
+		let grpAgain = await open.v3(store, { kind: "group" });
+		let arrAgain = await open.v3(grp.resolve("a"), { kind: "array" });
+		expect(grpAgain.attrs).toStrictEqual({ tags: ["root"] });
+		expect(arrAgain.attrs).toStrictEqual({ units: { name: "m" } });
+		expect(arrAgain.shape).toStrictEqual([4]);
+		expect(arrAgain.dimensionNames).toStrictEqual(["x"]);
+		let served = await store.get("/a/zarr.json");
+		expect(JSON.parse(new TextDecoder().decode(served))).toMatchObject({
+			attributes: { units: { name: "m" } },
+			shape: [4],
+		});
+	});
+
+	it("opens nodes without a JSON round-trip per open", async () => {
+		let root = path.join(__dirname, "../../../fixtures/v2/data.zarr");
+		let store = await withConsolidatedMetadata(new FileSystemStore(root));
+		let parse = vi.spyOn(JSON, "parse");
+		let stringify = vi.spyOn(JSON, "stringify");
+		try {
+			let grp = await open.v2(store, { kind: "group" });
+			let arr = await open.v2(grp.resolve("1d.chunked.i2"), {
+				kind: "array",
+			});
+			expect(arr.shape).toStrictEqual([4]);
+			expect(parse).not.toHaveBeenCalled();
+			expect(stringify).not.toHaveBeenCalled();
+		} finally {
+			parse.mockRestore();
+			stringify.mockRestore();
+		}
+	});
+
+	it("openAll opens every listed node", async () => {
+		let root = path.join(__dirname, "../../../fixtures/v2/data.zarr");
+		let store = await withConsolidatedMetadata(new FileSystemStore(root));
+		let nodes = await openAll(store);
+		let contents = store.contents();
+		expect(nodes.size).toBe(contents.length);
+		for (let { path, kind } of contents) {
+			expect(nodes.get(path)?.kind).toBe(kind);
+		}
+	});
+
+	it("openAll resolves paths against a location", async () => {
+		let root = path.join(
+			__dirname,
+			"../../../fixtures/v3/data.zarr/consolidated",
+		);
+		let store = await withConsolidatedMetadata(new FileSystemStore(root), {
+			format: "v3",
+		});
+		let grp = await open(store, { kind: "group" });
+		let nodes = await openAll(grp, ["1d.chunked.i2", "/1d.chunked.i2"]);
+		expect([...nodes.keys()]).toStrictEqual(["/1d.chunked.i2"]);
+		expect(nodes.get("/1d.chunked.i2")).toBeInstanceOf(ZarrArray);
+	});
+
+	it("openAll requires paths for stores that can't list", async () => {
+		let root = path.join(__dirname, "../../../fixtures/v2/data.zarr");
+		await expect(openAll(new FileSystemStore(root))).rejects.toThrowError(
+			UnsupportedError,
+		);
+	});
+});
+
 describe("withConsolidatedMetadata (format array)", () => {
 	it("tries formats in order", async () => {
 		let root = path.join(
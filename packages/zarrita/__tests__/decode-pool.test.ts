@@ -0,0 +1,143 @@
+import * as path from "node:path";
+import * as url from "node:url";
+import { FileSystemStore } from "@zarrita/storage";
+import { describe, expect, it, vi } from "vitest";
+import * as zarr from "../src/index.js";
+
+let __dirname = path.dirname(url.fileURLToPath(import.meta.url));
+let fixturesRoot = path.resolve(__dirname, "../../../fixtures/v3/data.zarr");
+
+async function openFixture(name: string) {
+	let store = new FileSystemStore(fixturesRoot);
+	return zarr.open.v3(zarr.root(store).resolve(name), { kind: "array" });
+}
+
+/**
+ * An in-process stand-in for a worker: messages are structured-cloned (with
+ * transfers) across two EventTargets, one of which runs `exposeDecodeWorker`.
+ */
+function fakeWorker() {
+	let main = new EventTarget();
+	let scope = new EventTarget();
+	let post =
+		(target: EventTarget) => (message: unknown, transfer?: Transferable[]) => {
+			let data = structuredClone(message, { transfer });
+			queueMicrotask(() =>
+				target.dispatchEvent(new MessageEvent("message", { data })),
+			);
+		};
+	zarr.exposeDecodeWorker({
+		postMessage: post(main),
+		// @ts-expect-error - EventTarget listener signature is wider
+		addEventListener: scope.addEventListener.bind(scope),
+	});
+	return {
+		postMessage: vi.fn(post(scope)),
+		addEventListener: main.addEventListener.bind(main),
+		terminate: vi.fn(),
+	};
+}
+
+describe("createDecodePool", () => {
+	it.each([
+		"1d.contiguous.gzip.i2",
+		"1d.contiguous.blosc.i2",
+		"2d.chunked.i2",
+		"1d.contiguous.b1",
+		"1d.chunked.string.vlen",
+		"3d.chunked.mixed.i2.F",
+		"2d.chunked.compressed.sharded.i2",
+	])("decodes %s identically to the calling thread", async (name) => {
+		let arr = await openFixture(name);
+		let pool = zarr.createDecodePool(fakeWorker, { size: 2 });
+		let expected = await zarr.get(arr);
+		let result = await zarr.get(arr, null, { decodePool: pool });
+		expect(result).toStrictEqual(expected);
+	});
+
+	it("spawns workers lazily up to size", async () => {
+		let arr = await openFixture("2d.chunked.i2");
+		let createWorker = vi.fn(fakeWorker);
+		let pool = zarr.createDecodePool(createWorker, { size: 2 });
+		await zarr.get(arr, null, { decodePool: pool });
+		expect(createWorker).toHaveBeenCalledTimes(2);
+	});
+
+	it("does not detach the caller's bytes by default", async () => {
+		let pool = zarr.createDecodePool(fakeWorker, { size: 1 });
+		let bytes = new Uint8Array([1, 0, 2, 0]);
+		let chunk = await pool.decode(
+			{ dataType: "int16", shape: [2], codecs: [], fillValue: 0 },
+			bytes,
+		);
+		expect(chunk.data).toStrictEqual(new Int16Array([1, 2]));
+		expect(bytes.byteLength).toBe(4);
+	});
+
+	it("surfaces worker-side failures as CodecPipelineError", async () => {
+		let pool = zarr.createDecodePool(fakeWorker, { size: 1 });
+		let meta = {
+			dataType: "int16" as const,
+			shape: [2],
+			codecs: [{ name: "gzip", configuration: { level: 1 } }],
+			fillValue: 0,
+		};
+		let err = await pool.decode(meta, new Uint8Array([1, 2, 3])).catch((e) => e);
+		expect(zarr.isZarritaError(err, "CodecPipelineError")).toBe(true);
+		expect(err.codec).toBe("gzip");
+	});
+
+	it("withWorkerDecoding attaches a pool to an array", async () => {
+		let arr = await openFixture("1d.contiguous.gzip.i2");
+		let worker = fakeWorker();
+		let pool = zarr.createDecodePool(() => worker, { size: 1 });
+		let wrapped = zarr.withWorkerDecoding(arr, { pool });
+		let result = await zarr.get(wrapped);
+		expect(result).toStrictEqual(await zarr.get(arr));
+		expect(worker.postMessage).toHaveBeenCalled();
+	});
+
+	it("replaces a worker that fails", async () => {
+		let main = new EventTarget();
+		// Fails on its first message, then never answers again.
+		let crashed = {
+			postMessage: vi
+				.fn()
+				.mockImplementationOnce(() =>
+					queueMicrotask(() => main.dispatchEvent(new Event("error"))),
+				),
+			addEventListener: main.addEventListener.bind(main),
+			terminate: vi.fn(),
+		};
+		let createWorker = vi
+			.fn<() => zarr.WorkerLike>()
+			.mockReturnValueOnce(crashed)
+			.mockImplementation(fakeWorker);
+		let pool = zarr.createDecodePool(createWorker, { size: 1 });
+		let meta = {
+			dataType: "int16" as const,
+			shape: [2],
+			codecs: [],
+			fillValue: 0,
+		};
+		await expect(pool.decode(meta, new Uint8Array(4))).rejects.toBeInstanceOf(
+			Event,
+		);
+		expect(crashed.terminate).toHaveBeenCalledOnce();
+		let chunk = await pool.decode(meta, new Uint8Array([1, 0, 2, 0]));
+		expect(chunk.data).toStrictEqual(new Int16Array([1, 2]));
+		expect(createWorker).toHaveBeenCalledTimes(2);
+	});
+
+	it("terminate rejects pending requests", async () => {
+		let worker = fakeWorker();
+		let pool = zarr.createDecodePool(() => worker, { size: 1 });
+		let pending = pool.decode(
+			{ dataType: "int16", shape: [2], codecs: [], fillValue: 0 },
+			new Uint8Array(4),
+		);
+		pool.terminate();
+		await expect(pending).rejects.toThrow("terminated");
+		expect(worker.terminate).toHaveBeenCalledOnce();
+	});
+});
@@ -0,0 +1,186 @@
+import { describe, expect, it, vi } from "vitest";
+
+import * as zarr from "../../src/index.js";
+
+/** An in-memory store that also serves range reads, as sharding requires. */
+class RangeMap extends Map<string, Uint8Array> {
+	getRange(
+		key: string,
+		range: { offset: number; length: number } | { suffixLength: number },
+	) {
+		let bytes = this.get(key);
+		if (!bytes) return undefined;
+		if ("suffixLength" in range) {
+			return bytes.subarray(bytes.length - range.suffixLength);
+		}
+		return bytes.subarray(range.offset, range.offset + range.length);
+	}
+}
+
+function frame(t: number) {
+	return {
+		data: Float32Array.from({ length: 4 }, (_, i) => 10 * t + i),
+		shape: [4],
+		stride: [1],
+	};
+}
+
+describe("batchWrites", () => {
+	it("writes each touched chunk once", async () => {
+		let store = new Map<string, Uint8Array>();
+		let arr = await zarr.create(store, {
+			shape: [12, 4],
+			dtype: "float32",
+			chunkShape: [6, 4],
+		});
+		await zarr.set(arr, [11, null], 99);
+		let setSpy = vi.spyOn(store, "set");
+		let readSpy = vi.spyOn(arr, "getChunk");
+
+		let batch = zarr.batchWrites(arr);
+		for (let t = 0; t < 8; t++) {
+			await batch.set([t, null], frame(t));
+		}
+		expect(batch.size).toBe(2);
+		expect(setSpy).not.toHaveBeenCalled();
+		await batch.flush();
+		expect(batch.size).toBe(0);
+		expect(setSpy).toHaveBeenCalledTimes(2);
+		// only the partly written chunk is read, and only once
+		expect(readSpy).toHaveBeenCalledTimes(2);
+		expect(readSpy.mock.calls[0][0]).toStrictEqual([0, 0]);
+
+		let { data } = await zarr.get(arr, null);
+		let expected = new Float32Array(48);
+		for (let t = 0; t < 8; t++) expected.set(frame(t).data, 4 * t);
+		expected.fill(99, 44);
+		expect(data).toStrictEqual(expected);
+	});
+
+	it("applies overlapping writes in call order", async () => {
+		let arr = await zarr.create(new Map(), {
+			shape: [6],
+			dtype: "int32",
+			chunkShape: [4],
+			fillValue: -1,
+		});
+		let batch = zarr.batchWrites(arr);
+		await Promise.all([
+			batch.set([zarr.slice(0, 3)], 1),
+			batch.set(null, 2),
+			batch.set([zarr.slice(2, 5)], 3),
+		]);
+		await batch.flush();
+		expect((await zarr.get(arr)).data).toStrictEqual(
+			new Int32Array([2, 2, 3, 3, 3, 2]),
+		);
+	});
+
+	it("writes each shard once", async () => {
+		let store = new RangeMap();
+		let arr = await zarr.create(zarr.root(store).resolve("/sharded"), {
+			shape: [5, 10],
+			dtype: "int32",
+			chunkShape: [4, 4],
+			fillValue: 7,
+			codecs: [
+				{
+					name: "sharding_indexed",
+					configuration: {
+						chunk_shape: [2, 2],
+						codecs: [{ name: "bytes", configuration: { endian: "little" } }],
+						index_codecs: [
+							{ name: "bytes", configuration: { endian: "little" } },
+						],
+					},
+				},
+			],
+		});
+		let setSpy = vi.spyOn(store, "set");
+		let batch = zarr.batchWrites(arr);
+		for (let i = 0; i < 5; i++) {
+			await batch.set([i, zarr.slice(0, 6)], i);
+		}
+		await batch.flush();
+		// two shards along each dimension are touched
+		expect(setSpy).toHaveBeenCalledTimes(4);
+
+		let { data } = await zarr.get(arr, null);
+		let expected = new Int32Array(50).fill(7);
+		for (let i = 0; i < 5; i++) expected.fill(i, 10 * i, 10 * i + 6);
+		expect(data).toStrictEqual(expected);
+	});
+
+	it("keeps chunks buffered when writing them fails", async () => {
+		let store = new Map<string, Uint8Array>();
+		let arr = await zarr.create(store, {
+			shape: [4],
+			dtype: "uint8",
+			chunkShape: [2],
+		});
+		let batch = zarr.batchWrites(arr);
+		await batch.set(null, 5);
+		vi.spyOn(store, "set").mockImplementationOnce(() => {
+			throw new Error("disk full");
+		});
+		await expect(batch.flush()).rejects.toThrow("disk full");
+		expect(batch.size).toBe(1);
+		await batch.flush();
+		expect((await zarr.get(arr)).data).toStrictEqual(
+			new Uint8Array([5, 5, 5, 5]),
+		);
+	});
+
+	it("passes the signal to the reads of stored chunks", async () => {
+		let map = new Map<string, Uint8Array>();
+		let store = {
+			get(key: string, opts?: { signal?: AbortSignal }) {
+				if (key.endsWith("zarr.json")) return map.get(key);
+				// A read that only ends when it is aborted.
+				return new Promise<undefined>((_, reject) => {
+					opts?.signal?.addEventListener("abort", () => {
+						reject(opts.signal?.reason);
+					});
+				});
+			},
+			set(key: string, value: Uint8Array) {
+				map.set(key, value);
+			},
+		};
+		let arr = await zarr.create(store, {
+			shape: [4],
+			dtype: "uint8",
+			chunkShape: [4],
+		});
+		let batch = zarr.batchWrites(arr);
+		let controller = new AbortController();
+		let pending = batch.set([zarr.slice(0, 2)], 1, {
+			signal: controller.signal,
+		});
+		// Abort once the read of the partly written chunk is under way.
+		await new Promise((resolve) => setTimeout(resolve, 0));
+		controller.abort(new Error("aborted"));
+		await expect(pending).rejects.toThrow("aborted");
+		expect(batch.size).toBe(0);
+	});
+
+	it("flushes the writes of sets still in progress", async () => {
+		let arr = await zarr.create(new Map(), {
+			shape: [4],
+			dtype: "int32",
+			chunkShape: [2],
+			fillValue: 0,
+		});
+		let batch = zarr.batchWrites(arr);
+		await Promise.all([
+			batch.set([zarr.slice(0, 3)], 1),
+			batch.flush(),
+			batch.set([zarr.slice(2, 4)], 2),
+		]);
+		expect(batch.size).toBe(1);
+		await batch.flush();
+		expect((await zarr.get(arr)).data).toStrictEqual(
+			new Int32Array([1, 1, 2, 2]),
+		);
+	});
+});
@@ -0,0 +1,101 @@
+import { describe, expect, it, vi } from "vitest";
+
+import * as zarr from "../../src/index.js";
+
+/** A 7x9 int32 array chunked 3x4, holding `10 * row + col`. */
+async function makeArray() {
+	let arr = await zarr.create(zarr.root().resolve("/grid"), {
+		shape: [7, 9],
+		chunkShape: [3, 4],
+		dtype: "int32",
+	});
+	let data = Int32Array.from(
+		{ length: 63 },
+		(_, i) => 10 * Math.floor(i / 9) + (i % 9),
+	);
+	await zarr.set(arr, null, { data, shape: [7, 9], stride: [9, 1] });
+	return arr;
+}
+
+describe("getOrthogonal", () => {
+	it("selects the outer product of index arrays and masks", async () => {
+		let arr = await makeArray();
+		let rows = [true, false, false, false, true, false, true];
+		let result = await zarr.getOrthogonal(arr, [rows, [8, 0, -1, 4]]);
+		expect(result.shape).toStrictEqual([3, 4]);
+		expect(Array.from(result.data)).toStrictEqual([
+			8, 0, 8, 4, 48, 40, 48, 44, 68, 60, 68, 64,
+		]);
+
+		let strided = await zarr.getOrthogonal(arr, [
+			zarr.slice(1, 7, 3),
+			Int32Array.of(2),
+		]);
+		expect(strided.shape).toStrictEqual([2, 1]);
+		expect(Array.from(strided.data)).toStrictEqual([12, 42]);
+	});
+
+	it("drops integer-indexed dimensions", async () => {
+		let arr = await makeArray();
+		let result = await zarr.getOrthogonal(arr, [5, [3, 4]]);
+		expect(result.shape).toStrictEqual([2]);
+		expect(Array.from(result.data)).toStrictEqual([53, 54]);
+	});
+
+	it("reads each chunk once", async () => {
+		let arr = await makeArray();
+		let spy = vi.spyOn(arr, "getChunk");
+		await zarr.getOrthogonal(arr, [
+			[0, 1, 2, 0],
+			[0, 3, 1, 2],
+		]);
+		expect(spy).toHaveBeenCalledOnce();
+	});
+
+	it("rejects out of bounds indices and mismatched masks", async () => {
+		let arr = await makeArray();
+		await expect(zarr.getOrthogonal(arr, [[7], null])).rejects.toThrow(
+			zarr.InvalidSelectionError,
+		);
+		await expect(zarr.getOrthogonal(arr, [[true, false]])).rejects.toThrow(
+			zarr.InvalidSelectionError,
+		);
+	});
+});
+
+describe("getCoordinates", () => {
+	it("gathers points in the order given", async () => {
+		let arr = await makeArray();
+		let spy = vi.spyOn(arr, "getChunk");
+		let result = await zarr.getCoordinates(arr, [
+			[6, 0, 1, 6, 2],
+			[8, 0, 1, 0, -1],
+		]);
+		expect(result.shape).toStrictEqual([5]);
+		expect(Array.from(result.data)).toStrictEqual([68, 0, 11, 60, 28]);
+		// (6, 8), (0, 0) + (1, 1), (6, 0), (2, 8): four distinct chunks
+		expect(spy).toHaveBeenCalledTimes(4);
+	});
+
+	it("selects the true elements of a mask", async () => {
+		let arr = await makeArray();
+		let mask = new zarr.BoolArray(63);
+		for (let i of [1, 20, 62]) mask.set(i, true);
+		let result = await zarr.getCoordinates(arr, {
+			data: mask,
+			shape: [7, 9],
+			stride: [9, 1],
+		});
+		expect(Array.from(result.data)).toStrictEqual([1, 22, 68]);
+	});
+
+	it("requires one index array per dimension of equal length", async () => {
+		let arr = await makeArray();
+		await expect(zarr.getCoordinates(arr, [[0, 1]])).rejects.toThrow(
+			zarr.InvalidSelectionError,
+		);
+		await expect(zarr.getCoordinates(arr, [[0, 1], [0]])).rejects.toThrow(
+			zarr.InvalidSelectionError,
+		);
+	});
+});
@@ -1,11 +1,13 @@
 import * as path from "node:path";
 import * as url from "node:url";
 import FileSystemStore from "@zarrita/storage/fs";
-import { describe, expect, it } from "vitest";
+import { describe, expect, it, vi } from "vitest";
 
 import * as zarr from "../../src/index.js";
 import { get } from "../../src/indexing/ops.js";
 import { range } from "../../src/indexing/util.js";
+import type { CodecMetadata } from "../../src/metadata.js";
+import { getStrides } from "../../src/util.js";
 
 let __dirname = path.dirname(url.fileURLToPath(import.meta.url));
 
@@ -661,3 +663,132 @@ describe("get v3", () => {
 		expect(res.stride).toStrictEqual([1, 3, 9]);
 	});
 });
+
+describe("get whole chunks", () => {
+	async function create(
+		shape: number[],
+		chunkShape: number[],
+		codecs: CodecMetadata[] = [
+			{ name: "bytes", configuration: { endian: "little" } },
+			{ name: "gzip", configuration: { level: 1 } },
+		],
+	) {
+		let arr = await zarr.create(zarr.root().resolve("/a"), {
+			shape,
+			chunkShape,
+			dtype: "int32",
+			codecs,
+		});
+		let size = shape.reduce((a, b) => a * b, 1);
+		await zarr.set(arr, null, {
+			data: new Int32Array(range(size)),
+			shape,
+			stride: getStrides(shape, "C"),
+		});
+		return arr;
+	}
+
+	it("returns the decoded chunk of a single-chunk read without copying", async () => {
+		// Large enough that Node's zlib hands back a buffer of its own, rather
+		// than a slice of its shared pool.
+		let arr = await create([64, 64], [64, 64]);
+		let spy = vi.spyOn(arr, "getChunk");
+		let res = await zarr.get(arr);
+		let chunk = await spy.mock.results[0].value;
+		expect(res.data).toBe(chunk.data);
+		expect(res.data).toStrictEqual(new Int32Array(range(64 * 64)));
+	});
+
+	it("copies chunks that alias store memory", async () => {
+		let arr = await create([4], [4], []);
+		let res = await zarr.get(arr);
+		res.data[0] = 100;
+		expect((await zarr.get(arr)).data[0]).toBe(0);
+	});
+
+	it("copies chunks held by a cache", async () => {
+		let arr = zarr.withChunkCaching(await create([4], [4]));
+		let res = await zarr.get(arr);
+		res.data[0] = 100;
+		expect((await zarr.get(arr)).data[0]).toBe(0);
+	});
+
+	it("decodes contiguous chunks into the output", async () => {
+		let arr = await create([4, 4], [2, 4]);
+		let spy = vi.spyOn(arr, "getChunk");
+		let res = await zarr.get(arr);
+		expect(res.data).toStrictEqual(new Int32Array(range(16)));
+		for (let result of spy.mock.results) {
+			let chunk = await result.value;
+			expect(chunk.data.buffer).toBe(res.data.buffer);
+		}
+	});
+
+	it("copies chunks that are not contiguous in the output", async () => {
+		let arr = await create([4, 4], [2, 2]);
+		let spy = vi.spyOn(arr, "getChunk");
+		let res = await zarr.get(arr);
+		expect(res.data).toStrictEqual(new Int32Array(range(16)));
+		for (let call of spy.mock.calls) {
+			expect(call[2]?.decodeInto).toBeUndefined();
+		}
+	});
+});
+
+describe("get missing chunks", () => {
+	async function sparse(fillValue: number) {
+		let arr = await zarr.create(zarr.root().resolve("/a"), {
+			shape: [6, 6],
+			chunkShape: [2, 3],
+			dtype: "float32",
+			fillValue,
+		});
+		await zarr.set(arr, [zarr.slice(0, 2), zarr.slice(0, 3)], 1);
+		return arr;
+	}
+
+	it("writes the fill value without allocating the chunks", async () => {
+		let arr = await sparse(-1);
+		let spy = vi.spyOn(arr, "getChunk");
+		let tracer = zarr.createTraceRecorder();
+		let res = await zarr.get(arr, [zarr.slice(1, 5), zarr.slice(0, 6, 2)], {
+			tracer,
+		});
+		expect(res.data).toStrictEqual(
+			new Float32Array([1, 1, -1, -1, -1, -1, -1, -1, -1, -1, -1, -1]),
+		);
+		let chunks = await Promise.all(spy.mock.results.map((r) => r.value));
+		expect(chunks.map((c) => c.data.length).sort()).toStrictEqual([
+			1, 1, 1, 1, 1, 6,
+		]);
+		expect(tracer.summary().spans["zarrita.fill"].count).toBe(5);
+	});
+
+	it("leaves a zero fill value to the new output", async () => {
+		let arr = await sparse(0);
+		let tracer = zarr.createTraceRecorder();
+		let res = await zarr.get(arr, null, { tracer });
+		expect(res.data.subarray(0, 6)).toStrictEqual(
+			new Float32Array([1, 1, 1, 0, 0, 0]),
+		);
+		expect(res.data.subarray(12).every((v) => v === 0)).toBe(true);
+		expect(tracer.summary().spans["zarrita.fill"]).toBeUndefined();
+	});
+
+	it("writes a negative zero fill value", async () => {
+		let arr = await sparse(-0);
+		let { data } = await zarr.get(arr, [zarr.slice(4, 6), null]);
+		expect(data.every((v) => Object.is(v, -0))).toBe(true);
+	});
+
+	it("returns whole chunks of the fill value from getChunk", async () => {
+		let arr = await sparse(-1);
+		let chunk = await arr.getChunk([2, 1]);
+		expect(chunk.data).toStrictEqual(new Float32Array(6).fill(-1));
+		expect(chunk.stride).toStrictEqual([3, 1]);
+		let cached = zarr.withChunkCaching(arr);
+		let res = await zarr.get(cached, [zarr.slice(4, 6), null]);
+		expect(res.data).toStrictEqual(new Float32Array(12).fill(-1));
+		expect((await cached.getChunk([2, 1])).data).toHaveLength(6);
+	});
+});
@@ -476,3 +476,32 @@ describe("BasicIndexer", () => {
 		`);
 	});
 });
+
+describe("negative step slices", () => {
+	test("map chunks from the last one down onto ascending output", () => {
+		let indexer = new BasicIndexer({
+			selection: [slice(null, null, -3)],
+			shape: [10],
+			chunkShape: [4],
+		});
+		expect(indexer.shape).toStrictEqual([4]);
+		// selects 9, 6, 3, 0
+		expect(Array.from(indexer)).toStrictEqual([
+			{ chunkCoords: [2], mapping: [{ from: [1, 0, -3], to: [0, 1, 1] }] },
+			{ chunkCoords: [1], mapping: [{ from: [2, 1, -3], to: [1, 2, 1] }] },
+			{ chunkCoords: [0], mapping: [{ from: [3, -1, -3], to: [2, 4, 1] }] },
+		]);
+	});
+
+	test("skip chunks stepped over entirely", () => {
+		let indexer = new BasicIndexer({
+			selection: [slice(9, null, -8)],
+			shape: [10],
+			chunkShape: [2],
+		});
+		expect(Array.from(indexer, (p) => p.chunkCoords)).toStrictEqual([
+			[4],
+			[0],
+		]);
+	});
+});
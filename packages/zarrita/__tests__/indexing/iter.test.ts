@@ -0,0 +1,104 @@
+import * as path from "node:path";
+import * as url from "node:url";
+import FileSystemStore from "@zarrita/storage/fs";
+import { describe, expect, it, vi } from "vitest";
+
+import * as zarr from "../../src/index.js";
+import { setter } from "../../src/indexing/ops.js";
+
+let __dirname = path.dirname(url.fileURLToPath(import.meta.url));
+let fixturesRoot = path.resolve(__dirname, "../../../../fixtures/v3/data.zarr");
+
+async function openFixture(name: string) {
+	let store = new FileSystemStore(fixturesRoot);
+	return zarr.open.v3(zarr.root(store).resolve(name), { kind: "array" });
+}
+
+describe("iterChunks", () => {
+	it.each([
+		["2d.chunked.i2", null],
+		["3d.chunked.mixed.i2.C", [zarr.slice(1, 3), 0, null]],
+		["1d.chunked.ragged.i2", [zarr.slice(1, 4)]],
+	])("reassembles %s to match get()", async (name, selection) => {
+		let arr = await openFixture(name);
+		let expected = await zarr.get(arr, selection);
+		let out = setter.prepare(
+			new Int16Array(expected.data.length),
+			expected.shape,
+			expected.stride,
+		);
+		for await (let { chunk, mapping } of zarr.iterChunks(arr, selection)) {
+			setter.setFromChunk(
+				out,
+				setter.prepare(chunk.data as Int16Array, chunk.shape, chunk.stride),
+				mapping,
+			);
+		}
+		expect(out).toStrictEqual(expected);
+	});
+
+	it("yields chunk coordinates in C order when requested", async () => {
+		let arr = await openFixture("2d.chunked.i2");
+		let coords: number[][] = [];
+		for await (let { chunkCoords } of zarr.iterChunks(arr, null, {
+			order: "C",
+		})) {
+			coords.push(chunkCoords);
+		}
+		expect(coords).toStrictEqual([
+			[0, 0],
+			[0, 1],
+			[1, 0],
+			[1, 1],
+		]);
+	});
+
+	it("keeps at most readAhead reads in flight", async () => {
+		let arr = await openFixture("2d.chunked.i2");
+		let inner = arr.getChunk.bind(arr);
+		let active = 0;
+		let peak = 0;
+		vi.spyOn(arr, "getChunk").mockImplementation(async (...args) => {
+			active++;
+			peak = Math.max(peak, active);
+			try {
+				return await inner(...args);
+			} finally {
+				active--;
+			}
+		});
+		let n = 0;
+		for await (let _ of zarr.iterChunks(arr, null, { readAhead: 2 })) {
+			n++;
+		}
+		expect(n).toBe(4);
+		expect(peak).toBeLessThanOrEqual(2);
+	});
+
+	it("aborts in-flight reads when the consumer stops early", async () => {
+		let arr = await openFixture("2d.chunked.i2");
+		let signals: (AbortSignal | undefined)[] = [];
+		let inner = arr.getChunk.bind(arr);
+		vi.spyOn(arr, "getChunk").mockImplementation((coords, options, opts) => {
+			signals.push(options?.signal);
+			return inner(coords, options, opts);
+		});
+		for await (let _ of zarr.iterChunks(arr, null, { readAhead: 2 })) {
+			break;
+		}
+		expect(signals.at(-1)?.aborted).toBe(true);
+	});
+
+	it("yields the single chunk of a scalar array", async () => {
+		let arr = await zarr.create(zarr.root().resolve("/scalar"), {
+			shape: [],
+			chunkShape: [],
+			dtype: "int32",
+			fillValue: 7,
+		});
+		let chunks = [];
+		for await (let item of zarr.iterChunks(arr)) chunks.push(item);
+		expect(chunks).toHaveLength(1);
+		expect(chunks[0].chunk.data).toStrictEqual(new Int32Array([7]));
+	});
+});
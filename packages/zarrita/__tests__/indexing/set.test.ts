@@ -122,3 +122,102 @@ test("Read and write array data - builtin", async () => {
 		new Float64Array(10).fill(1, 0, 5),
 	);
 });
+
+/** An in-memory store that also serves range reads, as sharding requires. */
+class RangeMap extends Map<string, Uint8Array> {
+	getRange(
+		key: string,
+		range: { offset: number; length: number } | { suffixLength: number },
+	) {
+		let bytes = this.get(key);
+		if (!bytes) return undefined;
+		if ("suffixLength" in range) {
+			return bytes.subarray(bytes.length - range.suffixLength);
+		}
+		return bytes.subarray(range.offset, range.offset + range.length);
+	}
+}
+
+test("Read and write sharded array data", async () => {
+	let h = zarr.root(new RangeMap());
+	let shardingCodec = {
+		name: "sharding_indexed",
+		configuration: {
+			chunk_shape: [2, 2],
+			codecs: [{ name: "bytes", configuration: { endian: "little" } }],
+			index_codecs: [
+				{ name: "bytes", configuration: { endian: "little" } },
+				{ name: "crc32c" },
+			],
+		},
+	};
+	let a = await zarr.create(h.resolve("/sharded"), {
+		shape: [5, 10],
+		dtype: "int32",
+		chunkShape: [4, 4],
+		codecs: [shardingCodec],
+	});
+	// An unsharded array receives the same writes as a reference.
+	let b = await zarr.create(h.resolve("/reference"), {
+		shape: [5, 10],
+		dtype: "int32",
+		chunkShape: [2, 2],
+	});
+
+	let writes: Array<[(number | zarr.Slice | null)[] | null, unknown]> = [
+		[[0, null], 42],
+		[[null, 0], 7],
+		[[slice(1, 4), slice(3, 9)], ndarray(new Int32Array(range(18)), [3, 6])],
+		[null, ndarray(new Int32Array(range(50)), [5, 10])],
+		[[slice(4, 5), slice(8, 10)], -1],
+	];
+	for (let [selection, value] of writes) {
+		await set(a, selection, value as never);
+		await set(b, selection, value as never);
+		expect(await get(a)).toStrictEqual(await get(b));
+	}
+
+	// 6 shards, each written as a single key.
+	let shardKeys = [...h.store.keys()].filter((k) => k.startsWith("/sharded/c"));
+	expect(shardKeys).toHaveLength(6);
+});
+
+test("Partial sharded writes leave untouched inner chunks missing", async () => {
+	let h = zarr.root(new RangeMap());
+	let a = await zarr.create(h.resolve("/sharded"), {
+		shape: [8],
+		dtype: "uint8",
+		chunkShape: [8],
+		fillValue: 9,
+		codecs: [
+			{
+				name: "sharding_indexed",
+				configuration: {
+					chunk_shape: [2],
+					codecs: [{ name: "bytes" }],
+					index_codecs: [{ name: "bytes", configuration: { endian: "little" } }],
+				},
+			},
+		],
+	});
+	await set(a, [slice(2, 3)], 1);
+	expect((await get(a)).data).toStrictEqual(
+		new Uint8Array([9, 9, 1, 9, 9, 9, 9, 9]),
+	);
+	let shard = h.store.get("/sharded/c/0") as Uint8Array;
+	// one 2-byte inner chunk followed by a 4 * 16-byte index
+	expect(shard.byteLength).toBe(2 + 64);
+	let index = new BigUint64Array(shard.slice(2).buffer);
+	expect(index).toStrictEqual(
+		new BigUint64Array([
+			2n ** 64n - 1n,
+			2n ** 64n - 1n,
+			0n,
+			2n,
+			2n ** 64n - 1n,
+			2n ** 64n - 1n,
+			2n ** 64n - 1n,
+			2n ** 64n - 1n,
+		]),
+	);
+});
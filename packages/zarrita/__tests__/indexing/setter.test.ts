@@ -485,4 +485,73 @@ describe("setter", () => {
 			0, 0, 0, 0,
 		]));
 	});
+
+	it("set_from_chunk - integer index on a non-contiguous innermost dim", async () => {
+		let dest = setter.prepare(
+			new Int32Array(6),
+			[2, 3],
+			get_strides([2, 3], "F"),
+		);
+		let src = setter.prepare(new Int32Array([7, 8]), [2], [1]);
+		let mapping: Projection[] = [
+			{ from: [0, 2, 1], to: [0, 2, 1] },
+			{ from: null, to: 2 },
+		];
+		setter.setFromChunk(dest, src, mapping);
+		expect(dest.data).toStrictEqual(new Int32Array([0, 0, 0, 0, 7, 8]));
+	});
+
+	it("set_from_chunk - transposes 8-byte elements bit-exactly", async () => {
+		let shape = [3, 4];
+		// biome-ignore format: the array should not be formatted
+		let values = [
+			0n, 1n, 2n, 3n,
+			-1n, 2n ** 62n, -(2n ** 63n), 5n,
+			// NaN bit patterns must survive the copy
+			0x7ff8_0000_0000_0001n, 0x7ff0_0000_0000_0001n, 9n, 10n,
+		];
+		let src = setter.prepare(
+			new BigInt64Array(values),
+			shape,
+			get_strides(shape, "C"),
+		);
+		let dest = setter.prepare(
+			new BigInt64Array(12),
+			shape,
+			get_strides(shape, "F"),
+		);
+		setter.setFromChunk(dest, src, [
+			{ from: [0, 3, 1], to: [0, 3, 1] },
+			{ from: [0, 4, 1], to: [0, 4, 1] },
+		]);
+		expect(to_c(dest).data).toStrictEqual(new BigInt64Array(values));
+	});
+
+	it.each([
+		[{ from: [39, -1, -1], to: [0, 40, 1] }],
+		[{ from: [0, 40, 1], to: [39, -1, -1] }],
+	] satisfies [Projection][])(
+		"set_from_chunk - reverses 8-byte elements: %j",
+		async (mapping) => {
+			let values = Float64Array.from({ length: 40 }, (_, i) => i + 0.5);
+			let src = setter.prepare(values, [40], [1]);
+			let dest = setter.prepare(new Float64Array(40), [40], [1]);
+			setter.setFromChunk(dest, src, [mapping]);
+			expect(dest.data).toStrictEqual(values.slice().reverse());
+		},
+	);
+
+	it("set_from_chunk - object arrays", async () => {
+		let dest = setter.prepare(
+			new Array(4).fill(""),
+			[2, 2],
+			get_strides([2, 2], "C"),
+		);
+		let src = setter.prepare(["a", "b", "c", "d"], [2, 2], [1, 2]);
+		setter.setFromChunk(dest, src, [
+			{ from: [0, 2, 1], to: [0, 2, 1] },
+			{ from: [1, -1, -1], to: [0, 2, 1] },
+		]);
+		expect(dest.data).toStrictEqual(["c", "a", "d", "b"]);
+	});
 });
@@ -1,5 +1,4 @@
 import { describe, expect, it } from "vitest";
-import { InvalidSelectionError } from "../../src/errors.js";
 import * as zarr from "../../src/index.js";
 import { get, set, slice } from "../../src/index.js";
 
@@ -122,8 +121,46 @@ describe("slice", async () => {
 		expect(val).toBe(17);
 	});
 
-	it("Does not support negative indices", async () => {
-		let sel = [0, slice(null, null, -2), slice(null, null, 3)];
-		await expect(get(arr, sel)).rejects.toThrowError(InvalidSelectionError);
+	it.each([
+		[
+			[0, slice(null, null, -2), slice(null, null, 3)],
+			{
+				data: new Int32Array([8, 11, 0, 3]),
+				shape: [2, 2],
+				stride: [2, 1],
+			},
+		],
+		[
+			[slice(null, null, -1), 1, slice(3, 0, -1)],
+			{
+				data: new Int32Array([19, 18, 17, 7, 6, 5]),
+				shape: [2, 3],
+				stride: [3, 1],
+			},
+		],
+		[
+			[1, slice(null, null, -1), slice(null, null, -1)],
+			{
+				// biome-ignore format: the array should not be formatted
+				data: new Int32Array([23, 22, 21, 20, 19, 18, 17, 16, 15, 14, 13, 12]),
+				shape: [3, 4],
+				stride: [4, 1],
+			},
+		],
+	])("Reads negative step slices: selection - %j", async (sel, expected) => {
+		let { data, shape, stride } = await get(arr, sel);
+		expect({ data, shape, stride }).toStrictEqual(expected);
+	});
+
+	it("Writes negative step slices", async () => {
+		let copy = await zarr.create(new Map(), {
+			shape: [2, 3, 4],
+			dtype: "int32",
+			chunkShape: [1, 2, 2],
+		});
+		let reversed = slice(null, null, -1);
+		await set(copy, [reversed, reversed, reversed], DATA);
+		let { data } = await get(copy, null);
+		expect(data).toStrictEqual(DATA.data.slice().reverse());
 	});
 });
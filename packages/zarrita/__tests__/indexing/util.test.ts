@@ -1,6 +1,11 @@
 import { describe, expect, test } from "vitest";
 
-import { range, slice, sliceIndices } from "../../src/indexing/util.js";
+import {
+	createScheduler,
+	range,
+	slice,
+	sliceIndices,
+} from "../../src/indexing/util.js";
 
 describe("slice", () => {
 	test("slice(null)", () => {
@@ -114,3 +119,86 @@ describe("range", () => {
 		expect(Array.from(range(start, stop, step))).toStrictEqual(expected);
 	});
 });
+
+describe("createScheduler", () => {
+	function deferred() {
+		let resolve!: () => void;
+		let promise = new Promise<void>((r) => {
+			resolve = r;
+		});
+		return { promise, resolve };
+	}
+
+	test("never runs more than `concurrency` tasks at once", async () => {
+		let scheduler = createScheduler({ concurrency: 2 });
+		let running = 0;
+		let peak = 0;
+		for (let i = 0; i < 10; i++) {
+			scheduler.add(async () => {
+				running++;
+				peak = Math.max(peak, running);
+				await new Promise((r) => setTimeout(r, 1));
+				running--;
+			});
+		}
+		await scheduler.onIdle();
+		expect(peak).toBe(2);
+		expect(scheduler.stats()).toMatchObject({
+			queued: 0,
+			running: 0,
+			completed: 10,
+			maxQueued: 10,
+		});
+	});
+
+	test("starts higher-priority chunks first", async () => {
+		let scheduler = createScheduler({
+			concurrency: 1,
+			priority: ([i]) => -Math.abs(i - 2),
+		});
+		let order: number[] = [];
+		for (let i = 0; i < 5; i++) {
+			scheduler.add(
+				async () => {
+					order.push(i);
+				},
+				{ chunkCoords: [i] },
+			);
+		}
+		await scheduler.onIdle();
+		expect(order).toStrictEqual([2, 1, 3, 0, 4]);
+	});
+
+	test("preserves insertion order without a priority", async () => {
+		let scheduler = createScheduler({ concurrency: 1 });
+		let order: number[] = [];
+		for (let i = 0; i < 5; i++) {
+			scheduler.add(async () => {
+				order.push(i);
+			});
+		}
+		await scheduler.onIdle();
+		expect(order).toStrictEqual([0, 1, 2, 3, 4]);
+	});
+
+	test("onIdle resolves immediately when empty", async () => {
+		await expect(createScheduler().onIdle()).resolves.toStrictEqual([]);
+	});
+
+	test("rejects onIdle and drops pending tasks on failure", async () => {
+		let scheduler = createScheduler({ concurrency: 1 });
+		let gate = deferred();
+		let ran = false;
+		scheduler.add(async () => {
+			await gate.promise;
+			throw new Error("boom");
+		});
+		scheduler.add(async () => {
+			ran = true;
+		});
+		let idle = scheduler.onIdle();
+		gate.resolve();
+		await expect(idle).rejects.toThrow("boom");
+		expect(ran).toBe(false);
+	});
+});
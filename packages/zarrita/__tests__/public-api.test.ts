@@ -21,23 +21,37 @@ test("public API surface", () => {
 		  "_zarrita_internal_getStrides",
 		  "_zarrita_internal_set",
 		  "_zarrita_internal_sliceIndices",
+		  "batchWrites",
+		  "buildChunkManifest",
 		  "create",
+		  "createDecodePool",
+		  "createScheduler",
+		  "createTraceRecorder",
 		  "defineArrayExtension",
 		  "defineStoreExtension",
+		  "exposeDecodeWorker",
 		  "extendArray",
 		  "extendStore",
 		  "get",
+		  "getCoordinates",
+		  "getOrthogonal",
 		  "isZarritaError",
+		  "iterChunks",
 		  "open",
+		  "openAll",
 		  "registry",
 		  "root",
 		  "select",
 		  "set",
 		  "slice",
 		  "withByteCaching",
+		  "withChunkCaching",
+		  "withChunkManifest",
 		  "withConsolidatedMetadata",
 		  "withMaybeConsolidatedMetadata",
 		  "withRangeCoalescing",
+		  "withWorkerDecoding",
+		  "writeChunkManifest",
 		]
 	`);
 });
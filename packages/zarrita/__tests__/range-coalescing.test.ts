@@ -155,16 +155,106 @@ describe("withRangeCoalescing", () => {
 			expect(inner.getRange.mock.calls[0][1]).toEqual({ suffixLength: 1024 });
 		});
 
-		it("does not batch suffix reads across microtasks", async () => {
+		it("shares one fetch between suffix reads of a path", async () => {
 			let inner = fakeStore();
 			let store = withRangeCoalescing(inner);
 
-			await Promise.all([
-				store.getRange("/data/shard", { suffixLength: 1024 }),
+			let [small, large, other] = await Promise.all([
+				store.getRange("/data/shard", { suffixLength: 16 }),
 				store.getRange("/data/shard", { suffixLength: 1024 }),
+				store.getRange("/data/other", { suffixLength: 16 }),
 			]);
 
 			expect(inner.getRange).toHaveBeenCalledTimes(2);
+			expect(inner.getRange.mock.calls[0][1]).toEqual({ suffixLength: 1024 });
+			expect(small?.length).toBe(16);
+			expect(large?.length).toBe(1024);
+			expect(other?.length).toBe(16);
+		});
+	});
+
+	describe("batching window", () => {
+		it("collects requests across ticks within a timed window", async () => {
+			vi.useFakeTimers();
+			try {
+				let inner = fakeStore();
+				let store = withRangeCoalescing(inner, { window: 10 });
+				let first = store.getRange("/data/chunk", { offset: 0, length: 100 });
+				await Promise.resolve();
+				let second = store.getRange("/data/chunk", {
+					offset: 100,
+					length: 100,
+				});
+				await vi.advanceTimersByTimeAsync(10);
+				await Promise.all([first, second]);
+				expect(inner.getRange).toHaveBeenCalledOnce();
+				expect(inner.getRange.mock.calls[0][1]).toEqual({
+					offset: 0,
+					length: 200,
+				});
+			} finally {
+				vi.useRealTimers();
+			}
+		});
+
+		it("waits for an explicit flush in manual mode", async () => {
+			let inner = fakeStore();
+			let store = withRangeCoalescing(inner, { window: "manual" });
+			let read = store.getRange("/data/chunk", { offset: 0, length: 100 });
+			await new Promise((resolve) => setTimeout(resolve, 0));
+			expect(inner.getRange).not.toHaveBeenCalled();
+			await store.flush();
+			expect((await read)?.length).toBe(100);
+			expect(inner.getRange).toHaveBeenCalledOnce();
+		});
+	});
+
+	describe("merge limits", () => {
+		it("splits groups larger than maxMergedBytes", async () => {
+			let inner = fakeStore();
+			let store = withRangeCoalescing(inner, { maxMergedBytes: 250 });
+
+			await Promise.all(
+				[0, 100, 200, 300, 400].map((offset) =>
+					store.getRange("/data/chunk", { offset, length: 100 }),
+				),
+			);
+
+			expect(inner.getRange.mock.calls.map((c) => c[1])).toEqual([
+				{ offset: 0, length: 200 },
+				{ offset: 200, length: 200 },
+				{ offset: 400, length: 100 },
+			]);
+		});
+
+		it("adapts the gap to measured latency and throughput", async () => {
+			// Simulated link: 50 ms round trip at 1000 bytes/ms, so reading
+			// through up to 50_000 bytes beats another request.
+			let now = 0;
+			vi.spyOn(performance, "now").mockImplementation(() => now);
+			let inner = fakeStore();
+			let read = inner.getRange.getMockImplementation();
+			inner.getRange.mockImplementation((key, range, options) => {
+				if (!("suffixLength" in range)) now += 50 + range.length / 1000;
+				return read?.(key, range, options) as Promise<Uint8Array>;
+			});
+			let store = withRangeCoalescing(inner, { coalesceSize: "adaptive" });
+			for (let length of [1000, 10_000, 50_000, 100_000]) {
+				await store.getRange("/data/warmup", { offset: 0, length });
+			}
+			inner.getRange.mockClear();
+
+			await Promise.all([
+				store.getRange("/data/chunk", { offset: 0, length: 100 }),
+				store.getRange("/data/chunk", { offset: 45_000, length: 100 }),
+				store.getRange("/data/chunk", { offset: 200_000, length: 100 }),
+			]);
+
+			expect(inner.getRange.mock.calls.map((c) => c[1])).toEqual([
+				{ offset: 0, length: 45_100 },
+				{ offset: 200_000, length: 100 },
+			]);
+			vi.restoreAllMocks();
 		});
 	});
 
@@ -76,14 +76,27 @@ describe("ScaleOffsetCodec", () => {
 		expect(decoded.stride).toStrictEqual([3, 1]);
 	});
 
-	test("encode always throws", () => {
+	test("encode int32 with scale=2, offset=10", () => {
 		const codec = ScaleOffsetCodec.fromConfig(
-			{ scale: 2, offset: 0 },
+			{ scale: 2, offset: 10 },
 			{ dataType: "int32" },
 		);
-		const chunk = makeChunk(new Int32Array([1, 2, 3]));
-		// @ts-expect-error - encode is typed as (_: never) => never
-		expect(() => codec.encode(chunk)).toThrow();
+		// encoded = (decoded - offset) * scale
+		const chunk = makeChunk(new Int32Array([12, 13, 15, 20]));
+		const encoded = codec.encode(chunk);
+		expect(encoded.data).toStrictEqual(new Int32Array([4, 6, 10, 20]));
+		expect(codec.decode(encoded).data).toStrictEqual(chunk.data);
+	});
+
+	test("encode int64 round-trips", () => {
+		const codec = ScaleOffsetCodec.fromConfig(
+			{ scale: 2, offset: 100 },
+			{ dataType: "int64" },
+		);
+		const chunk = makeChunk(new BigInt64Array([100n, 101n, -5n]));
+		const encoded = codec.encode(chunk);
+		expect(encoded.data).toStrictEqual(new BigInt64Array([0n, 2n, -210n]));
+		expect(codec.decode(encoded).data).toStrictEqual(chunk.data);
 	});
 
 	test("empty configuration defaults to scale=1, offset=0 (identity)", () => {
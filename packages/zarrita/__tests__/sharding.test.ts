@@ -0,0 +1,75 @@
+import * as path from "node:path";
+import * as url from "node:url";
+import { FileSystemStore } from "@zarrita/storage";
+import { describe, expect, it, vi } from "vitest";
+import { mergeRanges } from "../src/codecs/sharding.js";
+import * as zarr from "../src/index.js";
+
+let __dirname = path.dirname(url.fileURLToPath(import.meta.url));
+let fixturesRoot = path.resolve(__dirname, "../../../fixtures/v3/data.zarr");
+
+async function openFixture(name: string) {
+	let store = new FileSystemStore(fixturesRoot);
+	let getRange = vi.spyOn(store, "getRange");
+	let arr = await zarr.open.v3(zarr.root(store).resolve(name), {
+		kind: "array",
+	});
+	return { arr, getRange };
+}
+
+describe("mergeRanges", () => {
+	it("merges ranges within the gap and keeps the rest apart", () => {
+		let groups = mergeRanges(
+			[
+				{ offset: 100, length: 10 },
+				{ offset: 0, length: 10 },
+				{ offset: 12, length: 10 },
+			],
+			2,
+		);
+		expect(groups.map(({ offset, length }) => [offset, length])).toEqual([
+			[0, 22],
+			[100, 10],
+		]);
+		expect(groups[0].ranges.map((r) => r.offset)).toEqual([0, 12]);
+	});
+
+	it("handles overlapping and contained ranges", () => {
+		let groups = mergeRanges(
+			[
+				{ offset: 0, length: 20 },
+				{ offset: 5, length: 5 },
+			],
+			0,
+		);
+		expect(groups).toHaveLength(1);
+		expect(groups[0]).toMatchObject({ offset: 0, length: 20 });
+	});
+});
+
+describe("sharded reads", () => {
+	it.each([
+		"2d.chunked.compressed.sharded.i2",
+		"2d.chunked.compressed.sharded.filled.i2",
+		"3d.chunked.compressed.sharded.i2",
+		"2d.chunked.ragged.compressed.sharded.i2",
+	])("plans %s to match per-chunk reads", async (name) => {
+		let { arr } = await openFixture(name);
+		// Forwarding only `options` drops the read plan, so every inner chunk
+		// is read on its own.
+		let unplanned = zarr.defineArrayExtension((array) => ({
+			getChunk: (coords, options) => array.getChunk(coords, options),
+		}))(arr);
+		expect(await zarr.get(arr)).toStrictEqual(await zarr.get(unplanned));
+	});
+
+	it("reads each shard's inner chunks with one range request", async () => {
+		let { arr, getRange } = await openFixture(
+			"2d.chunked.compressed.sharded.i2",
+		);
+		await zarr.get(arr);
+		// 4 shards: one index read and one merged data read each, instead of
+		// one read per inner chunk (16).
+		expect(getRange).toHaveBeenCalledTimes(8);
+	});
+});
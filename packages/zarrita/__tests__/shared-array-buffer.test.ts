@@ -53,6 +53,25 @@ describe("SharedArrayBuffer support", () => {
 		}
 	});
 
+	test("getChunk() with useSharedArrayBuffer decodes compressed chunks into a SharedArrayBuffer", async () => {
+		let h = zarr.root();
+		let arr = await zarr.create(h.resolve("/test"), {
+			shape: [4, 4],
+			chunkShape: [2, 2],
+			dtype: "int32",
+			codecs: [
+				{ name: "bytes", configuration: { endian: "little" } },
+				{ name: "gzip", configuration: { level: 1 } },
+			],
+		});
+		await zarr.set(arr, null, 7);
+		let chunk = await arr.getChunk([1, 1], undefined, {
+			useSharedArrayBuffer: true,
+		});
+		expect(chunk.data.buffer).toBeInstanceOf(SharedArrayBuffer);
+		expect(Array.from(chunk.data)).toEqual([7, 7, 7, 7]);
+	});
+
 	test("getChunk() without useSharedArrayBuffer returns regular ArrayBuffer", async () => {
 		let h = zarr.root();
 		let arr = await zarr.create(h.resolve("/test"), {
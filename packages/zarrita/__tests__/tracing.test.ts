@@ -0,0 +1,100 @@
+import { describe, expect, it, vi } from "vitest";
+
+import * as zarr from "../src/index.js";
+
+async function makeArray() {
+	let store = new Map<string, Uint8Array>();
+	let arr = await zarr.create(store, {
+		shape: [4, 4],
+		dtype: "int16",
+		chunkShape: [2, 2],
+		codecs: [{ name: "bytes", configuration: { endian: "little" } }],
+	});
+	await zarr.set(arr, null, {
+		data: Int16Array.from({ length: 16 }, (_, i) => i),
+		shape: [4, 4],
+		stride: [4, 1],
+	});
+	return { store, arr };
+}
+
+describe("tracer", () => {
+	it("reports per-chunk spans for get", async () => {
+		let { arr } = await makeArray();
+		let tracer = zarr.createTraceRecorder();
+		await zarr.get(arr, [zarr.slice(1, 3), null], { tracer });
+
+		let names = tracer.spans.map((s) => s.name);
+		expect(names.filter((n) => n === "zarrita.get")).toHaveLength(1);
+		expect(names.filter((n) => n === "zarrita.chunk")).toHaveLength(4);
+		let fetches = tracer.spans.filter((s) => s.name === "zarrita.fetch");
+		expect(fetches.map((s) => s.attributes["zarrita.chunk"]).sort()).toEqual([
+			"0,0",
+			"0,1",
+			"1,0",
+			"1,1",
+		]);
+		// 2x2 int16 chunks, stored uncompressed
+		expect(fetches.every((s) => s.attributes["zarrita.bytes"] === 8)).toBe(
+			true,
+		);
+
+		let { spans, queueWait } = tracer.summary();
+		expect(spans["zarrita.fetch"]).toMatchObject({ count: 4, bytes: 32 });
+		expect(spans["zarrita.decode bytes"].count).toBe(4);
+		expect(spans["zarrita.copy"].count).toBe(4);
+		expect(queueWait).toBeGreaterThanOrEqual(0);
+		// the get span encloses the work done for its chunks
+		expect(spans["zarrita.get"].total).toBeGreaterThanOrEqual(
+			spans["zarrita.fetch"].max,
+		);
+	});
+
+	it("reports encode and write spans for set", async () => {
+		let { arr } = await makeArray();
+		let tracer = zarr.createTraceRecorder();
+		await zarr.set(arr, [0, null], 1, { tracer });
+		let { spans } = tracer.summary();
+		expect(spans["zarrita.set"].count).toBe(1);
+		// partial writes read the chunks they touch first
+		expect(spans["zarrita.fetch"].count).toBe(2);
+		expect(spans["zarrita.encode bytes"].count).toBe(2);
+		expect(spans["zarrita.write"]).toMatchObject({ count: 2, bytes: 16 });
+	});
+
+	it("accepts OpenTelemetry-style tracers", async () => {
+		let { store } = await makeArray();
+		let ended: string[] = [];
+		let tracer: zarr.Tracer = {
+			startSpan: vi.fn((name: string) => ({
+				setAttribute: vi.fn(),
+				end: () => ended.push(name),
+			})),
+		};
+		let arr = await zarr.open(store, { kind: "array", tracer });
+		await zarr.get(arr, [0, 0], { tracer });
+		expect(ended).toContain("zarrita.open");
+		expect(ended.at(-1)).toBe("zarrita.get");
+		expect(tracer.startSpan).toHaveBeenCalledWith("zarrita.fetch", {
+			attributes: { "zarrita.chunk": "0,0" },
+		});
+	});
+
+	it("ends spans when a step fails", async () => {
+		let { store, arr } = await makeArray();
+		vi.spyOn(store, "get").mockImplementation(() => {
+			throw new Error("offline");
+		});
+		let tracer = zarr.createTraceRecorder();
+		await expect(zarr.get(arr, [0, 0], { tracer })).rejects.toThrow(
+			"offline",
+		);
+		expect(tracer.spans.map((s) => s.name)).toStrictEqual([
+			"zarrita.fetch",
+			"zarrita.chunk",
+			"zarrita.get",
+		]);
+		tracer.clear();
+		expect(tracer.spans).toHaveLength(0);
+	});
+});
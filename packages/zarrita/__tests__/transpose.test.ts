@@ -0,0 +1,83 @@
+import { describe, expect, test } from "vitest";
+import { TransposeCodec } from "../src/codecs/transpose.js";
+import type { Chunk, DataType } from "../src/metadata.js";
+import { BoolArray, UnicodeStringArray } from "../src/typedarray.js";
+import { getStrides } from "../src/util.js";
+
+/** Read a chunk back in logical C order, following its strides. */
+function toNested(chunk: Chunk<DataType>): unknown[] {
+	let { data, shape, stride } = chunk;
+	let values: unknown[] = [];
+	let size = shape.reduce((a, b) => a * b, 1);
+	let index = shape.map(() => 0);
+	for (let n = 0; n < size; n++) {
+		let offset = index.reduce((acc, i, dim) => acc + i * stride[dim], 0);
+		values.push("get" in data ? data.get(offset) : data[offset]);
+		for (let dim = shape.length - 1; dim >= 0; dim--) {
+			if (++index[dim] < shape[dim]) break;
+			index[dim] = 0;
+		}
+	}
+	return values;
+}
+
+function cOrder<T>(data: T, shape: number[]) {
+	return { data, shape, stride: getStrides(shape, "C") };
+}
+
+describe("TransposeCodec", () => {
+	test("encode F writes column-major data", () => {
+		let codec = TransposeCodec.fromConfig({ order: "F" }, { shape: [2, 3] });
+		let encoded = codec.encode(
+			cOrder(new Int32Array([1, 2, 3, 4, 5, 6]), [2, 3]),
+		);
+		expect(encoded.data).toStrictEqual(new Int32Array([1, 4, 2, 5, 3, 6]));
+		expect(toNested(codec.decode(encoded))).toStrictEqual([1, 2, 3, 4, 5, 6]);
+	});
+
+	test.each<[string, number[], number[]]>([
+		["F", [70, 100], [1, 0]],
+		["permutation", [5, 40, 36], [2, 0, 1]],
+		["involutive permutation", [5, 40, 36], [0, 2, 1]],
+		["4-d cyclic permutation", [3, 20, 6, 34], [1, 2, 3, 0]],
+	])("round-trips %s order across tiles", (_, shape, order) => {
+		let codec = TransposeCodec.fromConfig({ order }, { shape });
+		let size = shape.reduce((a, b) => a * b, 1);
+		let chunk = cOrder(
+			Float64Array.from({ length: size }, (_, i) => i),
+			shape,
+		);
+		let decoded = codec.decode(codec.encode(chunk));
+		expect(toNested(decoded)).toStrictEqual(toNested(chunk));
+	});
+
+	test("encodes a cyclic permutation in the order decode reads", () => {
+		// zarr-python's transpose with order [2, 0, 1] stores
+		// `a.transpose(2, 0, 1)` in C order.
+		let codec = TransposeCodec.fromConfig(
+			{ order: [2, 0, 1] },
+			{ shape: [2, 3, 4] },
+		);
+		let data = Int32Array.from({ length: 24 }, (_, i) => i);
+		let encoded = codec.encode(cOrder(data, [2, 3, 4]));
+		let expected: number[] = [];
+		for (let k = 0; k < 4; k++) {
+			for (let i = 0; i < 2; i++) {
+				for (let j = 0; j < 3; j++) expected.push(i * 12 + j * 4 + k);
+			}
+		}
+		expect([...encoded.data]).toStrictEqual(expected);
+	});
+
+	test("transposes bool and string arrays", () => {
+		let codec = TransposeCodec.fromConfig({ order: "F" }, { shape: [2, 2] });
+		let bools = codec.encode(
+			cOrder(new BoolArray([true, true, false, false]), [2, 2]),
+		);
+		expect([...bools.data]).toStrictEqual([true, false, true, false]);
+		let strings = codec.encode(
+			cOrder(new UnicodeStringArray(2, ["ab", "c", "d", "ef"]), [2, 2]),
+		);
+		expect([...strings.data]).toStrictEqual(["ab", "d", "c", "ef"]);
+	});
+});
@@ -17,14 +17,29 @@ import {
 	UnknownCodecError,
 } from "./errors.js";
 import type { Chunk, CodecMetadata, DataType, Scalar } from "./metadata.js";
+import { startSpan, type Tracer } from "./tracing.js";
+import { createBuffer, getCtr } from "./util.js";
 
-type ChunkMetadata<D extends DataType> = {
+export type ChunkMetadata<D extends DataType> = {
 	dataType: D;
 	shape: number[];
 	codecs: CodecMetadata[];
 	fillValue: Scalar<D> | null;
 };
 
+type DecodeOptions = {
+	/** Allocate the decoded bytes in a SharedArrayBuffer. */
+	useSharedArrayBuffer?: boolean;
+	/**
+	 * Preferred destination for the array's bytes. Used only if it has the
+	 * decoded size and no array-to-array codec transforms the data afterwards
+	 * (so that the decoded chunk is a plain view of it).
+	 */
+	out?: Uint8Array;
+	/** Receives a span for each codec step. */
+	tracer?: Tracer;
+};
+
 type CodecEntry = {
 	fromConfig: (config: unknown, meta: ChunkMetadata<DataType>) => Codec;
 	kind?: "array_to_array" | "array_to_bytes" | "bytes_to_bytes";
@@ -84,8 +99,11 @@ export const registry: Map<string, () => Promise<CodecEntry>> =
 export function createCodecPipeline<Dtype extends DataType>(
 	chunkMetadata: ChunkMetadata<Dtype>,
 ): {
-	encode(chunk: Chunk<Dtype>): Promise<Uint8Array>;
-	decode(bytes: Uint8Array): Promise<Chunk<Dtype>>;
+	encode(
+		chunk: Chunk<Dtype>,
+		options?: { tracer?: Tracer },
+	): Promise<Uint8Array>;
+	decode(bytes: Uint8Array, options?: DecodeOptions): Promise<Chunk<Dtype>>;
 	computeEncodedSize(decodedSize: number): Promise<number>;
 } {
 	// Lazily load codecs on first use. The promise is shared by all methods.
@@ -98,39 +116,96 @@ export function createCodecPipeline<Dtype extends DataType>(
 		direction: "encode" | "decode",
 		codec: string,
 		fn: () => Promise<T> | T,
+		tracer?: Tracer,
 	): Promise<T> {
+		let span = startSpan(tracer, `zarrita.${direction}`, {
+			"zarrita.codec": codec,
+		});
 		try {
 			return await fn();
 		} catch (cause) {
 			throw new CodecPipelineError({ direction, codec, cause });
+		} finally {
+			span?.end();
 		}
 	}
 	return {
-		async encode(chunk: Chunk<Dtype>): Promise<Uint8Array> {
+		async encode(
+			chunk: Chunk<Dtype>,
+			{ tracer }: { tracer?: Tracer } = {},
+		): Promise<Uint8Array> {
 			let codecs = await getCodecs();
 			for (const { name, codec } of codecs.arrayToArray) {
-				chunk = await runStep("encode", name, () => codec.encode(chunk));
+				chunk = await runStep(
+					"encode",
+					name,
+					() => codec.encode(chunk),
+					tracer,
+				);
 			}
-			let bytes = await runStep("encode", codecs.arrayToBytes.name, () =>
-				codecs.arrayToBytes.codec.encode(chunk),
+			let bytes = await runStep(
+				"encode",
+				codecs.arrayToBytes.name,
+				() => codecs.arrayToBytes.codec.encode(chunk),
+				tracer,
 			);
 			for (const { name, codec } of codecs.bytesToBytes) {
-				bytes = await runStep("encode", name, () => codec.encode(bytes));
+				bytes = await runStep(
+					"encode",
+					name,
+					() => codec.encode(bytes),
+					tracer,
+				);
 			}
 			return bytes;
 		},
-		async decode(bytes: Uint8Array): Promise<Chunk<Dtype>> {
+		async decode(
+			bytes: Uint8Array,
+			options: DecodeOptions = {},
+		): Promise<Chunk<Dtype>> {
 			let codecs = await getCodecs();
 			for (let i = codecs.bytesToBytes.length - 1; i >= 0; i--) {
 				const { name, codec } = codecs.bytesToBytes[i];
-				bytes = await runStep("decode", name, () => codec.decode(bytes));
+				// The last step produces the array's bytes. When their size is
+				// known and the codec can use it, tell it, and hand it the
+				// caller's destination (or shared memory, if asked for) to
+				// decode into directly.
+				let size: number | undefined;
+				let out: Uint8Array | undefined;
+				if (i === 0 && codec.decodesInto) {
+					size = codecs.decodedSize;
+				}
+				if (size !== undefined) {
+					if (
+						options.out?.byteLength === size &&
+						codecs.arrayToArray.length === 0
+					) {
+						out = options.out;
+					} else if (options.useSharedArrayBuffer) {
+						out = new Uint8Array(createBuffer(size, true));
+					}
+				}
+				bytes = await runStep(
+					"decode",
+					name,
+					() => codec.decode(bytes, out, size),
+					options.tracer,
+				);
 			}
-			let chunk = await runStep("decode", codecs.arrayToBytes.name, () =>
-				codecs.arrayToBytes.codec.decode(bytes),
+			let chunk = await runStep(
+				"decode",
+				codecs.arrayToBytes.name,
+				() => codecs.arrayToBytes.codec.decode(bytes),
+				options.tracer,
 			);
 			for (let i = codecs.arrayToArray.length - 1; i >= 0; i--) {
 				const { name, codec } = codecs.arrayToArray[i];
-				chunk = await runStep("decode", name, () => codec.decode(chunk));
+				chunk = await runStep(
+					"decode",
+					name,
+					() => codec.decode(chunk),
+					options.tracer,
+				);
 			}
 			return chunk;
 		},
@@ -175,7 +250,15 @@ type ArrayToBytesCodec<D extends DataType> = {
 
 type BytesToBytesCodec = {
 	encode: (data: Uint8Array) => Promise<Uint8Array>;
-	decode: (data: Uint8Array) => Promise<Uint8Array>;
+	// Codecs that set `decodesInto` are given the expected decoded `size`,
+	// and `out`, a buffer of that size to decode into (and return) instead
+	// of allocating their own. Other codecs are never handed either.
+	decodesInto?: boolean;
+	decode: (
+		data: Uint8Array,
+		out?: Uint8Array,
+		size?: number,
+	) => Promise<Uint8Array>;
 	computeEncodedSize?: (decodedSize: number) => number;
 };
 
@@ -244,9 +327,30 @@ async function loadCodecs<D extends DataType>(chunkMeta: ChunkMetadata<D>) {
 		arrayToArray,
 		arrayToBytes,
 		bytesToBytes,
+		decodedSize: computeDecodedSize(currentMeta, arrayToBytes.codec),
 	};
 }
 
+/**
+ * Size of the bytes the array-to-bytes codec decodes from, if it is fixed by
+ * the chunk shape and data type (i.e. for fixed-width types and codecs that
+ * report their encoded size).
+ */
+function computeDecodedSize<D extends DataType>(
+	meta: ChunkMetadata<D>,
+	codec: ArrayToBytesCodec<D>,
+): number | undefined {
+	if (!codec.computeEncodedSize || !isTypedArrayLikeMeta(meta)) {
+		return undefined;
+	}
+	let sample = new (getCtr(meta.dataType))(0);
+	if (!("BYTES_PER_ELEMENT" in sample)) {
+		return undefined;
+	}
+	let size = meta.shape.reduce((a, b) => a * b, 1);
+	return codec.computeEncodedSize(size * sample.BYTES_PER_ELEMENT);
+}
+
 function isTypedArrayLikeMeta<D extends DataType>(
 	meta: ChunkMetadata<D>,
 ): meta is ChunkMetadata<Exclude<D, "v2:object" | "string">> {
@@ -1,16 +1,13 @@
 import { InvalidMetadataError } from "../errors.js";
 import type { Chunk, Float32, Float64 } from "../metadata.js";
-import { unimplementedEncode } from "./_shared.js";
 
 /**
  * A codec for bit-rounding.
  *
- * Reduces floating-point precision by truncating mantissa bits during encoding.
- * Decoding is a no-op as the process is lossy and precision cannot be restored.
- *
- * Note: {@link BitroundCodec.encode} is not yet implemented since Zarrita is
- * primarily used in read-only contexts (web browser). If you need encoding support,
- * please open an issue at {@link https://github.com/manzt/zarrita.js/issues}.
+ * Reduces floating-point precision by rounding the mantissa to `keepbits`
+ * bits (round half to even) during encoding, which makes the data compress
+ * better. Decoding is a no-op as the process is lossy and precision cannot be
+ * restored.
  *
  * @see {@link https://github.com/zarr-developers/numcodecs/blob/main/numcodecs/bitround.py}
  * for the original Python implementation.
@@ -21,10 +18,15 @@ import { unimplementedEncode } from "./_shared.js";
 export class BitroundCodec<D extends Float64 | Float32> {
 	kind = "array_to_array";
 
-	constructor(configuration: { keepbits: number }, _meta: { dataType: D }) {
+	#keepbits: number;
+	#dataType: D;
+
+	constructor(configuration: { keepbits: number }, meta: { dataType: D }) {
 		if (configuration.keepbits < 0) {
 			throw new InvalidMetadataError("keepbits must be zero or positive");
 		}
+		this.#keepbits = configuration.keepbits;
+		this.#dataType = meta.dataType;
 	}
 
 	static fromConfig<D extends Float32 | Float64>(
@@ -34,7 +36,21 @@ export class BitroundCodec<D extends Float64 | Float32> {
 		return new BitroundCodec(configuration, meta);
 	}
 
-	encode = unimplementedEncode("bitround");
+	/**
+	 * Round each value to `keepbits` mantissa bits. Mirrors numcodecs: the
+	 * bit pattern is rounded half-to-even and the dropped bits are zeroed.
+	 * @param arr - The chunk to encode
+	 * @returns A new chunk with reduced precision
+	 */
+	encode(arr: Chunk<D>): Chunk<D> {
+		let data = arr.data.slice() as Chunk<D>["data"];
+		if (this.#dataType === "float32") {
+			roundBits32(new Uint32Array(data.buffer), 23 - this.#keepbits);
+		} else {
+			roundBits64(new BigUint64Array(data.buffer), 52 - this.#keepbits);
+		}
+		return { data, shape: arr.shape, stride: arr.stride };
+	}
 
 	/**
 	 * Decode a chunk of data (no-op).
@@ -45,3 +61,26 @@ export class BitroundCodec<D extends Float64 | Float32> {
 		return arr; // No-op as bit-rounding is lossy
 	}
 }
+
+function roundBits32(bits: Uint32Array, maskbits: number): void {
+	if (maskbits <= 0) return;
+	let mask = ((0xffffffff >>> maskbits) << maskbits) >>> 0;
+	let halfQuantum = (1 << (maskbits - 1)) - 1;
+	for (let i = 0; i < bits.length; i++) {
+		let b = bits[i];
+		b = (b + ((b >>> maskbits) & 1) + halfQuantum) >>> 0;
+		bits[i] = b & mask;
+	}
+}
+
+function roundBits64(bits: BigUint64Array, maskbits: number): void {
+	if (maskbits <= 0) return;
+	let shift = BigInt(maskbits);
+	let mask = (0xffffffffffffffffn >> shift) << shift;
+	let halfQuantum = (1n << (shift - 1n)) - 1n;
+	for (let i = 0; i < bits.length; i++) {
+		let b = bits[i];
+		// BigUint64Array stores modulo 2^64, matching numpy's overflow.
+		bits[i] = (b + ((b >> shift) & 1n) + halfQuantum) & mask;
+	}
+}
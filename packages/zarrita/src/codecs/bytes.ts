@@ -66,6 +66,11 @@ export class BytesCodec<D extends Exclude<DataType, "v2:object" | "string">> {
 	}
 
 	decode(bytes: Uint8Array): Chunk<D> {
+		// Views into a larger buffer (e.g. inner chunks sliced out of a merged
+		// shard read) may not be aligned for the target element type.
+		if (bytes.byteOffset % bytesPerElement(this.#TypedArray) !== 0) {
+			bytes = bytes.slice();
+		}
 		if (LITTLE_ENDIAN_OS && this.#endian === "big") {
 			byteswapInplace(bytes, bytesPerElement(this.#TypedArray));
 		}
@@ -8,7 +8,6 @@ The specification for this codec can be found at https://github.com/zarr-develop
 import { InvalidMetadataError } from "../errors.js";
 import type { Chunk, Scalar } from "../metadata.js";
 import { getCtr } from "../util.js";
-import { unimplementedEncode } from "./_shared.js";
 import {
 	isBigintType,
 	isFloatType,
@@ -204,7 +203,7 @@ function makeBigintRangeCheck(
  *   - `EncodedDtype`: the on-disk type (`config.data_type`).
  *                     This is what the bytes codec sees.
  *
- * Encode: ArrayDtype -> EncodedDtype  (not implemented, throws)
+ * Encode: ArrayDtype -> EncodedDtype
  * Decode: EncodedDtype -> ArrayDtype
  */
 export class CastValueCodec<
@@ -214,8 +213,9 @@ export class CastValueCodec<
 	kind = "array_to_array" as const;
 	#encodedType: EncodedDtype;
 	#arrayTypeCtr: ReturnType<typeof getCtr<ArrayDtype>>;
+	#encodedTypeCtr: ReturnType<typeof getCtr<EncodedDtype>>;
 	#decodeValue: (value: Scalar<EncodedDtype>) => Scalar<ArrayDtype>;
-	#encodeFillValue: (value: Scalar<ArrayDtype>) => Scalar<EncodedDtype>;
+	#encodeValue: (value: Scalar<ArrayDtype>) => Scalar<EncodedDtype>;
 
 	constructor(
 		arrayType: ArrayDtype,
@@ -227,6 +227,7 @@ export class CastValueCodec<
 	) {
 		this.#encodedType = encodedType;
 		this.#arrayTypeCtr = getCtr(arrayType);
+		this.#encodedTypeCtr = getCtr(encodedType);
 		this.#decodeValue = buildConverter<EncodedDtype, ArrayDtype>(
 			encodedType,
 			arrayType,
@@ -234,7 +235,7 @@ export class CastValueCodec<
 			outOfRange,
 			decodeMapEntries,
 		);
-		this.#encodeFillValue = buildConverter<ArrayDtype, EncodedDtype>(
+		this.#encodeValue = buildConverter<ArrayDtype, EncodedDtype>(
 			arrayType,
 			encodedType,
 			rounding,
@@ -257,7 +258,7 @@ export class CastValueCodec<
 	} {
 		let fillValue = meta.fillValue;
 		if (fillValue != null) {
-			fillValue = this.#encodeFillValue(fillValue as Scalar<ArrayDtype>);
+			fillValue = this.#encodeValue(fillValue as Scalar<ArrayDtype>);
 		}
 		return { ...meta, dataType: this.#encodedType, fillValue };
 	}
@@ -301,7 +302,16 @@ export class CastValueCodec<
 		);
 	}
 
-	encode = unimplementedEncode("cast_value");
+	encode(chunk: Chunk<ArrayDtype>): Chunk<EncodedDtype> {
+		const input = chunk.data;
+		const out = new this.#encodedTypeCtr(
+			input.length,
+		) as Chunk<EncodedDtype>["data"];
+		for (let i = 0; i < input.length; i++) {
+			out[i] = this.#encodeValue(input[i] as Scalar<ArrayDtype>);
+		}
+		return { data: out, shape: chunk.shape, stride: chunk.stride };
+	}
 
 	decode(chunk: Chunk<EncodedDtype>): Chunk<ArrayDtype> {
 		const input = chunk.data;
@@ -1,11 +1,67 @@
-import { unimplementedEncode } from "./_shared.js";
+// CRC-32C (Castagnoli), reflected polynomial.
+const POLYNOMIAL = 0x82f63b78;
+
+// Slicing-by-8 lookup tables: TABLES[t * 256 + b] is the CRC contribution of
+// byte `b` followed by `t` zero bytes, so eight input bytes can be folded in
+// per iteration instead of one.
+const TABLES = (() => {
+	let tables = new Uint32Array(8 * 256);
+	for (let i = 0; i < 256; i++) {
+		let crc = i;
+		for (let k = 0; k < 8; k++) {
+			crc = crc & 1 ? (crc >>> 1) ^ POLYNOMIAL : crc >>> 1;
+		}
+		tables[i] = crc;
+	}
+	for (let i = 0; i < 256; i++) {
+		let crc = tables[i];
+		for (let t = 1; t < 8; t++) {
+			crc = tables[crc & 0xff] ^ (crc >>> 8);
+			tables[t * 256 + i] = crc;
+		}
+	}
+	return tables;
+})();
+
+export function crc32c(bytes: Uint8Array): number {
+	let t = TABLES;
+	let crc = 0xffffffff;
+	let i = 0;
+	let end = bytes.length - (bytes.length % 8);
+	for (; i < end; i += 8) {
+		let lo =
+			crc ^
+			(bytes[i] |
+				(bytes[i + 1] << 8) |
+				(bytes[i + 2] << 16) |
+				(bytes[i + 3] << 24));
+		crc =
+			t[1792 + (lo & 0xff)] ^
+			t[1536 + ((lo >>> 8) & 0xff)] ^
+			t[1280 + ((lo >>> 16) & 0xff)] ^
+			t[1024 + (lo >>> 24)] ^
+			t[768 + bytes[i + 4]] ^
+			t[512 + bytes[i + 5]] ^
+			t[256 + bytes[i + 6]] ^
+			t[bytes[i + 7]];
+	}
+	for (; i < bytes.length; i++) {
+		crc = t[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+	}
+	return (crc ^ 0xffffffff) >>> 0;
+}
 
 export class Crc32cCodec {
 	readonly kind = "bytes_to_bytes";
 	static fromConfig() {
 		return new Crc32cCodec();
 	}
-	encode = unimplementedEncode("crc32c");
+	encode(arr: Uint8Array): Uint8Array {
+		let out = new Uint8Array(arr.byteLength + 4);
+		out.set(arr);
+		new DataView(out.buffer).setUint32(arr.byteLength, crc32c(arr), true);
+		return out;
+	}
 	decode(arr: Uint8Array): Uint8Array {
 		return new Uint8Array(arr.buffer, arr.byteOffset, arr.byteLength - 4);
 	}
@@ -1,5 +1,4 @@
-import { decompress } from "../util.js";
-import { unimplementedEncode } from "./_shared.js";
+import { compress, decompress } from "../util.js";
 
 interface GzipCodecConfig {
 	level: number;
@@ -7,15 +6,26 @@ interface GzipCodecConfig {
 
 export class GzipCodec {
 	kind = "bytes_to_bytes";
+	decodesInto = true;
 
 	static fromConfig(_: GzipCodecConfig) {
 		return new GzipCodec();
 	}
 
-	encode = unimplementedEncode("gzip");
+	/**
+	 * Compress with the platform's `CompressionStream`. The configured
+	 * `level` is not applied (the Compression Streams API has no level
+	 * option); any conforming decoder reads the output regardless.
+	 */
+	encode(bytes: Uint8Array): Promise<Uint8Array> {
+		return compress(bytes, { format: "gzip" });
+	}
 
-	async decode(bytes: Uint8Array): Promise<Uint8Array> {
-		const buffer = await decompress(bytes, { format: "gzip" });
-		return new Uint8Array(buffer);
+	decode(
+		bytes: Uint8Array,
+		out?: Uint8Array,
+		size?: number,
+	): Promise<Uint8Array> {
+		return decompress(bytes, { format: "gzip", out, size });
 	}
 }
@@ -11,7 +11,6 @@ The specification for this codec can be found at https://github.com/zarr-develop
 import { InvalidMetadataError } from "../errors.js";
 import type { Chunk, Scalar } from "../metadata.js";
 import { getCtr } from "../util.js";
-import { unimplementedEncode } from "./_shared.js";
 import {
 	type JsonScalar,
 	type NumericDataType,
@@ -69,7 +68,15 @@ export class ScaleOffsetCodec<D extends NumericDataType> {
 		);
 	}
 
-	encode = unimplementedEncode("scale_offset");
+	encode(chunk: Chunk<D>): Chunk<D> {
+		const src = chunk.data;
+		const out = new this.#ctr(src.length) as Chunk<D>["data"];
+		for (let i = 0; i < src.length; i++) {
+			// @ts-expect-error - mix of bigint and number arithmetic is safe here
+			out[i] = (src[i] - this.#offset) * this.#scale;
+		}
+		return { data: out, shape: chunk.shape, stride: chunk.stride };
+	}
 
 	decode(chunk: Chunk<D>): Chunk<D> {
 		const src = chunk.data;
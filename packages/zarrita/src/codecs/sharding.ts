@@ -1,17 +1,67 @@
-import type { GetOptions, Readable } from "@zarrita/storage";
+import type { AbsolutePath, GetOptions, Readable } from "@zarrita/storage";
 import { createCodecPipeline } from "../codecs.js";
 import { UnsupportedError } from "../errors.js";
 import type { Location } from "../hierarchy.js";
 import type { Chunk } from "../metadata.js";
-import type { ShardingCodecMetadata } from "../util.js";
+import { getStrides, type ShardingCodecMetadata } from "../util.js";
 
 const MAX_BIG_UINT = 18446744073709551615n;
 
+/**
+ * Inner chunks closer together than this (in bytes) are fetched with a
+ * single range request, reading through the gap. Matches the default
+ * `coalesceSize` of `withRangeCoalescing`.
+ */
+const MAX_GAP = 32768;
+
+/**
+ * A set of inner-chunk reads planned up front, so that each shard's index is
+ * consulted once and neighbouring inner chunks share a range request.
+ */
+export interface ChunkReadPlan {
+	/**
+	 * Bytes for a planned chunk (`undefined` if it is missing from its
+	 * shard), or `undefined` if `chunkCoord` isn't part of this plan.
+	 */
+	read(chunkCoord: number[]): Promise<Uint8Array | undefined> | undefined;
+}
+
+type ByteRange = { offset: number; length: number };
+
+/**
+ * Group byte ranges (in any order) so that ranges separated by at most
+ * `maxGap` bytes are read together.
+ */
+export function mergeRanges<R extends ByteRange>(
+	ranges: R[],
+	maxGap: number,
+): Array<ByteRange & { ranges: R[] }> {
+	let sorted = [...ranges].sort((a, b) => a.offset - b.offset);
+	let groups: Array<ByteRange & { ranges: R[] }> = [];
+	for (let range of sorted) {
+		let last = groups.at(-1);
+		let end = last ? last.offset + last.length : 0;
+		if (last && range.offset - end <= maxGap) {
+			last.length = Math.max(end, range.offset + range.length) - last.offset;
+			last.ranges.push(range);
+		} else {
+			groups.push({
+				offset: range.offset,
+				length: range.length,
+				ranges: [range],
+			});
+		}
+	}
+	return groups;
+}
+
 export function createShardedChunkGetter(
 	location: Location<Readable>,
 	shardShape: number[],
 	encodeShardKey: (coord: number[]) => string,
 	shardingConfig: ShardingCodecMetadata["configuration"],
+	/** Inner chunks known to be missing, which are never looked up. */
+	isMissing?: (chunkCoord: number[]) => boolean,
 ) {
 	if (!location.store.getRange) {
 		throw new UnsupportedError("sharding requires a store with getRange");
@@ -29,12 +79,16 @@ export function createShardedChunkGetter(
 	// (offset, length) per inner chunk. Its on-disk size depends on the
 	// index_codecs pipeline — e.g. crc32c appends 4 bytes — so we ask the
 	// pipeline rather than hardcoding any constant.
-	let rawIndexSize = 16 * indexShape.reduce((a, b) => a * b, 1);
+	let chunksPerShard = indexShape.reduce((a, b) => a * b, 1);
+	let rawIndexSize = 16 * chunksPerShard;
 	let cache: Record<string, Promise<Chunk<"uint64"> | null>> = {};
-	return async (chunkCoord: number[], options?: GetOptions) => {
+
+	function resolveShardPath(chunkCoord: number[]): AbsolutePath {
 		let shardCoord = chunkCoord.map((d, i) => Math.floor(d / indexShape[i]));
-		let shardPath = location.resolve(encodeShardKey(shardCoord)).path;
+		return location.resolve(encodeShardKey(shardCoord)).path;
+	}
 
+	function loadIndex(shardPath: AbsolutePath, options?: GetOptions) {
 		if (!(shardPath in cache)) {
 			cache[shardPath] = (async () => {
 				let suffixLength = await indexCodec.computeEncodedSize(rawIndexSize);
@@ -45,12 +99,14 @@ export function createShardedChunkGetter(
 				throw err;
 			});
 		}
-		let index = await cache[shardPath];
-
-		if (index === null) {
-			return undefined;
-		}
+		return cache[shardPath];
+	}
 
+	/** The byte range of an inner chunk, or `undefined` if it is missing. */
+	function locate(
+		index: Chunk<"uint64">,
+		chunkCoord: number[],
+	): ByteRange | undefined {
 		let { data, shape, stride } = index;
 		let linearOffset = chunkCoord
 			.map((d, i) => d % shape[i])
@@ -62,13 +118,231 @@ export function createShardedChunkGetter(
 		if (offset === MAX_BIG_UINT && length === MAX_BIG_UINT) {
 			return undefined;
 		}
-		return getRange(
-			shardPath,
-			{
-				offset: Number(offset),
-				length: Number(length),
+		return { offset: Number(offset), length: Number(length) };
+	}
+
+	async function getChunkBytes(chunkCoord: number[], options?: GetOptions) {
+		if (isMissing?.(chunkCoord)) {
+			return undefined;
+		}
+		let shardPath = resolveShardPath(chunkCoord);
+		let index = await loadIndex(shardPath, options);
+		if (index === null) {
+			return undefined;
+		}
+		let range = locate(index, chunkCoord);
+		if (!range) {
+			return undefined;
+		}
+		return getRange(shardPath, range, options);
+	}
+
+	/**
+	 * Read the planned inner chunks of one shard: consult the index once,
+	 * merge neighbouring ranges, and slice each inner chunk out of its merged
+	 * read without copying.
+	 */
+	async function readShard(
+		shardPath: AbsolutePath,
+		chunkCoords: Map<string, number[]>,
+		options?: GetOptions,
+	) {
+		let chunks = new Map<string, Promise<Uint8Array | undefined>>();
+		let index = await loadIndex(shardPath, options);
+		let wanted: Array<ByteRange & { key: string }> = [];
+		for (let [key, chunkCoord] of chunkCoords) {
+			let range = index ? locate(index, chunkCoord) : undefined;
+			if (range) {
+				wanted.push({ key, ...range });
+			} else {
+				chunks.set(key, Promise.resolve(undefined));
+			}
+		}
+		for (let group of mergeRanges(wanted, MAX_GAP)) {
+			// Stores may also answer synchronously (`SyncReadable`).
+			let request = Promise.resolve(
+				getRange(
+					shardPath,
+					{ offset: group.offset, length: group.length },
+					options,
+				),
+			);
+			for (let { key, offset, length } of group.ranges) {
+				let start = offset - group.offset;
+				let bytes = request.then((b) => b?.subarray(start, start + length));
+				// Chunks that are never consumed (e.g. the read was aborted)
+				// mustn't surface as unhandled rejections.
+				bytes.catch(() => {});
+				chunks.set(key, bytes);
+			}
+		}
+		return chunks;
+	}
+
+	/**
+	 * Plan the reads for a batch of inner chunks. Nothing is fetched until the
+	 * first planned chunk of a shard is read; at that point every planned
+	 * chunk of that shard is requested at once.
+	 */
+	function plan(chunkCoords: number[][], options?: GetOptions): ChunkReadPlan {
+		let byShard = new Map<AbsolutePath, Map<string, number[]>>();
+		for (let chunkCoord of chunkCoords) {
+			// Left out of the plan, so that a shard with nothing but missing
+			// chunks to read isn't fetched at all.
+			if (isMissing?.(chunkCoord)) {
+				continue;
+			}
+			let shardPath = resolveShardPath(chunkCoord);
+			let coords = byShard.get(shardPath);
+			if (!coords) {
+				coords = new Map();
+				byShard.set(shardPath, coords);
+			}
+			coords.set(chunkCoord.join(","), chunkCoord);
+		}
+		let shards = new Map<
+			AbsolutePath,
+			Promise<Map<string, Promise<Uint8Array | undefined>>>
+		>();
+		return {
+			read(chunkCoord) {
+				let shardPath = resolveShardPath(chunkCoord);
+				let coords = byShard.get(shardPath);
+				if (!coords) {
+					return undefined;
+				}
+				let shard = shards.get(shardPath);
+				if (!shard) {
+					shard = readShard(shardPath, coords, options);
+					shards.set(shardPath, shard);
+				}
+				let key = chunkCoord.join(",");
+				return shard.then((chunks) => {
+					let bytes = chunks.get(key);
+					if (!bytes) {
+						// Not planned, or already handed out; read it on its own.
+						return getChunkBytes(chunkCoord, options);
+					}
+					// Drop the reference so consumed bytes can be collected.
+					chunks.delete(key);
+					return bytes;
+				});
 			},
-			options,
+		};
+	}
+
+	/** Position of an inner chunk within its shard, in C order. */
+	function innerIndex(chunkCoord: number[]): number {
+		let linear = 0;
+		for (let i = 0; i < indexShape.length; i++) {
+			linear = linear * indexShape[i] + (chunkCoord[i] % indexShape[i]);
+		}
+		return linear;
+	}
+
+	/**
+	 * Which inner chunks of a shard are stored, in C order, read from its
+	 * index (all `false` for a missing shard).
+	 */
+	async function storedChunks(
+		shardPath: AbsolutePath,
+		options?: GetOptions,
+	): Promise<boolean[]> {
+		let index = await loadIndex(shardPath, options);
+		let stored = new Array<boolean>(chunksPerShard).fill(false);
+		if (!index) {
+			return stored;
+		}
+		let localCoord = indexShape.map(() => 0);
+		for (let i = 0; i < chunksPerShard; i++) {
+			stored[i] = locate(index, localCoord) !== undefined;
+			for (let d = localCoord.length - 1; d >= 0; d--) {
+				if (++localCoord[d] < indexShape[d]) break;
+				localCoord[d] = 0;
+			}
+		}
+		return stored;
+	}
+
+	/**
+	 * Read a whole shard and split it into the encoded bytes of each inner
+	 * chunk (C order; `undefined` for missing chunks or a missing shard).
+	 */
+	async function readChunks(
+		shardPath: AbsolutePath,
+		options?: GetOptions,
+	): Promise<Array<Uint8Array | undefined>> {
+		let chunks: Array<Uint8Array | undefined> = new Array(chunksPerShard);
+		let bytes = await location.store.get(shardPath, options);
+		if (!bytes) {
+			return chunks;
+		}
+		let indexSize = await indexCodec.computeEncodedSize(rawIndexSize);
+		let index = await indexCodec.decode(
+			bytes.subarray(bytes.byteLength - indexSize),
 		);
+		let localCoord = indexShape.map(() => 0);
+		for (let i = 0; i < chunksPerShard; i++) {
+			let range = locate(index, localCoord);
+			if (range) {
+				chunks[i] = bytes.subarray(range.offset, range.offset + range.length);
+			}
+			// advance the local coordinate in C order
+			for (let d = localCoord.length - 1; d >= 0; d--) {
+				if (++localCoord[d] < indexShape[d]) break;
+				localCoord[d] = 0;
+			}
+		}
+		return chunks;
+	}
+
+	/**
+	 * Assemble a shard from the encoded bytes of its inner chunks (C order;
+	 * `undefined` marks a missing chunk), with the index appended at the end.
+	 */
+	async function encodeShard(
+		chunks: Array<Uint8Array | undefined>,
+	): Promise<Uint8Array> {
+		let index = new BigUint64Array(2 * chunksPerShard).fill(MAX_BIG_UINT);
+		let size = 0;
+		for (let i = 0; i < chunksPerShard; i++) {
+			let chunk = chunks[i];
+			if (chunk) {
+				index[2 * i] = BigInt(size);
+				index[2 * i + 1] = BigInt(chunk.byteLength);
+				size += chunk.byteLength;
+			}
+		}
+		let encodedIndex = await indexCodec.encode({
+			data: index,
+			shape: [...indexShape, 2],
+			stride: getStrides([...indexShape, 2], "C"),
+		});
+		let out = new Uint8Array(size + encodedIndex.byteLength);
+		let offset = 0;
+		for (let chunk of chunks) {
+			if (chunk) {
+				out.set(chunk, offset);
+				offset += chunk.byteLength;
+			}
+		}
+		out.set(encodedIndex, offset);
+		return out;
+	}
+
+	return {
+		/** Number of inner chunks along each dimension of a shard. */
+		indexShape,
+		resolveShardPath,
+		innerIndex,
+		getChunkBytes,
+		plan,
+		storedChunks,
+		readChunks,
+		encodeShard,
+		/** Forget the cached index of a shard after it has been rewritten. */
+		invalidate(shardPath: AbsolutePath) {
+			delete cache[shardPath];
+		},
 	};
 }
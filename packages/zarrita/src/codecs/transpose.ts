@@ -1,61 +1,33 @@
+import {
+	compatChunk,
+	compileLayoutCopyPlan,
+	runCopy,
+} from "../indexing/copy.js";
 import type {
 	Chunk,
 	DataType,
-	Scalar,
 	TypedArray,
 	TypedArrayConstructor,
 } from "../metadata.js";
-import {
-	BoolArray,
-	ByteStringArray,
-	UnicodeStringArray,
-} from "../typedarray.js";
 import { assert, getStrides } from "../util.js";
 
-type TypedArrayProxy<D extends DataType> = {
-	[x: number]: Scalar<D>;
-};
-
-function proxy<D extends DataType>(arr: TypedArray<D>): TypedArrayProxy<D> {
-	if (
-		arr instanceof BoolArray ||
-		arr instanceof ByteStringArray ||
-		arr instanceof UnicodeStringArray
-	) {
-		// @ts-expect-error - TS cannot infer arr is a TypedArrayProxy<D>
-		const arrp: TypedArrayProxy<D> = new Proxy(arr, {
-			get(target, prop) {
-				return target.get(Number(prop));
-			},
-			set(target, prop, value) {
-				// @ts-expect-error - value is OK
-				target.set(Number(prop), value);
-				return true;
-			},
-		});
-		return arrp;
-	}
-	// @ts-expect-error - TS cannot infer arr is a TypedArrayProxy<D>
-	return arr;
-}
-
 function emptyLike<D extends DataType>(
 	chunk: Chunk<D>,
 	order: Order,
 ): Chunk<D> {
+	let source = chunk.data;
 	let data: TypedArray<D>;
-	if (
-		chunk.data instanceof ByteStringArray ||
-		chunk.data instanceof UnicodeStringArray
-	) {
-		data = new (chunk.constructor as TypedArrayConstructor<D>)(
-			// @ts-expect-error
-			chunk.data.length,
-			chunk.data.chars,
-		);
+	if (globalThis.Array.isArray(source)) {
+		data = new globalThis.Array(source.length) as TypedArray<D>;
+	} else if ("chars" in source) {
+		// The string arrays take the number of characters per element first.
+		data = new (source.constructor as new (
+			chars: number,
+			length: number,
+		) => TypedArray<D>)(source.chars, source.length);
 	} else {
-		data = new (chunk.constructor as TypedArrayConstructor<D>)(
-			chunk.data.length,
+		data = new (source.constructor as TypedArrayConstructor<D>)(
+			source.length,
 		);
 	}
 	return {
@@ -65,37 +37,20 @@ function emptyLike<D extends DataType>(
 	};
 }
 
+/**
+ * Copy a chunk into a new buffer laid out in `target` order, moving the raw
+ * element bytes (so `BoolArray` and the string arrays need no per-element
+ * encoding). Transposing layouts are walked in cache-sized tiles.
+ */
 function convertArrayOrder<D extends DataType>(
 	src: Chunk<D>,
 	target: Order,
 ): Chunk<D> {
 	let out = emptyLike(src, target);
-	let nDims = src.shape.length;
-	let size = src.data.length;
-	let index = Array(nDims).fill(0);
-
-	let srcData = proxy(src.data);
-	let outData = proxy(out.data);
-
-	for (let srcIdx = 0; srcIdx < size; srcIdx++) {
-		let outIdx = 0;
-		for (let dim = 0; dim < nDims; dim++) {
-			outIdx += index[dim] * out.stride[dim];
-		}
-		outData[outIdx] = srcData[srcIdx];
-
-		index[0] += 1;
-		for (let dim = 0; dim < nDims; dim++) {
-			if (index[dim] === src.shape[dim]) {
-				if (dim + 1 === nDims) {
-					break;
-				}
-				index[dim] = 0;
-				index[dim + 1] += 1;
-			}
-		}
+	let plan = compileLayoutCopyPlan(src.shape, out.stride, src.stride);
+	if (plan) {
+		runCopy(plan, compatChunk(out), compatChunk(src));
 	}
-
 	return out;
 }
 
@@ -122,38 +77,32 @@ type Order = "C" | "F" | Array<number>;
 
 export class TransposeCodec {
 	kind = "array_to_array";
+	/** The layout of encoded chunks: `order[0]` varies slowest. */
 	#order: Array<number>;
-	#inverseOrder: Array<number>;
 
 	constructor(configuration: { order?: Order }, meta: { shape: number[] }) {
 		let value = configuration.order ?? "C";
 		let rank = meta.shape.length;
 		let order = new Array<number>(rank);
-		let inverseOrder = new Array<number>(rank);
 
 		if (value === "C") {
 			for (let i = 0; i < rank; ++i) {
 				order[i] = i;
-				inverseOrder[i] = i;
 			}
 		} else if (value === "F") {
 			for (let i = 0; i < rank; ++i) {
 				order[i] = rank - i - 1;
-				inverseOrder[i] = rank - i - 1;
 			}
 		} else {
 			order = value;
-			order.forEach((x, i) => {
-				assert(
-					inverseOrder[x] === undefined,
-					`Invalid permutation: ${JSON.stringify(value)}`,
-				);
-				inverseOrder[x] = i;
-			});
+			let seen = new Set<number>();
+			for (let x of order) {
+				assert(!seen.has(x), `Invalid permutation: ${JSON.stringify(value)}`);
+				seen.add(x);
+			}
 		}
 
 		this.#order = order;
-		this.#inverseOrder = inverseOrder;
 	}
 
 	static fromConfig(
@@ -164,11 +113,12 @@ export class TransposeCodec {
 	}
 
 	encode<D extends DataType>(arr: Chunk<D>): Chunk<D> {
-		if (matchesOrder(arr, this.#inverseOrder)) {
+		// Write the layout `decode` reads back (and zarr-python writes).
+		if (matchesOrder(arr, this.#order)) {
 			// can skip making a copy
 			return arr;
 		}
-		return convertArrayOrder(arr, this.#inverseOrder);
+		return convertArrayOrder(arr, this.#order);
 	}
 
 	decode<D extends DataType>(arr: Chunk<D>): Chunk<D> {
@@ -1,6 +1,5 @@
 import type { Chunk, String } from "../metadata.js";
 import { getStrides } from "../util.js";
-import { unimplementedEncode } from "./_shared.js";
 
 export class VLenUTF8 {
 	readonly kind = "array_to_bytes";
@@ -15,19 +14,34 @@ export class VLenUTF8 {
 		return new VLenUTF8(meta.shape);
 	}
 
-	encode = unimplementedEncode("vlen-utf8");
+	encode(chunk: Chunk<String>): Uint8Array {
+		let encoder = new TextEncoder();
+		let items = (chunk.data as Array<string>).map((item) =>
+			encoder.encode(item),
+		);
+		let size = 4 + items.reduce((acc, item) => acc + 4 + item.byteLength, 0);
+		let bytes = new Uint8Array(size);
+		let view = new DataView(bytes.buffer);
+		view.setUint32(0, items.length, true);
+		let pos = 4;
+		for (let item of items) {
+			view.setUint32(pos, item.byteLength, true);
+			pos += 4;
+			bytes.set(item, pos);
+			pos += item.byteLength;
+		}
+		return bytes;
+	}
 
 	decode(bytes: Uint8Array): Chunk<String> {
 		let decoder = new TextDecoder();
-		let view = new DataView(bytes.buffer);
+		let view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
 		let data: Array<string> = Array(view.getUint32(0, true));
 		let pos = 4;
 		for (let i = 0; i < data.length; i++) {
 			let itemLength = view.getUint32(pos, true);
 			pos += 4;
-			data[i] = decoder.decode(
-				(bytes.buffer as ArrayBuffer).slice(pos, pos + itemLength),
-			);
+			data[i] = decoder.decode(bytes.subarray(pos, pos + itemLength));
 			pos += itemLength;
 		}
 		return { data, shape: this.#shape, stride: this.#strides };
@@ -1,5 +1,4 @@
-import { decompress } from "../util.js";
-import { unimplementedEncode } from "./_shared.js";
+import { compress, decompress } from "../util.js";
 
 interface ZlibCodecConfig {
 	level: number;
@@ -7,15 +6,22 @@ interface ZlibCodecConfig {
 
 export class ZlibCodec {
 	kind = "bytes_to_bytes";
+	decodesInto = true;
 
 	static fromConfig(_: ZlibCodecConfig) {
 		return new ZlibCodec();
 	}
 
-	encode = unimplementedEncode("zlib");
+	/** `"deflate"` is zlib-framed deflate. As with gzip, `level` is ignored. */
+	encode(bytes: Uint8Array): Promise<Uint8Array> {
+		return compress(bytes, { format: "deflate" });
+	}
 
-	async decode(bytes: Uint8Array): Promise<Uint8Array> {
-		const buffer = await decompress(bytes, { format: "deflate" });
-		return new Uint8Array(buffer);
+	decode(
+		bytes: Uint8Array,
+		out?: Uint8Array,
+		size?: number,
+	): Promise<Uint8Array> {
+		return decompress(bytes, { format: "deflate", out, size });
 	}
 }
@@ -0,0 +1,374 @@
+/**
+ * Off-main-thread chunk decoding.
+ *
+ * A {@linkcode DecodePool} ships encoded chunk bytes to a set of workers
+ * (Web Workers or Node `worker_threads`) and hands back decoded chunks. Each
+ * worker runs {@linkcode exposeDecodeWorker}, which rebuilds the codec
+ * pipeline from the (structured-cloneable) chunk metadata and decodes with
+ * the same codecs the main thread would use.
+ *
+ * ```ts
+ * // decode-worker.js
+ * import * as zarr from "zarrita";
+ * zarr.exposeDecodeWorker(self);
+ *
+ * // main.js
+ * import * as zarr from "zarrita";
+ * let pool = zarr.createDecodePool(
+ *   () => new Worker(new URL("./decode-worker.js", import.meta.url), { type: "module" }),
+ *   { size: navigator.hardwareConcurrency },
+ * );
+ * let arr = await zarr.open(store, { kind: "array" });
+ * let region = await zarr.get(arr, null, { decodePool: pool });
+ * ```
+ *
+ * @module
+ */
+import { type ChunkMetadata, createCodecPipeline } from "./codecs.js";
+import { CodecPipelineError, UnknownCodecError } from "./errors.js";
+import type { Chunk, DataType, TypedArray } from "./metadata.js";
+import { getCtr } from "./util.js";
+
+/**
+ * The subset of a worker handle the pool talks to. Satisfied by both the
+ * web `Worker` and Node's `worker_threads.Worker`.
+ */
+export interface WorkerLike {
+	postMessage(message: unknown, transfer?: Transferable[]): void;
+	terminate(): unknown;
+}
+
+/**
+ * The subset of a worker's global scope that {@linkcode exposeDecodeWorker}
+ * talks to. Satisfied by `self` in a Web Worker and by `parentPort` from
+ * `node:worker_threads`.
+ */
+export interface WorkerScopeLike {
+	postMessage(message: unknown, transfer?: Transferable[]): void;
+}
+
+/** A pool of workers that decode chunk bytes off the calling thread. */
+export interface DecodePool {
+	/** Decode `bytes` with the codec pipeline described by `meta`. */
+	decode<D extends DataType>(
+		meta: ChunkMetadata<D>,
+		bytes: Uint8Array,
+		options?: { signal?: AbortSignal },
+	): Promise<Chunk<D>>;
+	/** Terminate every spawned worker and reject all pending requests. */
+	terminate(): void;
+}
+
+export interface DecodePoolOptions {
+	/**
+	 * Maximum number of workers to spawn. Workers are created lazily, so a
+	 * pool only grows as large as the decode concurrency actually requires.
+	 *
+	 * Default: `navigator.hardwareConcurrency`, or 4 if unavailable.
+	 */
+	size?: number;
+	/**
+	 * Transfer (rather than copy) the encoded bytes to the worker. This
+	 * detaches the buffer on the calling thread, so only enable it when no
+	 * other code holds on to the bytes returned by the store (e.g. no
+	 * `withByteCaching` in front of the store).
+	 *
+	 * Default: `false`.
+	 */
+	transfer?: boolean;
+}
+
+type DecodeRequest = {
+	id: number;
+	meta: ChunkMetadata<DataType>;
+	bytes: Uint8Array;
+};
+
+type DecodeResponse =
+	| {
+			id: number;
+			data:
+				| {
+						kind: "buffer";
+						buffer: ArrayBufferLike;
+						byteOffset: number;
+						length: number;
+				  }
+				| { kind: "array"; values: unknown[] };
+			shape: number[];
+			stride: number[];
+	  }
+	| {
+			id: number;
+			error: { name: string; message: string; codec?: string };
+	  };
+
+type MessageSource = {
+	addEventListener?: (
+		type: "message" | "error",
+		listener: (event: { data?: unknown; error?: unknown }) => void,
+	) => void;
+	on?: (type: "message" | "error", listener: (value: unknown) => void) => void;
+};
+
+/**
+ * Subscribe to `message`/`error` on either an `EventTarget`-style handle
+ * (web workers, Node `MessagePort`) or an `EventEmitter`-style one (Node's
+ * `worker_threads.Worker`), normalizing the payload to the message data.
+ */
+function listen(
+	source: unknown,
+	type: "message" | "error",
+	listener: (value: unknown) => void,
+): void {
+	let target = source as MessageSource;
+	if (typeof target.addEventListener === "function") {
+		target.addEventListener(type, (event) =>
+			listener(type === "message" ? event.data : (event.error ?? event)),
+		);
+		return;
+	}
+	if (typeof target.on === "function") {
+		target.on(type, listener);
+		return;
+	}
+	throw new TypeError("Worker must implement addEventListener or on");
+}
+
+/** JSON key for a pipeline config; bigint fill values are stringified. */
+function metaKey(meta: ChunkMetadata<DataType>): string {
+	return JSON.stringify(meta, (_key, value) =>
+		typeof value === "bigint" ? `${value}n` : value,
+	);
+}
+
+function defaultPoolSize(): number {
+	let n = globalThis.navigator?.hardwareConcurrency;
+	return typeof n === "number" && n > 0 ? n : 4;
+}
+
+function reviveError(error: {
+	name: string;
+	message: string;
+	codec?: string;
+}): Error {
+	if (error.name === "UnknownCodecError" && error.codec) {
+		return new UnknownCodecError(error.codec);
+	}
+	return new CodecPipelineError({
+		direction: "decode",
+		codec: error.codec,
+		cause: new Error(error.message),
+	});
+}
+
+interface PendingDecode {
+	dataType: DataType;
+	resolve: (chunk: Chunk<DataType>) => void;
+	reject: (reason: unknown) => void;
+}
+
+interface PoolWorker {
+	handle: WorkerLike;
+	pending: Map<number, PendingDecode>;
+}
+
+/** True if `bytes` can be transferred without detaching unrelated data. */
+function isTransferable(bytes: Uint8Array): boolean {
+	return (
+		bytes.buffer instanceof ArrayBuffer &&
+		bytes.byteOffset === 0 &&
+		bytes.byteLength === bytes.buffer.byteLength
+	);
+}
+
+/**
+ * Create a pool of decode workers. `createWorker` is called lazily (up to
+ * `size` times) and must return a worker whose script calls
+ * {@linkcode exposeDecodeWorker}.
+ *
+ * Requests are routed to the least-busy worker. Decoded buffers are
+ * transferred back to the calling thread, so the only copy on the return
+ * path is the one the codec itself makes.
+ *
+ * Custom codecs registered on `zarr.registry` must also be registered in the
+ * worker script, since each worker builds its own pipeline.
+ */
+export function createDecodePool(
+	createWorker: () => WorkerLike,
+	options: DecodePoolOptions = {},
+): DecodePool {
+	let size = Math.max(1, options.size ?? defaultPoolSize());
+	let transfer = options.transfer ?? false;
+	let workers: PoolWorker[] = [];
+	let nextId = 0;
+
+	function spawn(): PoolWorker {
+		let worker: PoolWorker = { handle: createWorker(), pending: new Map() };
+		listen(worker.handle, "message", (value) => {
+			let response = value as DecodeResponse;
+			let request = worker.pending.get(response.id);
+			if (!request) return;
+			worker.pending.delete(response.id);
+			if ("error" in response) {
+				request.reject(reviveError(response.error));
+				return;
+			}
+			let { data, shape, stride } = response;
+			// Custom array classes (BoolArray, UnicodeStringArray, ...) don't
+			// survive structured cloning, so rebuild the view on this side.
+			let ctr = getCtr(request.dataType);
+			request.resolve({
+				data: (data.kind === "array"
+					? data.values
+					: new ctr(
+							data.buffer,
+							data.byteOffset,
+							data.length,
+						)) as TypedArray<DataType>,
+				shape,
+				stride,
+			});
+		});
+		listen(worker.handle, "error", (reason) => {
+			for (let request of worker.pending.values()) request.reject(reason);
+			worker.pending.clear();
+			// A failed worker looks idle, so `pick` would keep choosing it;
+			// drop it and let the next request spawn a replacement.
+			worker.handle.terminate();
+			let index = workers.indexOf(worker);
+			if (index !== -1) workers.splice(index, 1);
+		});
+		workers.push(worker);
+		return worker;
+	}
+
+	function pick(): PoolWorker {
+		let best: PoolWorker | undefined;
+		for (let worker of workers) {
+			if (!best || worker.pending.size < best.pending.size) best = worker;
+		}
+		if (best && (best.pending.size === 0 || workers.length >= size)) {
+			return best;
+		}
+		return spawn();
+	}
+
+	return {
+		decode<D extends DataType>(
+			meta: ChunkMetadata<D>,
+			bytes: Uint8Array,
+			{ signal }: { signal?: AbortSignal } = {},
+		): Promise<Chunk<D>> {
+			signal?.throwIfAborted();
+			let worker = pick();
+			let id = nextId++;
+			if (!transfer || !isTransferable(bytes)) {
+				// Copy so that the caller's buffer (possibly shared, cached by a
+				// store extension, or a view into a larger blob) is never detached.
+				bytes = bytes.slice();
+			}
+			return new Promise<Chunk<D>>((resolve, reject) => {
+				let onAbort = () => {
+					worker.pending.delete(id);
+					reject(signal?.reason);
+				};
+				signal?.addEventListener("abort", onAbort, { once: true });
+				worker.pending.set(id, {
+					dataType: meta.dataType,
+					resolve: (chunk) => {
+						signal?.removeEventListener("abort", onAbort);
+						resolve(chunk as Chunk<D>);
+					},
+					reject: (reason) => {
+						signal?.removeEventListener("abort", onAbort);
+						reject(reason);
+					},
+				});
+				let request: DecodeRequest = { id, meta, bytes };
+				worker.handle.postMessage(request, [bytes.buffer as ArrayBuffer]);
+			});
+		},
+		terminate() {
+			for (let worker of workers) {
+				for (let request of worker.pending.values()) {
+					request.reject(new Error("Decode pool terminated"));
+				}
+				worker.pending.clear();
+				worker.handle.terminate();
+			}
+			workers = [];
+		},
+	};
+}
+
+/**
+ * Serve decode requests from a {@linkcode DecodePool} inside a worker.
+ *
+ * Pass `self` in a Web Worker, or `parentPort` from `node:worker_threads`.
+ * Codec pipelines are built once per distinct chunk metadata and reused for
+ * every subsequent request.
+ *
+ * ```ts
+ * // Node
+ * import { parentPort } from "node:worker_threads";
+ * import * as zarr from "zarrita";
+ * zarr.exposeDecodeWorker(parentPort);
+ * ```
+ */
+export function exposeDecodeWorker(scope: WorkerScopeLike): void {
+	let pipelines = new Map<
+		string,
+		ReturnType<typeof createCodecPipeline<DataType>>
+	>();
+	listen(scope, "message", async (value) => {
+		let { id, meta, bytes } = value as DecodeRequest;
+		try {
+			let key = metaKey(meta);
+			let pipeline = pipelines.get(key);
+			if (!pipeline) {
+				pipeline = createCodecPipeline(meta);
+				pipelines.set(key, pipeline);
+			}
+			let chunk = await pipeline.decode(bytes);
+			let { data, shape, stride } = chunk;
+			if (globalThis.Array.isArray(data)) {
+				scope.postMessage({
+					id,
+					data: { kind: "array", values: data },
+					shape,
+					stride,
+				} satisfies DecodeResponse);
+				return;
+			}
+			let buffer = data.buffer;
+			scope.postMessage(
+				{
+					id,
+					data: {
+						kind: "buffer",
+						buffer,
+						byteOffset: data.byteOffset,
+						length: data.length,
+					},
+					shape,
+					stride,
+				} satisfies DecodeResponse,
+				buffer instanceof ArrayBuffer ? [buffer] : [],
+			);
+		} catch (err) {
+			let error = err as Error & { codec?: string };
+			scope.postMessage({
+				id,
+				error: {
+					name: error?.name ?? "Error",
+					message:
+						error?.cause instanceof Error
+							? error.cause.message
+							: String(error?.message ?? error),
+					codec: error?.codec,
+				},
+			} satisfies DecodeResponse);
+		}
+	});
+}
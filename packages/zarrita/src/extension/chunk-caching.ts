@@ -0,0 +1,161 @@
+import type { Chunk, DataType } from "../metadata.js";
+import { markSharedChunk } from "../util.js";
+import { defineArrayExtension } from "./define-array.js";
+
+/**
+ * Minimal decoded-chunk cache interface. A plain `Map<string, Chunk>` or any
+ * third-party LRU exposing `get` and `set` satisfies it. When one is passed to
+ * {@linkcode withChunkCaching}, eviction is entirely up to the container.
+ */
+export interface ChunkCache {
+	get(key: string): Chunk<DataType> | undefined;
+	set(key: string, value: Chunk<DataType>): void;
+	/** Called by `clearChunkCache()`; containers without it are left as is. */
+	clear?(): void;
+}
+
+/** Counters reported by `chunkCacheStats()` on a cached array. */
+export interface ChunkCacheStats {
+	/** Reads served from the cache or joined to an in-flight decode. */
+	hits: number;
+	/** Reads that fetched and decoded the chunk. */
+	misses: number;
+	/** Chunks dropped to stay within `maxBytes`. 0 with a custom `cache`. */
+	evictions: number;
+	/** Chunks currently held. Always 0 for a custom `cache`. */
+	entries: number;
+	/** Approximate decoded size of the chunks currently held. */
+	bytes: number;
+}
+
+/** Rough in-memory size of a chunk's data, for the byte budget. */
+function chunkByteLength(chunk: Chunk<DataType>): number {
+	let data = chunk.data;
+	if ("byteLength" in data) return data.byteLength;
+	// Object arrays (e.g. vlen strings) have no backing buffer; estimate.
+	let size = 0;
+	for (let value of data as unknown[]) {
+		size += typeof value === "string" ? 2 * value.length : 8;
+	}
+	return size;
+}
+
+/**
+ * Cache decoded chunks in front of `Array.getChunk`, so repeated reads of
+ * overlapping selections skip the store round-trip and the codec pipeline.
+ *
+ * By default chunks are kept in an LRU bounded by their decoded size
+ * (`maxBytes`, 128 MiB if omitted). Concurrent reads of the same chunk share a
+ * single fetch and decode. Pass `cache` to bring your own container instead;
+ * `maxBytes` is ignored in that case.
+ *
+ * Cached chunks are shared between every caller, so treat the data returned
+ * by `getChunk` on a cached array as read-only. `zarr.get` copies out of
+ * cached chunks and is safe. Writes made through the store (including
+ * `zarr.set`) are not tracked; call `clearChunkCache()` after writing.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * let arr = zarr.withChunkCaching(
+ *   await zarr.open(store, { kind: "array" }),
+ *   { maxBytes: 512 * 1024 * 1024 },
+ * );
+ * await zarr.get(arr, [zarr.slice(0, 100), null]);
+ * await zarr.get(arr, [zarr.slice(50, 150), null]); // shared chunks are hits
+ * arr.chunkCacheStats(); // { hits, misses, evictions, entries, bytes }
+ * ```
+ */
+export const withChunkCaching = defineArrayExtension(
+	(array, opts: { maxBytes?: number; cache?: ChunkCache } = {}) => {
+		let maxBytes = opts.maxBytes ?? 128 * 1024 * 1024;
+		// Map iteration order doubles as recency order: hits are re-inserted at
+		// the end, and eviction takes from the front.
+		let lru = new Map<string, { chunk: Chunk<DataType>; bytes: number }>();
+		let inflight = new Map<
+			string,
+			{ promise: Promise<Chunk<DataType>>; signal?: AbortSignal }
+		>();
+		let stats = { hits: 0, misses: 0, evictions: 0, bytes: 0 };
+
+		function lookup(key: string): Chunk<DataType> | undefined {
+			if (opts.cache) return opts.cache.get(key);
+			let entry = lru.get(key);
+			if (!entry) return undefined;
+			lru.delete(key);
+			lru.set(key, entry);
+			return entry.chunk;
+		}
+
+		function store(key: string, chunk: Chunk<DataType>) {
+			if (opts.cache) {
+				opts.cache.set(key, chunk);
+				return;
+			}
+			let bytes = chunkByteLength(chunk);
+			if (bytes > maxBytes) return;
+			stats.bytes += bytes - (lru.get(key)?.bytes ?? 0);
+			lru.set(key, { chunk, bytes });
+			for (let [oldest, entry] of lru) {
+				if (stats.bytes <= maxBytes) break;
+				lru.delete(oldest);
+				stats.bytes -= entry.bytes;
+				stats.evictions++;
+			}
+		}
+
+		let read: typeof array.getChunk = async (coords, options, getOpts) => {
+			// Keep SharedArrayBuffer-backed chunks apart from regular ones,
+			// since callers asking for one can't use the other.
+			let sab = getOpts?.useSharedArrayBuffer ? "\0sab" : "";
+			let key = `${array.path}\0${coords.join(",")}${sab}`;
+			let hit = lookup(key);
+			if (hit) {
+				stats.hits++;
+				return hit;
+			}
+			let pending = inflight.get(key);
+			if (pending) {
+				try {
+					let chunk = await pending.promise;
+					stats.hits++;
+					return chunk;
+				} catch (err) {
+					// The read we joined was cancelled by its own caller; if ours
+					// is still live, start a fresh one.
+					if (pending.signal?.aborted && !options?.signal?.aborted) {
+						return read(coords, options, getOpts);
+					}
+					throw err;
+				}
+			}
+			stats.misses++;
+			// Never decode into the caller's output: the cache would retain it.
+			// And cache whole chunks, since other readers may not want the
+			// broadcast stand-in for a missing one.
+			let { decodeInto: _, broadcastFill: __, ...rest } = getOpts ?? {};
+			let promise = array.getChunk(coords, options, rest);
+			inflight.set(key, { promise, signal: options?.signal });
+			try {
+				let chunk = await promise;
+				markSharedChunk(chunk);
+				store(key, chunk);
+				return chunk;
+			} finally {
+				inflight.delete(key);
+			}
+		};
+
+		return {
+			getChunk: read,
+			chunkCacheStats(): ChunkCacheStats {
+				return { ...stats, entries: lru.size };
+			},
+			clearChunkCache(): void {
+				opts.cache?.clear?.();
+				lru.clear();
+				stats.bytes = 0;
+			},
+		};
+	},
+);
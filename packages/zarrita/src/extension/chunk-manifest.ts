@@ -0,0 +1,308 @@
+import type {
+	AbsolutePath,
+	GetOptions,
+	Mutable,
+	Readable,
+} from "@zarrita/storage";
+
+import { InvalidMetadataError, NotFoundError } from "../errors.js";
+import { type Array, getContext } from "../hierarchy.js";
+import type { ChunkQueue } from "../indexing/types.js";
+import { createScheduler } from "../indexing/util.js";
+import type { DataType } from "../metadata.js";
+import { jsonDecodeObject, jsonEncodeObject } from "../util.js";
+import { defineStoreExtension } from "./define.js";
+
+const DEFAULT_KEY = "/chunk_manifest.json";
+
+/**
+ * Which chunks of each array in a store are stored, as written by
+ * {@linkcode writeChunkManifest}: a JSON document that can be kept next to
+ * the data.
+ */
+export interface ChunkManifest {
+	zarrita_chunk_manifest: 1;
+	/** Keyed by array path, e.g. `"/temperature"`. */
+	arrays: Record<
+		string,
+		{
+			/** The number of chunks along each dimension. */
+			grid: number[];
+			/**
+			 * A bitmap over the chunk grid, in C order with the least
+			 * significant bit first, encoded as base64. A set bit marks a
+			 * chunk that is stored.
+			 */
+			stored: string;
+		}
+	>;
+}
+
+/** Which chunks of one array are stored. */
+export interface ChunkPresence {
+	/** The number of chunks along each dimension. */
+	grid: number[];
+	/** Whether the chunk at `chunkCoords` is (or may be) stored. */
+	has(chunkCoords: number[]): boolean;
+}
+
+/** Options for {@linkcode buildChunkManifest}. */
+export interface BuildChunkManifestOptions {
+	/**
+	 * Every key in the store (e.g. from `fs.readdir` or an object store's
+	 * list API), absolute or relative to the store root. Chunks (and shards)
+	 * are then looked up in the listing instead of being requested.
+	 */
+	keys?: Iterable<string>;
+	signal?: AbortSignal;
+	/** The queue for the requests made; at most 32 run at once by default. */
+	createQueue?: () => ChunkQueue;
+}
+
+function encodeBase64(bytes: Uint8Array): string {
+	let binary = "";
+	for (let i = 0; i < bytes.length; i += 0x8000) {
+		binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+	}
+	return btoa(binary);
+}
+
+function decodeBase64(text: string): Uint8Array {
+	let binary = atob(text);
+	let bytes = new Uint8Array(binary.length);
+	for (let i = 0; i < binary.length; i++) {
+		bytes[i] = binary.charCodeAt(i);
+	}
+	return bytes;
+}
+
+/** Call `fn` with the coordinates of every cell of `grid`, in C order. */
+function forEachCell(grid: number[], fn: (coords: number[]) => void) {
+	if (grid.some((n) => n === 0)) return;
+	let coords = grid.map(() => 0);
+	while (true) {
+		fn(coords.slice());
+		let d = grid.length - 1;
+		for (; d >= 0; d--) {
+			if (++coords[d] < grid[d]) break;
+			coords[d] = 0;
+		}
+		if (d < 0) return;
+	}
+}
+
+function linearIndex(grid: number[], coords: number[]): number {
+	let index = 0;
+	for (let i = 0; i < grid.length; i++) {
+		index = index * grid[i] + coords[i];
+	}
+	return index;
+}
+
+/** Whether `path` is stored, with as small a request as the store allows. */
+async function exists(
+	store: Readable,
+	path: AbsolutePath,
+	options: GetOptions,
+): Promise<boolean> {
+	let bytes = await (store.getRange
+		? store.getRange(path, { offset: 0, length: 1 }, options)
+		: store.get(path, options));
+	return bytes !== undefined;
+}
+
+/**
+ * Find out which chunks of `arrays` are stored, for
+ * {@linkcode writeChunkManifest} and {@linkcode withChunkManifest}.
+ *
+ * With a listing of the store's `keys`, no requests are made for unsharded
+ * arrays. Otherwise each chunk is requested once (a single byte of it,
+ * where the store supports range reads). For sharded arrays, the index of
+ * each shard that exists is read, which records its inner chunks.
+ *
+ * ```ts
+ * import * as fs from "node:fs/promises";
+ * import * as zarr from "zarrita";
+ * import { FileSystemStore } from "@zarrita/storage";
+ *
+ * let store = new FileSystemStore("data.zarr");
+ * let arr = await zarr.open(zarr.root(store).resolve("temperature"), {
+ *   kind: "array",
+ * });
+ * let keys = await fs.readdir("data.zarr", { recursive: true });
+ * let manifest = await zarr.buildChunkManifest([arr], { keys });
+ * await zarr.writeChunkManifest(store, manifest);
+ * ```
+ *
+ * @category Utility
+ */
+export async function buildChunkManifest(
+	arrays: Array<DataType, Readable>[],
+	opts: BuildChunkManifestOptions = {},
+): Promise<ChunkManifest> {
+	let listing: Set<string> | undefined;
+	if (opts.keys) {
+		listing = new Set();
+		for (let key of opts.keys) {
+			listing.add(key.startsWith("/") ? key : `/${key}`);
+		}
+	}
+	let options = { signal: opts.signal };
+	let queue = opts.createQueue?.() ?? createScheduler();
+	let manifest: ChunkManifest = { zarrita_chunk_manifest: 1, arrays: {} };
+	let bitmaps: [Array<DataType, Readable>, number[], Uint8Array][] = [];
+
+	for (let arr of arrays) {
+		let context = getContext(arr);
+		let grid = arr.shape.map((s, i) => Math.ceil(s / arr.chunks[i]));
+		let size = grid.reduce((a, b) => a * b, 1);
+		let bits = new Uint8Array(Math.ceil(size / 8));
+		let mark = (coords: number[]) => {
+			let i = linearIndex(grid, coords);
+			bits[i >> 3] |= 1 << (i & 7);
+		};
+		bitmaps.push([arr, grid, bits]);
+
+		let shards = context.shards;
+		if (shards) {
+			let { indexShape } = shards;
+			let shardGrid = grid.map((n, i) => Math.ceil(n / indexShape[i]));
+			forEachCell(shardGrid, (shardCoords) => {
+				let first = shardCoords.map((c, i) => c * indexShape[i]);
+				let shardPath = shards.resolveShardPath(first);
+				if (listing && !listing.has(shardPath)) return;
+				queue.add(async () => {
+					let stored = await shards.storedChunks(shardPath, options);
+					forEachCell(indexShape, (local) => {
+						let coords = local.map((c, i) => first[i] + c);
+						if (
+							coords.every((c, i) => c < grid[i]) &&
+							stored[linearIndex(indexShape, local)]
+						) {
+							mark(coords);
+						}
+					});
+				});
+			});
+			continue;
+		}
+
+		forEachCell(grid, (coords) => {
+			let path = arr.resolve(context.encodeChunkKey(coords)).path;
+			if (listing) {
+				if (listing.has(path)) mark(coords);
+				return;
+			}
+			queue.add(async () => {
+				opts.signal?.throwIfAborted();
+				if (await exists(arr.store, path, options)) mark(coords);
+			});
+		});
+	}
+	await queue.onIdle();
+
+	for (let [arr, grid, bits] of bitmaps) {
+		manifest.arrays[arr.path] = { grid, stored: encodeBase64(bits) };
+	}
+	return manifest;
+}
+
+/**
+ * Persist `manifest` in `store`, at `/chunk_manifest.json` unless `key` says
+ * otherwise, where {@linkcode withChunkManifest} looks for it.
+ *
+ * @category Utility
+ */
+export async function writeChunkManifest(
+	store: Mutable,
+	manifest: ChunkManifest,
+	opts: { key?: AbsolutePath } = {},
+): Promise<void> {
+	await store.set(opts.key ?? DEFAULT_KEY, jsonEncodeObject(manifest));
+}
+
+function isChunkManifest(value: unknown): value is ChunkManifest {
+	return (
+		typeof value === "object" &&
+		value !== null &&
+		"zarrita_chunk_manifest" in value &&
+		value.zarrita_chunk_manifest === 1 &&
+		"arrays" in value &&
+		typeof value.arrays === "object" &&
+		value.arrays !== null
+	);
+}
+
+/**
+ * Wraps a store with a chunk manifest (see {@linkcode buildChunkManifest}),
+ * so that reads of chunks it lists as missing return the fill value without
+ * a request. For sparse arrays, that saves a round-trip (and a 404) per
+ * missing chunk; for sharded arrays, shards with nothing but missing chunks
+ * to read are not fetched at all.
+ *
+ * The manifest is read from `/chunk_manifest.json` (or `key`) unless one is
+ * passed as `manifest`, and a `NotFoundError` is thrown if there is none.
+ * Arrays missing from the manifest, or whose shape no longer matches it,
+ * are read as usual. Writing to an array through the wrapped store drops
+ * its entry, since the manifest no longer describes it.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * let store = await zarr.withChunkManifest(
+ *   new zarr.FetchStore("https://example.com/data.zarr"),
+ * );
+ * let arr = await zarr.open(store, { kind: "array" });
+ * await zarr.get(arr); // requests only the stored chunks
+ * ```
+ */
+export const withChunkManifest = defineStoreExtension(
+	async (
+		store,
+		opts: { manifest?: ChunkManifest; key?: AbsolutePath } = {},
+	) => {
+		let manifest = opts.manifest;
+		if (!manifest) {
+			let key = opts.key ?? DEFAULT_KEY;
+			let bytes = await store.get(key);
+			if (!bytes) {
+				throw new NotFoundError("chunk manifest", { path: key });
+			}
+			let meta: unknown = jsonDecodeObject(bytes);
+			if (!isChunkManifest(meta)) {
+				throw new InvalidMetadataError("Invalid chunk manifest", {
+					path: key,
+				});
+			}
+			manifest = meta;
+		}
+		let entries = new Map<string, ChunkPresence>();
+		for (let [path, { grid, stored }] of Object.entries(manifest.arrays)) {
+			let bits = decodeBase64(stored);
+			entries.set(path, {
+				grid,
+				has(chunkCoords) {
+					// Entries dropped since an array was opened know nothing.
+					if (entries.get(path) !== this) return true;
+					let i = linearIndex(grid, chunkCoords);
+					return (bits[i >> 3] & (1 << (i & 7))) !== 0;
+				},
+			});
+		}
+		let innerSet = (store as Partial<Mutable>).set?.bind(store);
+		return {
+			getChunkPresence(path: AbsolutePath): ChunkPresence | undefined {
+				return entries.get(path);
+			},
+			...(innerSet && {
+				async set(key: AbsolutePath, value: Uint8Array): Promise<void> {
+					for (let path of entries.keys()) {
+						let prefix = path.endsWith("/") ? path : `${path}/`;
+						if (key.startsWith(prefix)) entries.delete(path);
+					}
+					await innerSet(key, value);
+				},
+			}),
+		};
+	},
+);
@@ -210,6 +210,14 @@ export const withConsolidatedMetadata = defineStoreExtension(
 					format === "v2"
 						? await loadConsolidatedV2(store, opts.metadataKey)
 						: await loadConsolidatedV3(store);
+				/**
+				 * A `.zattrs` document the consolidated metadata would have
+				 * listed alongside its node's `.zarray`/`.zgroup` if it existed.
+				 */
+				let isKnownAbsent = (key: AbsolutePath) =>
+					key.endsWith("/.zattrs") &&
+					(`${key.slice(0, -7)}.zarray` in knownMeta ||
+						`${key.slice(0, -7)}.zgroup` in knownMeta);
 				return {
 					async get(
 						key: AbsolutePath,
@@ -224,6 +232,28 @@ export const withConsolidatedMetadata = defineStoreExtension(
 						}
 						return maybeBytes;
 					},
+					/**
+					 * The parsed metadata document at `key`, without a JSON
+					 * round-trip. Documents are shared between callers and must
+					 * not be mutated.
+					 */
+					async getMetadata(
+						key: AbsolutePath,
+						options?: GetOptions,
+					): Promise<Metadata | undefined> {
+						if (knownMeta[key] || isKnownAbsent(key)) {
+							return knownMeta[key];
+						}
+						let maybeBytes = await store.get(key, options);
+						if (!maybeBytes) {
+							return undefined;
+						}
+						let meta: Metadata = jsonDecodeObject(maybeBytes);
+						if (isMetaKey(key)) {
+							knownMeta[key] = meta;
+						}
+						return meta;
+					},
 					contents(): { path: AbsolutePath; kind: "array" | "group" }[] {
 						let contents: {
 							path: AbsolutePath;
@@ -38,6 +38,13 @@ interface PendingRequest {
 	reject: (reason: unknown) => void;
 }
 
+interface PendingSuffix {
+	suffixLength: number;
+	signal?: AbortSignal;
+	resolve: (value: Uint8Array | undefined) => void;
+	reject: (reason: unknown) => void;
+}
+
 interface RangeGroup {
 	offset: number;
 	length: number;
@@ -45,8 +52,8 @@ interface RangeGroup {
 }
 
 /**
- * Immutable report emitted once per microtask flush, per path, via the
- * optional `onFlush` callback. A fresh object is allocated per emission.
+ * Immutable report emitted once per flush, per path, via the optional
+ * `onFlush` callback. A fresh object is allocated per emission.
  */
 export interface FlushReport {
 	/** The store path this flush covered. */
@@ -65,26 +72,96 @@ export interface RangeCoalescingOptions {
 	 * many bytes are merged into a single fetch. Fetching across a small gap
 	 * is cheaper than an extra round trip.
 	 *
+	 * `"adaptive"` derives the threshold from the fetches made so far: it
+	 * fits fetch time against size to estimate the round-trip time and
+	 * throughput of the wrapped store, and merges across gaps that take less
+	 * time to download than a round trip (starting from the default until
+	 * enough fetches have been measured).
+	 *
 	 * Default: 32768 (matches geotiff.js's `BlockedSource` heuristic and
 	 * Rust `object_store`'s `OBJECT_STORE_COALESCE_DEFAULT`).
 	 */
-	coalesceSize?: number;
+	coalesceSize?: number | "adaptive";
+	/**
+	 * Upper bound on the size of a merged fetch. Larger groups are split into
+	 * several fetches issued in parallel. A single request larger than this
+	 * is still fetched on its own.
+	 *
+	 * Default: 8 MiB.
+	 */
+	maxMergedBytes?: number;
+	/**
+	 * How long requests are collected before they are merged and fetched:
+	 *
+	 * - `"microtask"`: requests issued in the same microtask tick.
+	 * - A number: requests issued within that many milliseconds of the first
+	 *   pending one (e.g. reads spread over several ticks by a viewer).
+	 * - `"manual"`: only when `flush()` is called on the store. Pending
+	 *   reads never settle on their own in this mode.
+	 *
+	 * Default: `"microtask"`.
+	 */
+	window?: "microtask" | "manual" | number;
 	/**
-	 * Optional observability hook. Called once per microtask flush, per path,
-	 * with a fresh `FlushReport`. Errors thrown from the callback are
-	 * swallowed via `console.warn`; async return values are ignored.
+	 * Optional observability hook. Called once per flush, per path, with a
+	 * fresh `FlushReport`. Errors thrown from the callback are swallowed via
+	 * `console.warn`; async return values are ignored.
 	 *
-	 * Suffix-length range queries (`{ suffixLength }`) bypass batching and
-	 * do not emit `onFlush`.
+	 * Suffix-length range queries (`{ suffixLength }`) are not reported.
 	 */
 	onFlush?: (report: FlushReport) => void;
 }
 
 const DEFAULT_COALESCE_SIZE = 32768;
+const DEFAULT_MAX_MERGED_BYTES = 8 * 1024 * 1024;
+
+// Bounds for the adaptive gap, and how many recent fetches inform it.
+const MIN_ADAPTIVE_GAP = 4096;
+const MAX_ADAPTIVE_GAP = 4 * 1024 * 1024;
+const ADAPTIVE_SAMPLES = 32;
+
+/**
+ * Estimate the gap worth reading through from recent fetches. A least-squares
+ * fit of `time = rtt + bytes / throughput` gives the bandwidth-delay product
+ * `rtt * throughput`: the number of bytes that download in one round trip.
+ */
+function createGapEstimator(fallback: number) {
+	let samples: Array<{ bytes: number; ms: number }> = [];
+	return {
+		record(bytes: number, ms: number) {
+			samples.push({ bytes, ms });
+			if (samples.length > ADAPTIVE_SAMPLES) samples.shift();
+		},
+		gap(): number {
+			if (samples.length < 4) return fallback;
+			let meanBytes = 0;
+			let meanMs = 0;
+			for (let s of samples) {
+				meanBytes += s.bytes / samples.length;
+				meanMs += s.ms / samples.length;
+			}
+			let cov = 0;
+			let variance = 0;
+			for (let s of samples) {
+				cov += (s.bytes - meanBytes) * (s.ms - meanMs);
+				variance += (s.bytes - meanBytes) ** 2;
+			}
+			let msPerByte = cov / variance;
+			let rtt = meanMs - msPerByte * meanBytes;
+			// Too few distinct sizes, or too noisy to trust.
+			if (!(msPerByte > 0) || !(rtt > 0)) return fallback;
+			return Math.min(
+				MAX_ADAPTIVE_GAP,
+				Math.max(MIN_ADAPTIVE_GAP, Math.round(rtt / msPerByte)),
+			);
+		},
+	};
+}
 
 function groupRequests(
 	sorted: PendingRequest[],
 	coalesceSize: number,
+	maxMergedBytes: number,
 ): RangeGroup[] {
 	if (sorted.length === 0) return [];
 	let groups: RangeGroup[] = [];
@@ -95,9 +172,13 @@ function groupRequests(
 	for (let i = 1; i < sorted.length; i++) {
 		let req = sorted[i];
 		let reqEnd = req.offset + req.length;
-		if (req.offset <= groupEnd + coalesceSize) {
+		let mergedEnd = Math.max(groupEnd, reqEnd);
+		if (
+			req.offset <= groupEnd + coalesceSize &&
+			mergedEnd - groupStart <= maxMergedBytes
+		) {
 			current.push(req);
-			groupEnd = Math.max(groupEnd, reqEnd);
+			groupEnd = mergedEnd;
 		} else {
 			groups.push({
 				offset: groupStart,
@@ -130,11 +211,12 @@ function emitFlush(
 }
 
 /**
- * Wraps a store with microtask-tick range batching: concurrent `getRange`
- * calls within a single microtask are grouped by path, coalesced across
- * small byte gaps, and issued as a single fetch per group. The coalesced
- * blob is sliced on return and each caller receives exactly the bytes they
- * asked for.
+ * Wraps a store with range batching: concurrent `getRange` calls within a
+ * batching window (by default, a single microtask) are grouped by path,
+ * coalesced across small byte gaps, and issued as a single fetch per group.
+ * The coalesced blob is sliced on return and each caller receives exactly
+ * the bytes they asked for. Suffix reads of the same path in a window share
+ * one fetch of the longest suffix.
  *
  * `withRangeCoalescing` carries no cache state. Pair with `withByteCaching`
  * if you want cross-call caching.
@@ -144,7 +226,7 @@ function emitFlush(
  *
  * let store = zarr.withRangeCoalescing(
  *   new zarr.FetchStore("https://example.com/data.zarr"),
- *   { coalesceSize: 32768 },
+ *   { coalesceSize: "adaptive", window: 5 },
  * );
  * ```
  */
@@ -155,20 +237,41 @@ export const withRangeCoalescing = defineStoreExtension(
 		let boundGetRange = store.getRange.bind(store);
 
 		let coalesceSize = opts.coalesceSize ?? DEFAULT_COALESCE_SIZE;
+		let estimator =
+			coalesceSize === "adaptive"
+				? createGapEstimator(DEFAULT_COALESCE_SIZE)
+				: undefined;
+		let maxMergedBytes = opts.maxMergedBytes ?? DEFAULT_MAX_MERGED_BYTES;
+		let window = opts.window ?? "microtask";
 		let onFlush = opts.onFlush;
 
 		let pending = new Map<AbsolutePath, PendingRequest[]>();
+		let pendingSuffixes = new Map<AbsolutePath, PendingSuffix[]>();
 		let scheduled = false;
 
+		function schedule() {
+			if (scheduled || window === "manual") return;
+			scheduled = true;
+			if (window === "microtask") {
+				queueMicrotask(() => flush());
+			} else {
+				setTimeout(() => flush(), window);
+			}
+		}
+
 		async function flush(): Promise<void> {
 			let work = new Map(pending);
+			let suffixWork = new Map(pendingSuffixes);
 			pending.clear();
+			pendingSuffixes.clear();
 			scheduled = false;
 
+			let gap = typeof coalesceSize === "number" ? coalesceSize : undefined;
+			gap ??= estimator?.gap() ?? DEFAULT_COALESCE_SIZE;
 			let pathPromises: Promise<void>[] = [];
 			for (let [path, requests] of work) {
 				requests.sort((a, b) => a.offset - b.offset);
-				let groups = groupRequests(requests, coalesceSize);
+				let groups = groupRequests(requests, gap, maxMergedBytes);
 				emitFlush(onFlush, {
 					path,
 					groupCount: groups.length,
@@ -177,6 +280,9 @@ export const withRangeCoalescing = defineStoreExtension(
 				});
 				pathPromises.push(fetchGroups(path, groups));
 			}
+			for (let [path, suffixes] of suffixWork) {
+				pathPromises.push(fetchSuffixes(path, suffixes));
+			}
 			await Promise.all(pathPromises);
 		}
 
@@ -188,6 +294,7 @@ export const withRangeCoalescing = defineStoreExtension(
 				groups.map(async (group) => {
 					let signal = mergeSignals(group.requests.map((r) => r.signal));
 					try {
+						let began = performance.now();
 						let data = await boundGetRange(
 							path,
 							{ offset: group.offset, length: group.length },
@@ -198,6 +305,9 @@ export const withRangeCoalescing = defineStoreExtension(
 								`Short read: expected ${group.length} bytes but received ${data.length}`,
 							);
 						}
+						if (data) {
+							estimator?.record(group.length, performance.now() - began);
+						}
 						for (let req of group.requests) {
 							if (!data) {
 								req.resolve(undefined);
@@ -216,38 +326,62 @@ export const withRangeCoalescing = defineStoreExtension(
 			);
 		}
 
+		/** Serve every suffix read of a path from one read of the longest. */
+		async function fetchSuffixes(
+			path: AbsolutePath,
+			suffixes: PendingSuffix[],
+		): Promise<void> {
+			let suffixLength = Math.max(...suffixes.map((r) => r.suffixLength));
+			let signal = mergeSignals(suffixes.map((r) => r.signal));
+			try {
+				let data = await boundGetRange(path, { suffixLength }, { signal });
+				for (let req of suffixes) {
+					let start = Math.max(0, (data?.length ?? 0) - req.suffixLength);
+					req.resolve(data?.slice(start));
+				}
+			} catch (err) {
+				for (let req of suffixes) {
+					req.reject(err);
+				}
+			}
+		}
+
 		return {
 			getRange(
 				key: AbsolutePath,
 				range: RangeQuery,
 				options?: GetOptions,
 			): Promise<Uint8Array | undefined> {
-				// Suffix reads (shard index fetches) can't be coalesced because
-				// file size is unknown until the response arrives. Pass through.
-				if ("suffixLength" in range) {
-					return boundGetRange(key, range, options);
-				}
-
-				let { offset, length } = range;
 				return new Promise((resolve, reject) => {
-					let reqs = pending.get(key);
-					if (!reqs) {
-						reqs = [];
-						pending.set(key, reqs);
-					}
-					reqs.push({
-						offset,
-						length,
-						signal: options?.signal,
-						resolve,
-						reject,
-					});
-					if (!scheduled) {
-						scheduled = true;
-						queueMicrotask(() => flush());
+					let signal = options?.signal;
+					if ("suffixLength" in range) {
+						// The object's size is unknown until the response arrives,
+						// so suffix reads can only be merged with each other.
+						let reqs = pendingSuffixes.get(key);
+						if (!reqs) {
+							reqs = [];
+							pendingSuffixes.set(key, reqs);
+						}
+						reqs.push({ ...range, signal, resolve, reject });
+					} else {
+						let reqs = pending.get(key);
+						if (!reqs) {
+							reqs = [];
+							pending.set(key, reqs);
+						}
+						let { offset, length } = range;
+						reqs.push({ offset, length, signal, resolve, reject });
 					}
+					schedule();
 				});
 			},
+			/**
+			 * Fetch all pending reads now, without waiting for the batching
+			 * window to close. Required with `window: "manual"`.
+			 */
+			flush(): Promise<void> {
+				return flush();
+			},
 		};
 	},
 );
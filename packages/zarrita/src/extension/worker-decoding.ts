@@ -0,0 +1,34 @@
+import type { DecodePool } from "../decode-pool.js";
+import { defineArrayExtension } from "./define-array.js";
+
+/**
+ * Decode every chunk of an array on a {@linkcode DecodePool} instead of the
+ * calling thread. Store reads still happen on the calling thread; only the
+ * codec pipeline runs in the workers.
+ *
+ * A `decodePool` passed directly to `zarr.get` takes precedence over the
+ * pool attached here.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * let pool = zarr.createDecodePool(
+ *   () => new Worker(new URL("./decode-worker.js", import.meta.url), { type: "module" }),
+ * );
+ * let arr = zarr.withWorkerDecoding(
+ *   await zarr.open(store, { kind: "array" }),
+ *   { pool },
+ * );
+ * let region = await zarr.get(arr); // decoded across the pool
+ * ```
+ */
+export const withWorkerDecoding = defineArrayExtension(
+	(array, opts: { pool: DecodePool }) => ({
+		getChunk(coords, options, getOpts) {
+			return array.getChunk(coords, options, {
+				...getOpts,
+				decodePool: getOpts?.decodePool ?? opts.pool,
+			});
+		},
+	}),
+);
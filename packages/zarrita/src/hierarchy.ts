@@ -1,6 +1,11 @@
 import type { AbsolutePath, GetOptions, Readable } from "@zarrita/storage";
-import { createShardedChunkGetter } from "./codecs/sharding.js";
-import { createCodecPipeline } from "./codecs.js";
+import {
+	type ChunkReadPlan,
+	createShardedChunkGetter,
+} from "./codecs/sharding.js";
+import { type ChunkMetadata, createCodecPipeline } from "./codecs.js";
+import type { DecodePool } from "./decode-pool.js";
+import type { ChunkPresence } from "./extension/chunk-manifest.js";
 import type {
 	ArrayMetadata,
 	Attributes,
@@ -12,6 +17,7 @@ import type {
 	TypedArray,
 	TypedArrayConstructor,
 } from "./metadata.js";
+import { traced, type Tracer } from "./tracing.js";
 import {
 	assertSharedArrayBufferAvailable,
 	createBuffer,
@@ -22,6 +28,8 @@ import {
 	getStrides,
 	isDataType,
 	isShardingCodec,
+	markFillChunk,
+	markSharedChunk,
 	type NarrowDataType,
 } from "./util.js";
 
@@ -57,7 +65,10 @@ export class Group<Store extends Readable> extends Location<Store> {
 	#metadata: GroupMetadata;
 	constructor(store: Store, path: AbsolutePath, metadata: GroupMetadata) {
 		super(store, path);
-		this.#metadata = metadata;
+		this.#metadata = {
+			...metadata,
+			attributes: structuredClone(metadata.attributes),
+		};
 	}
 	get attrs(): Attributes {
 		return this.#metadata.attributes;
@@ -72,6 +83,46 @@ function getArrayOrder(
 	return maybeTransposeCodec?.configuration?.order ?? "C";
 }
 
+/**
+ * A store that knows which chunks of its arrays are stored, such as one
+ * wrapped with `withChunkManifest`.
+ */
+type ChunkPresenceReader = {
+	getChunkPresence(path: AbsolutePath): ChunkPresence | undefined;
+};
+
+function isChunkPresenceReader(
+	store: Readable,
+): store is Readable & ChunkPresenceReader {
+	return (
+		typeof (store as Partial<ChunkPresenceReader>).getChunkPresence ===
+		"function"
+	);
+}
+
+/**
+ * A test for the chunks of the array at `location` that are known to be
+ * missing, if its store knows about them (for the same chunk grid).
+ */
+function knownMissing(
+	location: Location<Readable>,
+	shape: number[],
+	chunkShape: number[],
+): ((chunkCoords: number[]) => boolean) | undefined {
+	if (!isChunkPresenceReader(location.store)) {
+		return undefined;
+	}
+	let presence = location.store.getChunkPresence(location.path);
+	if (
+		!presence ||
+		presence.grid.length !== shape.length ||
+		presence.grid.some((n, i) => n !== Math.ceil(shape[i] / chunkShape[i]))
+	) {
+		return undefined;
+	}
+	return (chunkCoords) => !presence.has(chunkCoords);
+}
+
 const CONTEXT_MARKER = Symbol("zarrita.context");
 
 export function getContext<T>(obj: { [CONTEXT_MARKER]: T }): T {
@@ -91,43 +142,59 @@ function createContext<D extends DataType>(
 
 	if (configuration) {
 		let nativeOrder = getArrayOrder(configuration.codecs);
+		let shards = createShardedChunkGetter(
+			location,
+			metadata.chunk_grid.configuration.chunk_shape,
+			sharedContext.encodeChunkKey,
+			configuration,
+			knownMissing(location, metadata.shape, configuration.chunk_shape),
+		);
+		let chunkMetadata = {
+			dataType: metadata.data_type,
+			shape: configuration.chunk_shape,
+			codecs: configuration.codecs,
+			fillValue: metadata.fill_value,
+		};
 		return {
 			...sharedContext,
 			kind: "sharded",
 			chunkShape: configuration.chunk_shape,
-			codec: createCodecPipeline({
-				dataType: metadata.data_type,
-				shape: configuration.chunk_shape,
-				codecs: configuration.codecs,
-				fillValue: metadata.fill_value,
-			}),
+			chunkMetadata,
+			codec: createCodecPipeline(chunkMetadata),
 			getStrides(shape: number[]) {
 				return getStrides(shape, nativeOrder);
 			},
-			getChunkBytes: createShardedChunkGetter(
-				location,
-				metadata.chunk_grid.configuration.chunk_shape,
-				sharedContext.encodeChunkKey,
-				configuration,
-			),
+			getChunkBytes: shards.getChunkBytes,
+			planChunkReads: shards.plan,
+			shards,
 		};
 	}
 
 	let nativeOrder = getArrayOrder(metadata.codecs);
+	let isMissing = knownMissing(
+		location,
+		metadata.shape,
+		metadata.chunk_grid.configuration.chunk_shape,
+	);
+	let chunkMetadata = {
+		dataType: metadata.data_type,
+		shape: metadata.chunk_grid.configuration.chunk_shape,
+		codecs: metadata.codecs,
+		fillValue: metadata.fill_value,
+	};
 	return {
 		...sharedContext,
 		kind: "regular",
 		chunkShape: metadata.chunk_grid.configuration.chunk_shape,
-		codec: createCodecPipeline({
-			dataType: metadata.data_type,
-			shape: metadata.chunk_grid.configuration.chunk_shape,
-			codecs: metadata.codecs,
-			fillValue: metadata.fill_value,
-		}),
+		chunkMetadata,
+		codec: createCodecPipeline(chunkMetadata),
 		getStrides(shape: number[]) {
 			return getStrides(shape, nativeOrder);
 		},
 		async getChunkBytes(chunkCoords, options) {
+			if (isMissing?.(chunkCoords)) {
+				return undefined;
+			}
 			let chunkKey = sharedContext.encodeChunkKey(chunkCoords);
 			let chunkPath = location.resolve(chunkKey).path;
 			return location.store.get(chunkPath, options);
@@ -140,6 +207,8 @@ interface ArrayContext<D extends DataType> {
 	kind: "sharded" | "regular";
 	/** The codec pipeline for this array. */
 	codec: ReturnType<typeof createCodecPipeline<D>>;
+	/** The (structured-cloneable) configuration the codec pipeline is built from. */
+	chunkMetadata: ChunkMetadata<D>;
 	/** Encode a chunk key from chunk coordinates. */
 	encodeChunkKey(chunkCoords: number[]): string;
 	/** The TypedArray constructor for this array chunks. */
@@ -153,6 +222,16 @@ interface ArrayContext<D extends DataType> {
 		chunkCoords: number[],
 		options?: GetOptions,
 	): Promise<Uint8Array | undefined>;
+	/**
+	 * Plan the reads for a batch of chunks up front (sharded arrays only), so
+	 * chunks that live in the same shard can share range requests.
+	 */
+	planChunkReads?(
+		chunkCoords: number[][],
+		options?: GetOptions,
+	): ChunkReadPlan;
+	/** Shard layout and I/O helpers (sharded arrays only). */
+	shards?: ReturnType<typeof createShardedChunkGetter>;
 	/** The chunk shape for this array. */
 	chunkShape: number[];
 }
@@ -171,8 +250,15 @@ export class Array<
 		metadata: ArrayMetadata<Dtype>,
 	) {
 		super(store, path);
+		// Parsed metadata may be shared with other opens (e.g. by a
+		// consolidated store), so keep what callers can reach to ourselves.
 		this.#metadata = {
 			...metadata,
+			shape: metadata.shape.slice(),
+			attributes: structuredClone(metadata.attributes),
+			...(metadata.dimension_names && {
+				dimension_names: metadata.dimension_names.slice(),
+			}),
 			fill_value: ensureCorrectScalar(metadata),
 		};
 		this[CONTEXT_MARKER] = createContext(this, this.#metadata);
@@ -205,13 +291,54 @@ export class Array<
 	async getChunk(
 		chunkCoords: number[],
 		options?: GetOptions,
-		opts?: { useSharedArrayBuffer?: boolean },
+		opts?: {
+			useSharedArrayBuffer?: boolean;
+			decodePool?: DecodePool;
+			/** @internal Reads planned by `get` for a sharded array. */
+			readPlan?: ChunkReadPlan;
+			/**
+			 * @internal The region of `get`'s output this chunk is copied to.
+			 * The codec pipeline decodes into it when it can; the returned
+			 * chunk is then a view of it.
+			 */
+			decodeInto?: Uint8Array;
+			/**
+			 * @internal Return a missing chunk as its fill value broadcast over
+			 * the chunk shape, rather than allocating a whole chunk of it.
+			 */
+			broadcastFill?: boolean;
+			/** Receives spans for the fetch and each codec step. */
+			tracer?: Tracer;
+		},
 	): Promise<Chunk<Dtype>> {
 		if (opts?.useSharedArrayBuffer) {
 			assertSharedArrayBufferAvailable();
 		}
 		let context = this[CONTEXT_MARKER];
-		let maybeBytes = await context.getChunkBytes(chunkCoords, options);
+		let tracer = opts?.tracer;
+		let maybeBytes = await traced(
+			tracer,
+			"zarrita.fetch",
+			{ "zarrita.chunk": chunkCoords.join(",") },
+			async (span) => {
+				let bytes = await (opts?.readPlan?.read(chunkCoords) ??
+					context.getChunkBytes(chunkCoords, options));
+				span?.setAttribute("zarrita.bytes", bytes?.byteLength ?? 0);
+				return bytes;
+			},
+		);
+		if (!maybeBytes && opts?.broadcastFill) {
+			let data = new context.TypedArray(1);
+			// @ts-expect-error: TS can't infer that `fillValue` is union (assumes never) but this is ok
+			data.fill(context.fillValue);
+			let chunk = {
+				data,
+				shape: context.chunkShape,
+				stride: context.chunkShape.map(() => 0),
+			};
+			markFillChunk(chunk);
+			return chunk;
+		}
 		if (!maybeBytes) {
 			let size = context.chunkShape.reduce((a, b) => a * b, 1);
 			let data: TypedArray<Dtype>;
@@ -237,7 +364,25 @@ export class Array<
 				stride: context.getStrides(context.chunkShape),
 			};
 		}
-		return context.codec.decode(maybeBytes);
+		if (opts?.decodePool) {
+			let pool = opts.decodePool;
+			return traced(tracer, "zarrita.decode", { "zarrita.codec": "pool" }, () =>
+				pool.decode(context.chunkMetadata, maybeBytes, {
+					signal: options?.signal,
+				}),
+			);
+		}
+		let chunk = await context.codec.decode(maybeBytes, {
+			useSharedArrayBuffer: opts?.useSharedArrayBuffer,
+			out: opts?.decodeInto,
+			tracer,
+		});
+		// Uncompressed chunks are views of the bytes the store handed out,
+		// which it may still own (e.g. a `Map`).
+		if ("buffer" in chunk.data && chunk.data.buffer === maybeBytes.buffer) {
+			markSharedChunk(chunk);
+		}
+		return chunk;
 	}
 
 	/**
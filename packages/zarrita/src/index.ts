@@ -31,6 +31,14 @@ export { default as FetchStore } from "@zarrita/storage/fetch";
 // core
 export { registry } from "./codecs.js";
 export { create } from "./create.js";
+export {
+	createDecodePool,
+	type DecodePool,
+	type DecodePoolOptions,
+	exposeDecodeWorker,
+	type WorkerLike,
+	type WorkerScopeLike,
+} from "./decode-pool.js";
 export {
 	CodecPipelineError,
 	InvalidMetadataError,
@@ -45,6 +53,19 @@ export {
 	type CacheKeyFor,
 	withByteCaching,
 } from "./extension/caching.js";
+export {
+	type ChunkCache,
+	type ChunkCacheStats,
+	withChunkCaching,
+} from "./extension/chunk-caching.js";
+export {
+	type BuildChunkManifestOptions,
+	buildChunkManifest,
+	type ChunkManifest,
+	type ChunkPresence,
+	withChunkManifest,
+	writeChunkManifest,
+} from "./extension/chunk-manifest.js";
 export type {
 	ConsolidatedFormat,
 	ConsolidatedMetadataOptions,
@@ -65,25 +86,49 @@ export {
 	type FlushReport,
 	withRangeCoalescing,
 } from "./extension/range-coalescing.js";
+export { withWorkerDecoding } from "./extension/worker-decoding.js";
 export { Array, Group, Location, root } from "./hierarchy.js";
+export { batchWrites, type WriteBatch } from "./indexing/batch.js";
+export { getCoordinates, getOrthogonal } from "./indexing/fancy.js";
 // internal exports for @zarrita/ndarray
 export { get as _zarrita_internal_get } from "./indexing/get.js";
+export type { IndexArray } from "./indexing/indexer.js";
+export {
+	type ChunkSelection,
+	type IterChunksOptions,
+	iterChunks,
+} from "./indexing/iter.js";
 export { get, set } from "./indexing/ops.js";
 export { set as _zarrita_internal_set } from "./indexing/set.js";
 export type {
+	ChunkQueue,
 	GetOptions,
 	Indices,
 	Projection,
+	Scheduler,
+	SchedulerStats,
 	SetOptions,
 	Slice,
 } from "./indexing/types.js";
 export {
+	createScheduler,
+	type SchedulerOptions,
 	select,
 	slice,
 	sliceIndices as _zarrita_internal_sliceIndices,
 } from "./indexing/util.js";
 export type * from "./metadata.js";
-export { open } from "./open.js";
+export { open, openAll } from "./open.js";
+export {
+	createTraceRecorder,
+	type RecordedSpan,
+	type SpanSummary,
+	type TraceAttributeValue,
+	type Tracer,
+	type TraceRecorder,
+	type TraceSpan,
+	type TraceSummary,
+} from "./tracing.js";
 export {
 	BoolArray,
 	ByteStringArray,
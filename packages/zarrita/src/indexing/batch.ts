@@ -0,0 +1,342 @@
+import type { AbsolutePath, Mutable } from "@zarrita/storage";
+
+import { InvalidSelectionError } from "../errors.js";
+import { type Array, getContext } from "../hierarchy.js";
+import type { Chunk, DataType, Scalar, TypedArray } from "../metadata.js";
+import type { Tracer } from "../tracing.js";
+import { isSharedChunk, resolveSignal } from "../util.js";
+import { BasicIndexer, type IndexerProjection } from "./indexer.js";
+import { setter } from "./ops.js";
+import { chunksInShard, isTotalSlice, writeBytes } from "./set.js";
+import type { Projection, SetOptions, Slice } from "./types.js";
+import { createQueue } from "./util.js";
+
+/** The decoded data of one chunk with every buffered write applied. */
+type BufferedChunk<D extends DataType> = {
+	chunkCoords: number[];
+	data: Promise<TypedArray<D>>;
+};
+
+function flip(m: IndexerProjection): Projection {
+	return { from: m.to, to: m.from } as Projection;
+}
+
+/**
+ * Buffers {@linkcode WriteBatch.set} calls on one array in memory, merging
+ * them per chunk, and writes each touched chunk once on
+ * {@linkcode WriteBatch.flush}. Create one with {@linkcode batchWrites}.
+ */
+export class WriteBatch<D extends DataType> {
+	#arr: Array<D, Mutable>;
+	#chunks = new Map<string, BufferedChunk<D>>();
+	#flushing: Promise<void> | undefined;
+	/** The `set` calls in progress, which a flush waits for. */
+	#writing = new Set<Promise<void>>();
+
+	constructor(arr: Array<D, Mutable>) {
+		this.#arr = arr;
+	}
+
+	/** The number of chunks holding writes that have not been flushed. */
+	get size(): number {
+		return this.#chunks.size;
+	}
+
+	/**
+	 * Write `value` to `selection`, like `zarr.set`, but into the buffered
+	 * chunks. A chunk that is only partly written is read (and decoded) the
+	 * first time the batch touches it; later writes to it are applied in
+	 * memory.
+	 */
+	async set(
+		selection: (number | Slice | null)[] | null,
+		value: Scalar<D> | Chunk<D>,
+		opts: SetOptions = {},
+	): Promise<void> {
+		while (this.#flushing) {
+			await this.#flushing.catch(() => {});
+		}
+		let writing = this.#set(selection, value, opts);
+		this.#writing.add(writing);
+		try {
+			await writing;
+		} finally {
+			this.#writing.delete(writing);
+		}
+	}
+
+	async #set(
+		selection: (number | Slice | null)[] | null,
+		value: Scalar<D> | Chunk<D>,
+		opts: SetOptions,
+	): Promise<void> {
+		let arr = this.#arr;
+		let context = getContext(arr);
+		let signal = resolveSignal(opts);
+		signal?.throwIfAborted();
+
+		if (arr.shape.length === 0) {
+			if (typeof value === "object") {
+				throw new InvalidSelectionError(
+					"Cannot set a scalar array with a non-scalar value.",
+				);
+			}
+			await this.#update([], true, signal, undefined, (data) => {
+				// @ts-expect-error - Value is a scalar
+				data.fill(value);
+			});
+			return;
+		}
+
+		let indexer = new BasicIndexer({
+			selection,
+			shape: arr.shape,
+			chunkShape: arr.chunks,
+		});
+		let chunkShape = arr.chunks.slice();
+		let chunkStride = context.getStrides(chunkShape);
+		let queue = opts.createQueue?.() ?? createQueue();
+		for (let { chunkCoords, mapping } of indexer) {
+			let chunkSelection = mapping.map((m) => m.from);
+			let total = isTotalSlice(chunkSelection, chunkShape);
+			queue.add(
+				async () => {
+					let write = (data: TypedArray<D>) => {
+						let chunk = setter.prepare(
+							data,
+							chunkShape.slice(),
+							chunkStride.slice(),
+						);
+						if (typeof value === "object") {
+							setter.setFromChunk(chunk, value, mapping.map(flip));
+						} else if (total) {
+							// @ts-expect-error - Value is a scalar
+							data.fill(value);
+						} else {
+							setter.setScalar(chunk, chunkSelection, value);
+						}
+					};
+					await this.#update(chunkCoords, total, signal, opts.tracer, write);
+				},
+				{ chunkCoords },
+			);
+		}
+		await queue.onIdle();
+	}
+
+	/**
+	 * Apply `write` to the buffered data of a chunk, after any writes to it
+	 * still pending. A chunk that is not buffered yet starts out as a fresh
+	 * buffer if `write` replaces all of it, or else from the stored chunk.
+	 */
+	#update(
+		chunkCoords: number[],
+		replaces: boolean,
+		signal: AbortSignal | undefined,
+		tracer: Tracer | undefined,
+		write: (data: TypedArray<D>) => void,
+	): Promise<TypedArray<D>> {
+		let key = getContext(this.#arr).encodeChunkKey(chunkCoords);
+		let entry = this.#chunks.get(key);
+		if (!entry) {
+			let created: BufferedChunk<D> = {
+				chunkCoords,
+				data: replaces
+					? Promise.resolve(this.#allocate())
+					: this.#read(chunkCoords, signal, tracer).catch((err) => {
+							// Let a later write to this chunk try again.
+							if (this.#chunks.get(key) === created) {
+								this.#chunks.delete(key);
+							}
+							throw err;
+						}),
+			};
+			this.#chunks.set(key, created);
+			entry = created;
+		}
+		let previous = entry.data;
+		let next = previous.then((data) => {
+			write(data);
+			return data;
+		});
+		// A failed write leaves the chunk as it was for the writes after it.
+		entry.data = next.catch(() => previous);
+		entry.data.catch(() => {});
+		return next;
+	}
+
+	#allocate(): TypedArray<D> {
+		let size = this.#arr.chunks.reduce((a, b) => a * b, 1);
+		return new (getContext(this.#arr).TypedArray)(size);
+	}
+
+	/**
+	 * Read a stored chunk into memory the batch owns, laid out with the
+	 * array's strides.
+	 */
+	async #read(
+		chunkCoords: number[],
+		signal: AbortSignal | undefined,
+		tracer: Tracer | undefined,
+	): Promise<TypedArray<D>> {
+		let context = getContext(this.#arr);
+		let chunk = await this.#arr.getChunk(chunkCoords, { signal }, { tracer });
+		let stride = context.getStrides(context.chunkShape);
+		if (
+			!isSharedChunk(chunk) &&
+			chunk.stride.every((s, i) => s === stride[i])
+		) {
+			return chunk.data;
+		}
+		let data = this.#allocate();
+		setter.setFromChunk(
+			setter.prepare(data, context.chunkShape.slice(), stride),
+			chunk,
+			chunk.shape.map((n) => ({ from: [0, n, 1], to: [0, n, 1] })),
+		);
+		return data;
+	}
+
+	/**
+	 * Encode every buffered chunk, in parallel, and write each to the store
+	 * once (a whole shard at a time for sharded arrays). Chunks that fail to
+	 * write stay buffered. The flush starts once the `set` calls in progress
+	 * are done, and calls to `set` made meanwhile wait for it to finish.
+	 */
+	async flush(opts: SetOptions = {}): Promise<void> {
+		while (this.#flushing) {
+			await this.#flushing.catch(() => {});
+		}
+		let flushing = this.#flush(opts);
+		this.#flushing = flushing;
+		try {
+			await flushing;
+		} finally {
+			this.#flushing = undefined;
+		}
+	}
+
+	async #flush(opts: SetOptions): Promise<void> {
+		let arr = this.#arr;
+		let context = getContext(arr);
+		let signal = resolveSignal(opts);
+		let tracer = opts.tracer;
+		let queue = opts.createQueue?.() ?? createQueue();
+		let chunkShape = arr.chunks.slice();
+		let chunkStride = context.getStrides(chunkShape);
+		// `set` calls past their wait for `#flushing` may still be adding
+		// writes to the buffered chunks.
+		await Promise.allSettled(this.#writing);
+		let pending = this.#chunks;
+		this.#chunks = new Map();
+
+		let encode = async ({ data }: BufferedChunk<D>) =>
+			context.codec.encode(
+				{ data: await data, shape: chunkShape, stride: chunkStride },
+				{ tracer },
+			);
+		let writes: [
+			keys: string[],
+			chunkCoords: number[],
+			write: () => Promise<void>,
+		][] = [];
+		let shards = context.shards;
+		if (shards) {
+			let gridShape = arr.shape.map((s, i) => Math.ceil(s / chunkShape[i]));
+			let byShard = new Map<AbsolutePath, [string, BufferedChunk<D>][]>();
+			for (let [key, entry] of pending) {
+				let shardPath = shards.resolveShardPath(entry.chunkCoords);
+				let entries = byShard.get(shardPath);
+				if (!entries) {
+					entries = [];
+					byShard.set(shardPath, entries);
+				}
+				entries.push([key, entry]);
+			}
+			for (let [shardPath, entries] of byShard) {
+				let { chunkCoords } = entries[0][1];
+				writes.push([
+					entries.map(([key]) => key),
+					chunkCoords,
+					async () => {
+						// Buffered chunks are complete, so the stored shard is only
+						// needed for the inner chunks the batch did not touch.
+						let chunks =
+							entries.length === chunksInShard(shards, chunkCoords, gridShape)
+								? new globalThis.Array<Uint8Array | undefined>(
+										shards.indexShape.reduce((a, b) => a * b, 1),
+									)
+								: await shards.readChunks(shardPath, { signal });
+						await Promise.all(
+							entries.map(async ([, entry]) => {
+								let i = shards.innerIndex(entry.chunkCoords);
+								chunks[i] = await encode(entry);
+							}),
+						);
+						let shard = await shards.encodeShard(chunks);
+						await writeBytes(arr.store, shardPath, shard, tracer);
+						shards.invalidate(shardPath);
+					},
+				]);
+			}
+		} else {
+			for (let [key, entry] of pending) {
+				writes.push([
+					[key],
+					entry.chunkCoords,
+					async () => {
+						let chunkPath = arr.resolve(key).path;
+						await writeBytes(arr.store, chunkPath, await encode(entry), tracer);
+					},
+				]);
+			}
+		}
+
+		let written = new Set<string>();
+		for (let [keys, chunkCoords, write] of writes) {
+			queue.add(
+				async () => {
+					signal?.throwIfAborted();
+					await write();
+					for (let key of keys) written.add(key);
+				},
+				{ chunkCoords },
+			);
+		}
+		try {
+			await queue.onIdle();
+		} finally {
+			for (let [key, entry] of pending) {
+				if (!written.has(key)) this.#chunks.set(key, entry);
+			}
+		}
+	}
+}
+
+/**
+ * Buffer writes to `arr` so that many small `set`s to the same chunks cost
+ * one read, encode and store write per chunk, rather than one per call.
+ *
+ * Writes are applied to decoded chunks held in memory until
+ * {@linkcode WriteBatch.flush}, which encodes the touched chunks in parallel
+ * and writes each once. Reads of `arr` (`zarr.get`) don't see the buffered
+ * writes until then, and memory grows with the number of chunks touched, so
+ * flush periodically when writing a large region.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * let batch = zarr.batchWrites(arr);
+ * for (let t = 0; t < frames.length; t++) {
+ *   await batch.set([t, null, null], frames[t]);
+ * }
+ * await batch.flush();
+ * ```
+ *
+ * @category Utility
+ */
+export function batchWrites<D extends DataType>(
+	arr: Array<D, Mutable>,
+): WriteBatch<D> {
+	return new WriteBatch(arr);
+}
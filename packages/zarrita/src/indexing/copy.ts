@@ -0,0 +1,380 @@
+import type { Chunk, DataType } from "../metadata.js";
+import type { Projection } from "./types.js";
+
+/**
+ * Elements addressed by the copy kernels: raw bytes (`bytesPerElement` per
+ * element) or a JS array of objects (one slot per element).
+ */
+export type Elements = {
+	data: Uint8Array | unknown[];
+	stride: number[];
+	bytesPerElement: number;
+};
+
+/**
+ * A chunk's elements in a form the copy kernels can address: the raw bytes
+ * of a typed array (including `BoolArray` and the string arrays, which are
+ * copied as plain bytes), or the backing JS array for object data types.
+ *
+ * WARNING: This function is not meant to be used directly and is NOT type-safe.
+ */
+export function compatChunk<D extends DataType>(arr: Chunk<D>): Elements {
+	if (globalThis.Array.isArray(arr.data)) {
+		return { data: arr.data, stride: arr.stride, bytesPerElement: 1 };
+	}
+	return {
+		data: new Uint8Array(
+			arr.data.buffer,
+			arr.data.byteOffset,
+			arr.data.byteLength,
+		),
+		stride: arr.stride,
+		bytesPerElement: arr.data.BYTES_PER_ELEMENT,
+	};
+}
+
+export function indicesLen(start: number, stop: number, step: number) {
+	if (step < 0 && stop < start) {
+		return Math.floor((start - stop - 1) / -step) + 1;
+	}
+	if (start < stop) return Math.floor((stop - start - 1) / step) + 1;
+	return 0;
+}
+
+/** One loop of a copy: `count` iterations, each advancing both sides. */
+type CopyLoop = { count: number; dstStep: number; srcStep: number };
+
+/**
+ * A strided copy flattened to loops (outermost first) over element offsets.
+ * Integer-indexed and length-1 dimensions are folded into the start offsets,
+ * and dimensions that are contiguous with their inner neighbour on both sides
+ * are merged, so e.g. copying a whole C-order chunk is a single loop.
+ */
+export type CopyPlan = {
+	dstOffset: number;
+	srcOffset: number;
+	loops: CopyLoop[];
+};
+
+/** Compile a copy plan, or `undefined` if the selection is empty. */
+export function compileCopyPlan(
+	projections: Projection[],
+	dstStride: number[],
+	srcStride: number[],
+): CopyPlan | undefined {
+	let dstOffset = 0;
+	let srcOffset = 0;
+	let loops: CopyLoop[] = [];
+	let d = 0;
+	let s = 0;
+	for (let proj of projections) {
+		if (proj.from === null) {
+			dstOffset += dstStride[d++] * proj.to;
+			continue;
+		}
+		if (proj.to === null) {
+			srcOffset += srcStride[s++] * proj.from;
+			continue;
+		}
+		let [from, to, step] = proj.to;
+		let [sfrom, , sstep] = proj.from;
+		let count = indicesLen(from, to, step);
+		if (count === 0) return undefined;
+		dstOffset += dstStride[d] * from;
+		srcOffset += srcStride[s] * sfrom;
+		if (count > 1) {
+			loops.push({
+				count,
+				dstStep: dstStride[d] * step,
+				srcStep: srcStride[s] * sstep,
+			});
+		}
+		d++;
+		s++;
+	}
+	// Merge from the inside out: an outer loop that steps exactly over the
+	// extent of the inner one (on both sides) extends it.
+	let merged: CopyLoop[] = [];
+	for (let i = loops.length - 1; i >= 0; i--) {
+		let loop = loops[i];
+		let inner = merged.at(-1);
+		if (
+			inner &&
+			loop.dstStep === inner.dstStep * inner.count &&
+			loop.srcStep === inner.srcStep * inner.count
+		) {
+			inner.count *= loop.count;
+		} else {
+			merged.push({ ...loop });
+		}
+	}
+	return { dstOffset, srcOffset, loops: merged.reverse() };
+}
+
+/**
+ * Plan a copy of every element between two layouts of the same shape, e.g.
+ * from a chunk in one memory order into a buffer in another.
+ */
+export function compileLayoutCopyPlan(
+	shape: number[],
+	dstStride: number[],
+	srcStride: number[],
+): CopyPlan | undefined {
+	let projections = shape.map(
+		(n): Projection => ({ from: [0, n, 1], to: [0, n, 1] }),
+	);
+	return compileCopyPlan(projections, dstStride, srcStride);
+}
+
+type Units = Uint8Array | Uint16Array | Uint32Array;
+
+/**
+ * View both sides in the widest unit (4, 2 or 1 bytes) that evenly divides
+ * the element size and the alignment of both buffers, so that elements are
+ * moved with a few integer loads/stores rather than byte by byte. (Integer
+ * units, because float views can canonicalize NaN payloads.)
+ */
+function unitViews(
+	dst: Uint8Array,
+	src: Uint8Array,
+	bytesPerElement: number,
+): [dst: Units, src: Units, unitsPerElement: number] {
+	for (let [Unit, size] of [
+		[Uint32Array, 4],
+		[Uint16Array, 2],
+	] as const) {
+		if (
+			bytesPerElement % size === 0 &&
+			dst.byteOffset % size === 0 &&
+			src.byteOffset % size === 0
+		) {
+			return [
+				new Unit(dst.buffer, dst.byteOffset, dst.byteLength / size),
+				new Unit(src.buffer, src.byteOffset, src.byteLength / size),
+				bytesPerElement / size,
+			];
+		}
+	}
+	return [dst, src, bytesPerElement];
+}
+
+// Rows at least this many units long are copied with `TypedArray.set`,
+// shorter ones with a plain loop (which avoids creating a subarray).
+const MIN_SET_UNITS = 16;
+
+// Edge length (in elements) of the square tiles used for transposing copies,
+// small enough that a tile of each side stays in L1 for 8-byte elements.
+const TILE = 32;
+
+/**
+ * The loop to tile together with the innermost one, if the copy transposes:
+ * the innermost loop is contiguous on the destination only, and the source
+ * is contiguous along some outer loop. Walking both in square tiles keeps
+ * the strided side's cache lines hot across consecutive rows.
+ */
+function findTransposedLoop(loops: CopyLoop[]): number {
+	let inner = loops.at(-1);
+	if (!inner || Math.abs(inner.srcStep) === 1 || inner.count < TILE) {
+		return -1;
+	}
+	for (let i = loops.length - 2; i >= 0; i--) {
+		if (Math.abs(loops[i].srcStep) === 1 && loops[i].count >= TILE) {
+			return i;
+		}
+	}
+	return -1;
+}
+
+/** Reverse the order of `count` elements of `k` units each, in place. */
+function reverseElements(
+	units: Units,
+	start: number,
+	count: number,
+	k: number,
+) {
+	if (k === 1) {
+		units.subarray(start, start + count).reverse();
+		return;
+	}
+	let lo = start;
+	let hi = start + (count - 1) * k;
+	for (; lo < hi; lo += k, hi -= k) {
+		for (let j = 0; j < k; j++) {
+			let unit = units[lo + j];
+			units[lo + j] = units[hi + j];
+			units[hi + j] = unit;
+		}
+	}
+}
+
+/** Execute a copy plan iteratively (no recursion or per-level allocation). */
+export function runCopy(plan: CopyPlan, dest: Elements, src: Elements) {
+	let dstUnits: ArrayLike<unknown> & Record<number, unknown> = dest.data;
+	let srcUnits: ArrayLike<unknown> = src.data;
+	let k = 1;
+	if (dest.data instanceof Uint8Array && src.data instanceof Uint8Array) {
+		[dstUnits, srcUnits, k] = unitViews(
+			dest.data,
+			src.data,
+			dest.bytesPerElement,
+		);
+	}
+	let typed = ArrayBuffer.isView(dstUnits);
+	let loops = plan.loops;
+	let inner = loops.at(-1) ?? { count: 1, dstStep: 1, srcStep: 1 };
+	let tiled = findTransposedLoop(loops);
+	let across = tiled === -1 ? undefined : loops[tiled];
+	let outer = loops.filter((_, i) => i !== tiled && i !== loops.length - 1);
+	let counters = outer.map(() => 0);
+	let dstep = inner.dstStep * k;
+	let sstep = inner.srcStep * k;
+	let d = plan.dstOffset;
+	let s = plan.srcOffset;
+	for (;;) {
+		// Innermost loop(s), specialised by shape.
+		if (across) {
+			for (let a0 = 0; a0 < across.count; a0 += TILE) {
+				let a1 = Math.min(a0 + TILE, across.count);
+				for (let b0 = 0; b0 < inner.count; b0 += TILE) {
+					let n = Math.min(TILE, inner.count - b0);
+					for (let a = a0; a < a1; a++) {
+						let di = (d + a * across.dstStep + b0 * inner.dstStep) * k;
+						let si = (s + a * across.srcStep + b0 * inner.srcStep) * k;
+						if (k === 1) {
+							for (let b = 0; b < n; b++) {
+								dstUnits[di] = srcUnits[si];
+								di += dstep;
+								si += sstep;
+							}
+							continue;
+						}
+						for (let b = 0; b < n; b++) {
+							for (let j = 0; j < k; j++) {
+								dstUnits[di + j] = srcUnits[si + j];
+							}
+							di += dstep;
+							si += sstep;
+						}
+					}
+				}
+			}
+		} else if (inner.dstStep === 1 && inner.srcStep === 1) {
+			let n = inner.count * k;
+			if (typed && n >= MIN_SET_UNITS) {
+				(dstUnits as Uint8Array).set(
+					(srcUnits as Uint8Array).subarray(s * k, s * k + n),
+					d * k,
+				);
+			} else {
+				for (let i = 0; i < n; i++) {
+					dstUnits[d * k + i] = srcUnits[s * k + i];
+				}
+			}
+		} else if (
+			typed &&
+			inner.count * k >= MIN_SET_UNITS &&
+			inner.dstStep * inner.srcStep === -1
+		) {
+			// A reversed run (negative step on either side): copy the block
+			// as is, then reverse its elements in place.
+			let n = inner.count * k;
+			let first = inner.dstStep === 1 ? d : d - inner.count + 1;
+			let from = inner.srcStep === 1 ? s : s - inner.count + 1;
+			(dstUnits as Uint8Array).set(
+				(srcUnits as Uint8Array).subarray(from * k, from * k + n),
+				first * k,
+			);
+			reverseElements(dstUnits as Units, first * k, inner.count, k);
+		} else if (inner.dstStep === 1 && inner.srcStep === 0 && k === 1) {
+			(dstUnits as Uint8Array).fill(
+				srcUnits[s] as number,
+				d,
+				d + inner.count,
+			);
+		} else {
+			let di = d * k;
+			let si = s * k;
+			for (let i = 0; i < inner.count; i++) {
+				for (let j = 0; j < k; j++) {
+					dstUnits[di + j] = srcUnits[si + j];
+				}
+				di += dstep;
+				si += sstep;
+			}
+		}
+		// Advance the remaining loops like an odometer.
+		let j = outer.length - 1;
+		for (; j >= 0; j--) {
+			let loop = outer[j];
+			d += loop.dstStep;
+			s += loop.srcStep;
+			if (++counters[j] < loop.count) break;
+			d -= loop.dstStep * loop.count;
+			s -= loop.srcStep * loop.count;
+			counters[j] = 0;
+		}
+		if (j < 0) return;
+	}
+}
+
+/**
+ * Copy the elements at every combination of per-dimension element offsets
+ * (the last dimension varying fastest): the element at the sum of one entry
+ * of each `srcOffsets[i]` goes to the sum of the matching `dstOffsets[i]`.
+ * With a single dimension this is a plain gather of individual points.
+ */
+export function runGather(
+	dstOffsets: Float64Array[],
+	srcOffsets: Float64Array[],
+	dest: Elements,
+	src: Elements,
+) {
+	if (dstOffsets.length === 0) {
+		// Zero-dimensional: a single element.
+		dstOffsets = [Float64Array.of(0)];
+		srcOffsets = [Float64Array.of(0)];
+	}
+	if (dstOffsets.some((offsets) => offsets.length === 0)) return;
+	let dstUnits: ArrayLike<unknown> & Record<number, unknown> = dest.data;
+	let srcUnits: ArrayLike<unknown> = src.data;
+	let k = 1;
+	if (dest.data instanceof Uint8Array && src.data instanceof Uint8Array) {
+		[dstUnits, srcUnits, k] = unitViews(
+			dest.data,
+			src.data,
+			dest.bytesPerElement,
+		);
+	}
+	let last = dstOffsets.length - 1;
+	let innerDst = dstOffsets[last];
+	let innerSrc = srcOffsets[last];
+	let counters = dstOffsets.map(() => 0);
+	for (;;) {
+		let d = 0;
+		let s = 0;
+		for (let i = 0; i < last; i++) {
+			d += dstOffsets[i][counters[i]];
+			s += srcOffsets[i][counters[i]];
+		}
+		if (k === 1) {
+			for (let j = 0; j < innerDst.length; j++) {
+				dstUnits[d + innerDst[j]] = srcUnits[s + innerSrc[j]];
+			}
+		} else {
+			for (let j = 0; j < innerDst.length; j++) {
+				let di = (d + innerDst[j]) * k;
+				let si = (s + innerSrc[j]) * k;
+				for (let u = 0; u < k; u++) {
+					dstUnits[di + u] = srcUnits[si + u];
+				}
+			}
+		}
+		// Advance the outer dimensions like an odometer.
+		let i = last - 1;
+		for (; i >= 0; i--) {
+			if (++counters[i] < dstOffsets[i].length) break;
+			counters[i] = 0;
+		}
+		if (i < 0) return;
+	}
+}
@@ -0,0 +1,262 @@
+import type { Readable } from "@zarrita/storage";
+
+import { InvalidSelectionError } from "../errors.js";
+import { type Array, getContext } from "../hierarchy.js";
+import type { Chunk, DataType } from "../metadata.js";
+import { startSpan, tracedChunkTask } from "../tracing.js";
+import { assertSharedArrayBufferAvailable, resolveSignal } from "../util.js";
+import { compatChunk, type Elements, runGather } from "./copy.js";
+import { allocate } from "./get.js";
+import {
+	CoordinateIndexer,
+	type IndexArray,
+	isIndexArray,
+	OrthogonalIndexer,
+} from "./indexer.js";
+import { get } from "./ops.js";
+import type { GetOptions, Slice } from "./types.js";
+import { createQueue } from "./util.js";
+
+/** One selected chunk and how to copy its points into the output. */
+type Gather<D extends DataType> = {
+	chunkCoords: number[];
+	copy(out: Elements, chunk: Chunk<D>): void;
+};
+
+/**
+ * Fetch each chunk once (through `Array.getChunk`, honouring the queue,
+ * signal and read planning of `get`) and gather its points into `out`.
+ */
+async function gatherChunks<D extends DataType, Store extends Readable>(
+	arr: Array<D, Store>,
+	gathers: Gather<D>[],
+	out: Chunk<D>,
+	opts: GetOptions,
+) {
+	let signal = resolveSignal(opts);
+	let tracer = opts.tracer;
+	let readPlan = getContext(arr).planChunkReads?.(
+		gathers.map((g) => g.chunkCoords),
+		{ signal },
+	);
+	let view = compatChunk(out);
+	let queue = opts.createQueue?.() ?? createQueue();
+	for (let { chunkCoords, copy } of gathers) {
+		queue.add(
+			tracedChunkTask(tracer, chunkCoords, async () => {
+				signal?.throwIfAborted();
+				let chunk = await arr.getChunk(
+					chunkCoords,
+					{ signal },
+					{
+						useSharedArrayBuffer: opts.useSharedArrayBuffer,
+						decodePool: opts.decodePool,
+						readPlan,
+						tracer,
+					},
+				);
+				let span = startSpan(tracer, "zarrita.copy", {
+					"zarrita.chunk": chunkCoords.join(","),
+				});
+				copy(view, chunk);
+				span?.end();
+			}),
+			{ chunkCoords },
+		);
+	}
+	await queue.onIdle();
+}
+
+/**
+ * Whether an orthogonal selection is a basic one (no index arrays) that `get`
+ * returns as an array, rather than as a scalar.
+ */
+function isBasicSelection(
+	selection: (null | number | Slice | IndexArray)[] | null,
+	shape: readonly number[],
+): selection is (null | number | Slice)[] | null {
+	if (selection?.some(isIndexArray)) return false;
+	let ints = selection?.filter((s) => typeof s === "number").length ?? 0;
+	return ints < shape.length;
+}
+
+/** Scale chunk positions to element offsets along one dimension. */
+function scale(positions: Float64Array, stride: number): Float64Array {
+	return positions.map((p) => p * stride);
+}
+
+/**
+ * Read the outer product of per-dimension selections, like NumPy's
+ * `arr[np.ix_(...)]` (zarr-python's `get_orthogonal_selection`).
+ *
+ * Each entry is `null` (everything), an integer (the dimension is dropped),
+ * a {@linkcode slice}, an array of integer indices (in any order, repeats
+ * allowed, negative values count from the end) or a `boolean[]` mask as long
+ * as the dimension. Every chunk touched is fetched and decoded once.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * // Three stations, every other time step: shape [3, n / 2]
+ * let series = await zarr.getOrthogonal(arr, [
+ *   [17, 4_212, 88_030],
+ *   zarr.slice(null, null, 2),
+ * ]);
+ * ```
+ *
+ * @category Utility
+ */
+export async function getOrthogonal<
+	D extends DataType,
+	Store extends Readable,
+>(
+	arr: Array<D, Store>,
+	selection: (null | number | Slice | IndexArray)[] | null = null,
+	opts: GetOptions = {},
+): Promise<Chunk<D>> {
+	if (isBasicSelection(selection, arr.shape)) {
+		// Nothing to gather; the strided copy of `get` is faster.
+		return get(arr, selection, opts);
+	}
+	if (opts.useSharedArrayBuffer) {
+		assertSharedArrayBufferAvailable();
+	}
+	let context = getContext(arr);
+	let indexer = new OrthogonalIndexer({
+		selection,
+		shape: arr.shape,
+		chunkShape: arr.chunks,
+	});
+	let shape = indexer.shape;
+	let stride = context.getStrides(shape);
+	let size = shape.reduce((a, b) => a * b, 1);
+	let out: Chunk<D> = {
+		data: allocate(context.TypedArray, size, opts.useSharedArrayBuffer),
+		shape,
+		stride,
+	};
+	let gathers: Gather<D>[] = [];
+	for (let { chunkCoords, chunkSel, outSel } of indexer) {
+		gathers.push({
+			chunkCoords,
+			copy(view, chunk) {
+				let dstOffsets: Float64Array[] = [];
+				let outDim = 0;
+				for (let sel of outSel) {
+					dstOffsets.push(
+						sel ? scale(sel, stride[outDim++]) : new Float64Array(1),
+					);
+				}
+				let srcOffsets = chunkSel.map((sel, d) =>
+					scale(sel, chunk.stride[d]),
+				);
+				runGather(dstOffsets, srcOffsets, view, compatChunk(chunk));
+			},
+		});
+	}
+	await gatherChunks(arr, gathers, out, opts);
+	return out;
+}
+
+/**
+ * Read individual points, like NumPy's `arr[xs, ys]` (zarr-python's
+ * `get_coordinate_selection` and `get_mask_selection`).
+ *
+ * Pass one array of integer indices per dimension (all the same length), or a
+ * boolean mask with the same shape as the array (e.g. the result of `zarr.get`
+ * on a `bool` array). The result is one-dimensional with one element per
+ * point, in the order given (C order for a mask). Points are grouped by
+ * chunk, so each chunk is fetched and decoded once however many points it
+ * holds.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * // Values at (0, 5), (10, 3) and (200, 1)
+ * let values = await zarr.getCoordinates(arr, [
+ *   [0, 10, 200],
+ *   [5, 3, 1],
+ * ]);
+ * ```
+ *
+ * @category Utility
+ */
+export async function getCoordinates<
+	D extends DataType,
+	Store extends Readable,
+>(
+	arr: Array<D, Store>,
+	selection: ArrayLike<number>[] | Chunk<"bool">,
+	opts: GetOptions = {},
+): Promise<Chunk<D>> {
+	if (opts.useSharedArrayBuffer) {
+		assertSharedArrayBufferAvailable();
+	}
+	let context = getContext(arr);
+	let indexer = new CoordinateIndexer({
+		selection:
+			"data" in selection ? maskCoordinates(selection, arr.shape) : selection,
+		shape: arr.shape,
+		chunkShape: arr.chunks,
+	});
+	let out: Chunk<D> = {
+		data: allocate(
+			context.TypedArray,
+			indexer.shape[0],
+			opts.useSharedArrayBuffer,
+		),
+		shape: indexer.shape,
+		stride: [1],
+	};
+	let gathers: Gather<D>[] = [];
+	for (let { chunkCoords, chunkSel, outSel } of indexer) {
+		gathers.push({
+			chunkCoords,
+			copy(view, chunk) {
+				let srcOffsets = new Float64Array(outSel.length);
+				for (let d = 0; d < chunkSel.length; d++) {
+					let positions = chunkSel[d];
+					let stride = chunk.stride[d];
+					for (let i = 0; i < positions.length; i++) {
+						srcOffsets[i] += positions[i] * stride;
+					}
+				}
+				runGather([outSel], [srcOffsets], view, compatChunk(chunk));
+			},
+		});
+	}
+	await gatherChunks(arr, gathers, out, opts);
+	return out;
+}
+
+/** The coordinates of the `true` elements of a mask, in C order. */
+function maskCoordinates(
+	mask: Chunk<"bool">,
+	shape: readonly number[],
+): Float64Array[] {
+	if (
+		mask.shape.length !== shape.length ||
+		mask.shape.some((n, i) => n !== shape[i])
+	) {
+		throw new InvalidSelectionError(
+			`mask shape [${mask.shape}] does not match array shape [${shape}]`,
+		);
+	}
+	let size = shape.reduce((a, b) => a * b, 1);
+	let index = shape.map(() => 0);
+	let points: number[][] = shape.map(() => []);
+	for (let n = 0; n < size; n++) {
+		let offset = 0;
+		for (let d = 0; d < index.length; d++) {
+			offset += index[d] * mask.stride[d];
+		}
+		if (mask.data.get(offset)) {
+			for (let d = 0; d < index.length; d++) points[d].push(index[d]);
+		}
+		for (let d = index.length - 1; d >= 0; d--) {
+			if (++index[d] < shape[d]) break;
+			index[d] = 0;
+		}
+	}
+	return points.map((p) => Float64Array.from(p));
+}
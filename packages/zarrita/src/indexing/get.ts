@@ -1,16 +1,27 @@
 import type { Readable } from "@zarrita/storage";
 
 import { type Array, getContext } from "../hierarchy.js";
-import type { Chunk, DataType, Scalar, TypedArray } from "../metadata.js";
+import type {
+	Chunk,
+	DataType,
+	Scalar,
+	TypedArray,
+	TypedArrayConstructor,
+} from "../metadata.js";
+import { startSpan, traced, tracedChunkTask } from "../tracing.js";
 import {
 	assertSharedArrayBufferAvailable,
 	createBuffer,
+	getStrides,
+	isFillChunk,
+	isSharedChunk,
 	resolveSignal,
 } from "../util.js";
 import { BasicIndexer } from "./indexer.js";
 import type {
 	GetOptions,
 	Prepare,
+	Projection,
 	SetFromChunk,
 	SetScalar,
 	Slice,
@@ -24,6 +35,104 @@ function unwrap<D extends DataType>(
 	return ("get" in arr ? arr.get(idx) : arr[idx]) as Scalar<D>;
 }
 
+function arraysEqual(a: number[], b: number[]): boolean {
+	return a.length === b.length && a.every((x, i) => x === b[i]);
+}
+
+/**
+ * Where a chunk starts in the output (in elements) if it is copied whole and
+ * lands in one contiguous run of a C-order output; otherwise `undefined`.
+ */
+function wholeChunkOffset(
+	mapping: Projection[],
+	chunkShape: number[],
+	outShape: number[],
+): number | undefined {
+	let offset = 0;
+	let stride = 1;
+	// Walking outwards, dimensions must span the whole output until the first
+	// one that doesn't; every dimension beyond that must have extent 1.
+	let spansOutput = true;
+	for (let i = mapping.length - 1; i >= 0; i--) {
+		let { from, to } = mapping[i];
+		if (from === null || to === null || typeof from === "number") {
+			return undefined;
+		}
+		if (from[0] !== 0 || from[1] !== chunkShape[i] || from[2] !== 1) {
+			return undefined;
+		}
+		if (to[2] !== 1 || (!spansOutput && chunkShape[i] !== 1)) {
+			return undefined;
+		}
+		offset += to[0] * stride;
+		spansOutput &&= chunkShape[i] === outShape[i];
+		stride *= outShape[i];
+	}
+	return offset;
+}
+
+/** Whether `data` is exactly the memory of `view`. */
+function isViewOf(data: TypedArray<DataType>, view: Uint8Array): boolean {
+	return (
+		"buffer" in data &&
+		data.buffer === view.buffer &&
+		data.byteOffset === view.byteOffset &&
+		data.byteLength === view.byteLength
+	);
+}
+
+/** Whether every byte of `data` is zero, as in a newly allocated output. */
+function isZeroBytes(data: TypedArray<DataType>): boolean {
+	if (!("buffer" in data)) {
+		return false;
+	}
+	let bytes = new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+	return bytes.every((b) => b === 0);
+}
+
+/**
+ * Whether a decoded chunk can be handed to the caller as the result of `get`:
+ * laid out like the output, owned by nobody else, and (for buffer-backed
+ * types) spanning its whole buffer, so no unrelated bytes are kept alive.
+ */
+function isAdoptable(
+	chunk: Chunk<DataType>,
+	stride: number[],
+	useSharedArrayBuffer?: boolean,
+): boolean {
+	if (!arraysEqual(chunk.stride, stride) || isSharedChunk(chunk)) {
+		return false;
+	}
+	let data = chunk.data;
+	if (!("buffer" in data)) {
+		return true;
+	}
+	if (useSharedArrayBuffer && !(data.buffer instanceof SharedArrayBuffer)) {
+		return false;
+	}
+	return data.byteOffset === 0 && data.byteLength === data.buffer.byteLength;
+}
+
+/** Allocate the data of a selection's output, in shared memory if asked. */
+export function allocate<D extends DataType>(
+	TypedArray: TypedArrayConstructor<D>,
+	size: number,
+	useSharedArrayBuffer?: boolean,
+): TypedArray<D> {
+	if (!useSharedArrayBuffer) {
+		return new TypedArray(size);
+	}
+	let sample = new TypedArray(0);
+	if (!("BYTES_PER_ELEMENT" in sample)) {
+		console.warn(
+			"zarrita: useSharedArrayBuffer is not supported for non-buffer-backed data types.",
+		);
+		return new TypedArray(size);
+	}
+	let buffer = createBuffer(size * sample.BYTES_PER_ELEMENT, true);
+	return new TypedArray(buffer, 0, size);
+}
+
 export async function get<
 	D extends DataType,
 	Store extends Readable,
@@ -40,12 +149,35 @@ export async function get<
 	},
 ): Promise<
 	null extends Sel[number] ? Arr : Slice extends Sel[number] ? Arr : Scalar<D>
+> {
+	return traced(opts.tracer, "zarrita.get", { "zarrita.path": arr.path }, () =>
+		getSelection(arr, selection, opts, setter),
+	);
+}
+
+async function getSelection<
+	D extends DataType,
+	Store extends Readable,
+	Arr extends Chunk<D>,
+	Sel extends (null | Slice | number)[],
+>(
+	arr: Array<D, Store>,
+	selection: null | Sel,
+	opts: GetOptions,
+	setter: {
+		prepare: Prepare<D, Arr>;
+		setScalar: SetScalar<D, Arr>;
+		setFromChunk: SetFromChunk<D, Arr>;
+	},
+): Promise<
+	null extends Sel[number] ? Arr : Slice extends Sel[number] ? Arr : Scalar<D>
 > {
 	if (opts.useSharedArrayBuffer) {
 		assertSharedArrayBufferAvailable();
 	}
 
 	let signal = resolveSignal(opts);
+	let tracer = opts.tracer;
 	let context = getContext(arr);
 	let indexer = new BasicIndexer({
 		selection,
@@ -59,46 +191,119 @@ export async function get<
 		let { data } = await arr.getChunk(
 			[],
 			{ signal },
-			{ useSharedArrayBuffer: opts.useSharedArrayBuffer },
+			{
+				useSharedArrayBuffer: opts.useSharedArrayBuffer,
+				decodePool: opts.decodePool,
+				tracer,
+			},
 		);
 		// @ts-expect-error - TS can't narrow this conditional type
 		return unwrap(data, 0);
 	}
 
 	let size = indexer.shape.reduce((a, b) => a * b, 1);
-	let data: TypedArray<D>;
-	if (opts.useSharedArrayBuffer) {
-		let sample = new context.TypedArray(0);
-		if (!("BYTES_PER_ELEMENT" in sample)) {
-			console.warn(
-				"zarrita: useSharedArrayBuffer is not supported for non-buffer-backed data types.",
-			);
-			data = new context.TypedArray(size);
-		} else {
-			let buffer = createBuffer(size * sample.BYTES_PER_ELEMENT, true);
-			data = new context.TypedArray(buffer, 0, size);
+	let projections = [...indexer];
+	let readPlan = context.planChunkReads?.(
+		projections.map((p) => p.chunkCoords),
+		{ signal },
+	);
+	let read = (chunkCoords: number[], decodeInto?: Uint8Array) =>
+		arr.getChunk(
+			chunkCoords,
+			{ signal },
+			{
+				useSharedArrayBuffer: opts.useSharedArrayBuffer,
+				decodePool: opts.decodePool,
+				readPlan,
+				decodeInto,
+				broadcastFill: true,
+				tracer,
+			},
+		);
+
+	let stride = context.getStrides(indexer.shape);
+	let chunkSize = arr.chunks.reduce((a, b) => a * b, 1);
+
+	// A selection of exactly one whole chunk can return the decoded chunk
+	// itself, provided nothing else holds on to its data.
+	let prefetched: Chunk<D> | undefined;
+	if (
+		projections.length === 1 &&
+		size === chunkSize &&
+		wholeChunkOffset(projections[0].mapping, arr.chunks, indexer.shape) === 0
+	) {
+		signal?.throwIfAborted();
+		prefetched = await read(projections[0].chunkCoords);
+		if (isAdoptable(prefetched, stride, opts.useSharedArrayBuffer)) {
+			// @ts-expect-error - TS can't narrow this conditional type
+			return setter.prepare(prefetched.data, indexer.shape, stride);
 		}
-	} else {
-		data = new context.TypedArray(size);
 	}
-	let out = setter.prepare(
-		data,
-		indexer.shape,
-		context.getStrides(indexer.shape),
-	);
+
+	let data = allocate(context.TypedArray, size, opts.useSharedArrayBuffer);
+	let out = setter.prepare(data, indexer.shape, stride);
+
+	// Whole chunks that land in one contiguous run of a C-order output are
+	// decoded straight into it, which makes the copy below unnecessary.
+	let outBytes: Uint8Array | undefined;
+	let bytesPerElement = 0;
+	if (
+		"BYTES_PER_ELEMENT" in data &&
+		arraysEqual(stride, getStrides(indexer.shape, "C"))
+	) {
+		outBytes = new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+		bytesPerElement = data.BYTES_PER_ELEMENT;
+	}
+	let chunkStride = getStrides(arr.chunks, "C");
+	// Whether missing chunks' fill value is what the new output holds anyway.
+	let fillIsZero: boolean | undefined;
 
 	let queue = opts.createQueue?.() ?? createQueue();
-	for (const { chunkCoords, mapping } of indexer) {
-		queue.add(async () => {
-			signal?.throwIfAborted();
-			let { data, shape, stride } = await arr.getChunk(
-				chunkCoords,
-				{ signal },
-				{ useSharedArrayBuffer: opts.useSharedArrayBuffer },
-			);
-			let chunk = setter.prepare(data, shape, stride);
-			setter.setFromChunk(out, chunk, mapping);
-		});
+	for (const { chunkCoords, mapping } of projections) {
+		let offset = outBytes
+			? wholeChunkOffset(mapping, arr.chunks, indexer.shape)
+			: undefined;
+		let decodeInto =
+			offset === undefined
+				? undefined
+				: outBytes?.subarray(
+						offset * bytesPerElement,
+						(offset + chunkSize) * bytesPerElement,
+					);
+		queue.add(
+			tracedChunkTask(tracer, chunkCoords, async () => {
+				signal?.throwIfAborted();
+				let fetched = prefetched ?? (await read(chunkCoords, decodeInto));
+				let { data, shape, stride } = fetched;
+				if (isFillChunk(fetched)) {
+					fillIsZero ??= isZeroBytes(data);
+					if (fillIsZero) {
+						return;
+					}
+					let fill = startSpan(tracer, "zarrita.fill", {
+						"zarrita.chunk": chunkCoords.join(","),
+					});
+					let region = mapping.flatMap(({ to }) => (to === null ? [] : [to]));
+					setter.setScalar(out, region, unwrap(data, 0));
+					fill?.end();
+					return;
+				}
+				if (
+					decodeInto &&
+					isViewOf(data, decodeInto) &&
+					arraysEqual(stride, chunkStride)
+				) {
+					return;
+				}
+				let chunk = setter.prepare(data, shape, stride);
+				let copy = startSpan(tracer, "zarrita.copy", {
+					"zarrita.chunk": chunkCoords.join(","),
+				});
+				setter.setFromChunk(out, chunk, mapping);
+				copy?.end();
+			}),
+			{ chunkCoords },
+		);
 	}
 
 	await queue.onIdle();
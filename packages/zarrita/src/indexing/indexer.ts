@@ -1,9 +1,10 @@
 import { InvalidSelectionError } from "../errors.js";
+import { indicesLen } from "./copy.js";
 import type { Indices, Slice } from "./types.js";
 import { product, range, slice, sliceIndices } from "./util.js";
 
 function errTooManyIndices(
-	selection: (number | Slice)[],
+	selection: readonly unknown[],
 	shape: readonly number[],
 ) {
 	throw new InvalidSelectionError(
@@ -17,12 +18,8 @@ function errBoundscheck(dimLen: number) {
 	);
 }
 
-function errNegativeStep() {
-	throw new InvalidSelectionError("only slices with step >= 1 are supported");
-}
-
 function checkSelectionLength(
-	selection: (number | Slice)[],
+	selection: readonly unknown[],
 	shape: readonly number[],
 ) {
 	if (selection.length > shape.length) {
@@ -107,7 +104,6 @@ class SliceDimIndexer {
 		this.start = start;
 		this.stop = stop;
 		this.step = step;
-		if (this.step < 1) errNegativeStep();
 		// store properties
 		this.dimLen = dimLen;
 		this.dimChunkLen = dimChunkLen;
@@ -116,6 +112,10 @@ class SliceDimIndexer {
 	}
 
 	*[Symbol.iterator](): IterableIterator<SliceChunkDimProjection> {
+		if (this.step < 0) {
+			yield* this.#reversed();
+			return;
+		}
 		// figure out the range of chunks we need to visit
 		const dimChunkIx_from = Math.floor(this.start / this.dimChunkLen);
 		const dimChunkIx_to = Math.ceil(this.stop / this.dimChunkLen);
@@ -163,6 +163,51 @@ class SliceDimIndexer {
 			yield { dimChunkIx, dimChunkSel, dimOutSel };
 		}
 	}
+
+	/**
+	 * Chunks visited by a negative-step slice, from the last chunk down. Each
+	 * chunk selection keeps the negative step and maps onto an ascending run
+	 * of the output, so the copy reverses as it goes.
+	 */
+	*#reversed(): IterableIterator<SliceChunkDimProjection> {
+		if (this.nitems === 0) return;
+		const step = -this.step;
+		// lowest index selected
+		const last = this.start - (this.nitems - 1) * step;
+		const dimChunkIx_from = Math.floor(this.start / this.dimChunkLen);
+		const dimChunkIx_to = Math.floor(last / this.dimChunkLen);
+		for (
+			let dimChunkIx = dimChunkIx_from;
+			dimChunkIx >= dimChunkIx_to;
+			dimChunkIx--
+		) {
+			const dimOffset = dimChunkIx * this.dimChunkLen;
+			const dimLimit = Math.min(this.dimLen, dimOffset + this.dimChunkLen);
+			// number of items selected in the chunks above this one
+			const dimOutOffset =
+				this.start < dimLimit
+					? 0
+					: Math.ceil((this.start - dimLimit + 1) / step);
+			const first = this.start - dimOutOffset * step;
+			const dimChunkNitems =
+				Math.floor((first - Math.max(dimOffset, last)) / step) + 1;
+			// a step longer than the chunk can skip it entirely
+			if (dimChunkNitems <= 0) continue;
+			const dimChunkSelStart = first - dimOffset;
+			// stop just past the last item, so it is never below -1
+			const dimChunkSel: Indices = [
+				dimChunkSelStart,
+				dimChunkSelStart - (dimChunkNitems - 1) * step - 1,
+				this.step,
+			];
+			const dimOutSel: Indices = [
+				dimOutOffset,
+				dimOutOffset + dimChunkNitems,
+				1,
+			];
+			yield { dimChunkIx, dimChunkSel, dimOutSel };
+		}
+	}
 }
 
 export function normalizeSelection(
@@ -192,7 +237,7 @@ export type IndexerProjection =
 			to: Indices;
 	  };
 
-interface ChunkProjection {
+export interface ChunkProjection {
 	chunkCoords: number[];
 	mapping: IndexerProjection[];
 }
@@ -231,3 +276,227 @@ export class BasicIndexer {
 		}
 	}
 }
+
+/**
+ * Integer indices along one dimension (negative values count from the end),
+ * or a boolean mask as long as the dimension.
+ */
+export type IndexArray = ArrayLike<number> | ArrayLike<boolean>;
+
+export function isIndexArray(dimSel: unknown): dimSel is IndexArray {
+	return typeof dimSel === "object" && dimSel !== null && "length" in dimSel;
+}
+
+/** Resolve an index array or mask to (bounds-checked) integer indices. */
+function normalizeIndexArray(
+	dimSel: IndexArray,
+	dimLen: number,
+): Float64Array {
+	if (dimSel.length > 0 && typeof dimSel[0] === "boolean") {
+		if (dimSel.length !== dimLen) {
+			throw new InvalidSelectionError(
+				`boolean mask of length ${dimSel.length} does not match dimension with length ${dimLen}`,
+			);
+		}
+		let count = 0;
+		for (let i = 0; i < dimLen; i++) if (dimSel[i]) count++;
+		let indices = new Float64Array(count);
+		for (let i = 0, j = 0; i < dimLen; i++) if (dimSel[i]) indices[j++] = i;
+		return indices;
+	}
+	let indices = new Float64Array(dimSel.length);
+	for (let i = 0; i < dimSel.length; i++) {
+		indices[i] = normalizeIntegerSelection(Number(dimSel[i]), dimLen);
+	}
+	return indices;
+}
+
+/**
+ * The part of an orthogonal selection that falls in one chunk: for each
+ * dimension, the positions inside the chunk (`chunkSel`) and where each lands
+ * in the output (`outSel`, `null` for integer-indexed dimensions, which are
+ * dropped). Every combination of the per-dimension positions is selected.
+ */
+export interface OrthogonalProjection {
+	chunkCoords: number[];
+	chunkSel: Float64Array[];
+	outSel: (Float64Array | null)[];
+}
+
+/**
+ * The points of a coordinate selection that fall in one chunk: point `i` is
+ * at `chunkSel[d][i]` along each dimension `d` of the chunk, and lands at
+ * `outSel[i]` in the (one-dimensional) output.
+ */
+export interface CoordinateProjection {
+	chunkCoords: number[];
+	chunkSel: Float64Array[];
+	outSel: Float64Array;
+}
+
+/** The indices of one dimension that fall in one chunk. */
+type DimGroup = {
+	dimChunkIx: number;
+	chunkSel: Float64Array;
+	outSel: Float64Array;
+};
+
+/** Group a dimension's indices (in output order) by the chunk they fall in. */
+function groupByChunk(indices: Float64Array, dimChunkLen: number): DimGroup[] {
+	let groups = new Map<number, { chunkSel: number[]; outSel: number[] }>();
+	for (let i = 0; i < indices.length; i++) {
+		let dimChunkIx = Math.floor(indices[i] / dimChunkLen);
+		let group = groups.get(dimChunkIx);
+		if (!group) {
+			group = { chunkSel: [], outSel: [] };
+			groups.set(dimChunkIx, group);
+		}
+		group.chunkSel.push(indices[i] - dimChunkIx * dimChunkLen);
+		group.outSel.push(i);
+	}
+	return [...groups].map(([dimChunkIx, { chunkSel, outSel }]) => ({
+		dimChunkIx,
+		chunkSel: Float64Array.from(chunkSel),
+		outSel: Float64Array.from(outSel),
+	}));
+}
+
+interface OrthogonalIndexerProps {
+	selection: null | (null | number | Slice | IndexArray)[];
+	shape: readonly number[];
+	chunkShape: readonly number[];
+}
+
+/**
+ * Selects the outer product of per-dimension selections (integers, slices,
+ * index arrays or boolean masks), like NumPy's `np.ix_`. Each chunk touched
+ * is visited once, with every selected point that falls in it.
+ */
+export class OrthogonalIndexer {
+	dimSelections: { indices: Float64Array; keep: boolean }[];
+	chunkShape: readonly number[];
+	shape: number[];
+
+	constructor({ selection, shape, chunkShape }: OrthogonalIndexerProps) {
+		let normalized = selection ?? [];
+		checkSelectionLength(normalized, shape);
+		this.dimSelections = shape.map((dimLen, i) => {
+			let dimSel = normalized[i] ?? slice(null);
+			if (typeof dimSel === "number") {
+				let index = normalizeIntegerSelection(dimSel, dimLen);
+				return { indices: Float64Array.of(index), keep: false };
+			}
+			if (isIndexArray(dimSel)) {
+				return { indices: normalizeIndexArray(dimSel, dimLen), keep: true };
+			}
+			let [start, stop, step] = sliceIndices(dimSel, dimLen);
+			let indices = new Float64Array(indicesLen(start, stop, step));
+			for (let i = 0; i < indices.length; i++) indices[i] = start + i * step;
+			return { indices, keep: true };
+		});
+		this.chunkShape = chunkShape;
+		this.shape = this.dimSelections
+			.filter((s) => s.keep)
+			.map((s) => s.indices.length);
+	}
+
+	*[Symbol.iterator](): IterableIterator<OrthogonalProjection> {
+		let dims = this.dimSelections.map(({ indices }, i) =>
+			groupByChunk(indices, this.chunkShape[i]),
+		);
+		if (dims.length === 0) {
+			// A zero-dimensional array has a single chunk with one element.
+			yield { chunkCoords: [], chunkSel: [], outSel: [] };
+			return;
+		}
+		if (dims.some((groups) => groups.length === 0)) {
+			return;
+		}
+		for (const groups of product(...dims)) {
+			yield {
+				chunkCoords: groups.map((g) => g.dimChunkIx),
+				chunkSel: groups.map((g) => g.chunkSel),
+				outSel: groups.map((g, i) =>
+					this.dimSelections[i].keep ? g.outSel : null,
+				),
+			};
+		}
+	}
+}
+
+interface CoordinateIndexerProps {
+	/** One index array per dimension, all the same length. */
+	selection: ArrayLike<number>[];
+	shape: readonly number[];
+	chunkShape: readonly number[];
+}
+
+/**
+ * Selects individual points, given as one coordinate array per dimension
+ * (like NumPy's `arr[xs, ys]`). Points are grouped by chunk so that each
+ * chunk is visited once, however many points fall in it.
+ */
+export class CoordinateIndexer {
+	coords: Float64Array[];
+	chunkShape: readonly number[];
+	/** Number of chunks along each dimension. */
+	gridShape: number[];
+	shape: [number];
+
+	constructor({ selection, shape, chunkShape }: CoordinateIndexerProps) {
+		if (selection.length !== shape.length) {
+			throw new InvalidSelectionError(
+				`coordinate selection needs one index array per dimension; expected ${shape.length}, got ${selection.length}`,
+			);
+		}
+		let n = selection[0]?.length ?? 0;
+		this.coords = selection.map((dimSel, i) => {
+			if (dimSel.length !== n) {
+				throw new InvalidSelectionError(
+					"all index arrays of a coordinate selection must have the same length",
+				);
+			}
+			return normalizeIndexArray(dimSel, shape[i]);
+		});
+		this.chunkShape = chunkShape;
+		this.gridShape = shape.map((dimLen, i) =>
+			Math.ceil(dimLen / chunkShape[i]),
+		);
+		this.shape = [n];
+	}
+
+	*[Symbol.iterator](): IterableIterator<CoordinateProjection> {
+		let [n] = this.shape;
+		let { coords, chunkShape, gridShape } = this;
+		// Linear chunk index of every point, then the points ordered by chunk
+		// (and by position within the selection, among points of one chunk).
+		let keys = new Float64Array(n);
+		for (let d = 0; d < coords.length; d++) {
+			for (let i = 0; i < n; i++) {
+				keys[i] =
+					keys[i] * gridShape[d] + Math.floor(coords[d][i] / chunkShape[d]);
+			}
+		}
+		let order = new Uint32Array(n).map((_, i) => i);
+		order.sort((a, b) => keys[a] - keys[b] || a - b);
+		for (let start = 0; start < n; ) {
+			let key = keys[order[start]];
+			let stop = start + 1;
+			while (stop < n && keys[order[stop]] === key) stop++;
+			let points = order.subarray(start, stop);
+			let first = points[0];
+			let chunkCoords = coords.map((c, d) =>
+				Math.floor(c[first] / chunkShape[d]),
+			);
+			yield {
+				chunkCoords,
+				chunkSel: coords.map((c, d) => {
+					let offset = chunkCoords[d] * chunkShape[d];
+					return Float64Array.from(points, (p) => c[p] - offset);
+				}),
+				outSel: Float64Array.from(points),
+			};
+			start = stop;
+		}
+	}
+}
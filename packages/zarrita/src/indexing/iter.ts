@@ -0,0 +1,133 @@
+import type { Readable } from "@zarrita/storage";
+
+import type { Array } from "../hierarchy.js";
+import type { Chunk, DataType } from "../metadata.js";
+import { assertSharedArrayBufferAvailable, resolveSignal } from "../util.js";
+import { BasicIndexer } from "./indexer.js";
+import type { GetOptions, Projection, Slice } from "./types.js";
+
+export type IterChunksOptions = Omit<GetOptions, "createQueue"> & {
+	/**
+	 * Maximum number of chunk reads in flight ahead of the consumer. Together
+	 * with the chunk currently being consumed, this bounds how many decoded
+	 * chunks are held in memory at once.
+	 *
+	 * Default: 4.
+	 */
+	readAhead?: number;
+	/**
+	 * `"completion"` yields chunks as soon as they are decoded. `"C"` yields
+	 * them in row-major chunk order, which may stall behind a slow read.
+	 *
+	 * Default: `"completion"`.
+	 */
+	order?: "completion" | "C";
+};
+
+/** A decoded chunk and where it lands in the selection. */
+export interface ChunkSelection<D extends DataType> {
+	chunkCoords: number[];
+	/**
+	 * Per-dimension projection from the chunk (`from`) into the selection's
+	 * output (`to`), as consumed by `get`. Integer-indexed dimensions have
+	 * `to: null` and are dropped from the output.
+	 */
+	mapping: Projection[];
+	/** The full decoded chunk (including any padding past the array edge). */
+	chunk: Chunk<D>;
+}
+
+/**
+ * Stream the chunks overlapping a selection without allocating the output.
+ *
+ * Reads are issued through `Array.getChunk` (so array extensions apply) with
+ * at most `readAhead` in flight. Breaking out of the loop aborts any reads
+ * still in flight.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * let sum = 0;
+ * for await (let { chunk, mapping } of zarr.iterChunks(arr, null, {
+ *   readAhead: 8,
+ * })) {
+ *   // `mapping[i].from` is the [start, stop, step] of the chunk inside the
+ *   // selection for each dimension.
+ *   sum += reduceRegion(chunk, mapping);
+ * }
+ * ```
+ *
+ * @category Utility
+ */
+export async function* iterChunks<D extends DataType, Store extends Readable>(
+	arr: Array<D, Store>,
+	selection: null | (null | Slice | number)[] = null,
+	opts: IterChunksOptions = {},
+): AsyncGenerator<ChunkSelection<D>, void, undefined> {
+	if (opts.useSharedArrayBuffer) {
+		assertSharedArrayBufferAvailable();
+	}
+	let readAhead = Math.max(1, opts.readAhead ?? 4);
+	let inOrder = opts.order === "C";
+	let controller = new AbortController();
+	let userSignal = resolveSignal(opts);
+	let signal = userSignal
+		? AbortSignal.any([userSignal, controller.signal])
+		: controller.signal;
+
+	let projections: Iterable<Omit<ChunkSelection<D>, "chunk">> =
+		new BasicIndexer({
+			selection,
+			shape: arr.shape,
+			chunkShape: arr.chunks,
+		});
+	if (arr.shape.length === 0) {
+		// The indexer yields nothing for zero-dimensional arrays.
+		projections = [{ chunkCoords: [], mapping: [] }];
+	}
+	let remaining = projections[Symbol.iterator]();
+
+	type Settled = { id: number; value: ChunkSelection<D> };
+	let inflight = new Map<number, Promise<Settled>>();
+	let nextId = 0;
+
+	function fill() {
+		while (inflight.size < readAhead) {
+			let next = remaining.next();
+			if (next.done) return;
+			let { chunkCoords, mapping } = next.value;
+			let id = nextId++;
+			let promise = arr
+				.getChunk(
+					chunkCoords,
+					{ signal },
+					{
+						useSharedArrayBuffer: opts.useSharedArrayBuffer,
+						decodePool: opts.decodePool,
+					},
+				)
+				.then((chunk) => ({ id, value: { chunkCoords, mapping, chunk } }));
+			// Reads abandoned on early exit reject with an AbortError; don't let
+			// them surface as unhandled rejections.
+			promise.catch(() => {});
+			inflight.set(id, promise);
+		}
+	}
+
+	try {
+		fill();
+		while (inflight.size > 0) {
+			signal.throwIfAborted();
+			let settled = inOrder
+				? await (inflight.values().next().value as Promise<Settled>)
+				: await Promise.race(inflight.values());
+			inflight.delete(settled.id);
+			fill();
+			yield settled.value;
+		}
+	} finally {
+		if (inflight.size > 0) {
+			controller.abort();
+		}
+	}
+}
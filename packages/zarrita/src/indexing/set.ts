@@ -1,10 +1,16 @@
-import type { Mutable } from "@zarrita/storage";
+import type { AbsolutePath, Mutable } from "@zarrita/storage";
 
-import { InvalidSelectionError, UnsupportedError } from "../errors.js";
+import { InvalidSelectionError } from "../errors.js";
 import { type Array, getContext } from "../hierarchy.js";
 import type { Chunk, DataType, Scalar, TypedArray } from "../metadata.js";
+import { startSpan, traced, tracedChunkTask, type Tracer } from "../tracing.js";
 import { resolveSignal } from "../util.js";
-import { BasicIndexer, type IndexerProjection } from "./indexer.js";
+import { indicesLen } from "./copy.js";
+import {
+	BasicIndexer,
+	type ChunkProjection,
+	type IndexerProjection,
+} from "./indexer.js";
 import type {
 	Indices,
 	Prepare,
@@ -20,6 +26,21 @@ function flipIndexerProjection(m: IndexerProjection) {
 	return { from: m.to, to: m.from };
 }
 
+/** Write encoded bytes to the store, in a `zarrita.write` span. */
+export function writeBytes(
+	store: Mutable,
+	path: AbsolutePath,
+	bytes: Uint8Array,
+	tracer: Tracer | undefined,
+): Promise<void> {
+	return traced(
+		tracer,
+		"zarrita.write",
+		{ "zarrita.path": path, "zarrita.bytes": bytes.byteLength },
+		() => store.set(path, bytes),
+	);
+}
+
 export async function set<Dtype extends DataType, Arr extends Chunk<Dtype>>(
 	arr: Array<Dtype, Mutable>,
 	selection: (number | Slice | null)[] | null,
@@ -30,11 +51,25 @@ export async function set<Dtype extends DataType, Arr extends Chunk<Dtype>>(
 		setScalar: SetScalar<Dtype, Arr>;
 		setFromChunk: SetFromChunk<Dtype, Arr>;
 	},
+): Promise<void> {
+	return traced(opts.tracer, "zarrita.set", { "zarrita.path": arr.path }, () =>
+		setSelection(arr, selection, value, opts, setter),
+	);
+}
+
+async function setSelection<Dtype extends DataType, Arr extends Chunk<Dtype>>(
+	arr: Array<Dtype, Mutable>,
+	selection: (number | Slice | null)[] | null,
+	value: Scalar<Dtype> | Arr,
+	opts: SetOptions,
+	setter: {
+		prepare: Prepare<Dtype, Arr>;
+		setScalar: SetScalar<Dtype, Arr>;
+		setFromChunk: SetFromChunk<Dtype, Arr>;
+	},
 ) {
+	const tracer = opts.tracer;
 	const context = getContext(arr);
-	if (context.kind === "sharded") {
-		throw new UnsupportedError("set on sharded arrays");
-	}
 	const indexer = new BasicIndexer({
 		selection,
 		shape: arr.shape,
@@ -53,14 +88,11 @@ export async function set<Dtype extends DataType, Arr extends Chunk<Dtype>>(
 		// @ts-expect-error - Value is a scalar
 		chunkData.fill(value);
 		const chunkPath = arr.resolve(context.encodeChunkKey([])).path;
-		await arr.store.set(
-			chunkPath,
-			await context.codec.encode({
-				data: chunkData,
-				shape: [],
-				stride: [],
-			}),
+		const bytes = await context.codec.encode(
+			{ data: chunkData, shape: [], stride: [] },
+			{ tracer },
 		);
+		await writeBytes(arr.store, chunkPath, bytes, tracer);
 		return;
 	}
 
@@ -69,74 +101,176 @@ export async function set<Dtype extends DataType, Arr extends Chunk<Dtype>>(
 	// necessary data from the value array and storing into the chunk array.
 
 	const chunkSize = arr.chunks.reduce((a, b) => a * b, 1);
+	const chunkShape = arr.chunks.slice();
+	const chunkStride = context.getStrides(chunkShape);
 	const queue = opts.createQueue ? opts.createQueue() : createQueue();
 	const signal = resolveSignal(opts);
 
-	// N.B., it is an important optimisation that we only visit chunks which overlap
-	// the selection. This minimises the number of iterations in the main for loop.
-	for (const { chunkCoords, mapping } of indexer) {
+	/** Copy `value` into a chunk, in a `zarrita.copy` span. */
+	function copyInto(
+		chunk: Arr,
+		mapping: ReturnType<typeof flipIndexerProjection>[],
+	) {
+		const span = startSpan(tracer, "zarrita.copy");
+		// @ts-expect-error - Value is not a scalar
+		setter.setFromChunk(chunk, value, mapping);
+		span?.end();
+	}
+
+	/** Apply `value` to one chunk, reading the existing data only if needed. */
+	async function updateChunk(
+		mapping: IndexerProjection[],
+		readExisting: () => Promise<TypedArray<Dtype>>,
+	): Promise<TypedArray<Dtype>> {
 		const chunkSelection = mapping.map((i) => i.from);
 		const flipped = mapping.map(flipIndexerProjection);
-		queue.add(async () => {
-			signal?.throwIfAborted();
-
-			// obtain key for chunk storage
-			const chunkPath = arr.resolve(context.encodeChunkKey(chunkCoords)).path;
-
-			let chunkData: TypedArray<Dtype>;
-			const chunkShape = arr.chunks.slice();
-			const chunkStride = context.getStrides(chunkShape);
-
-			if (isTotalSlice(chunkSelection, chunkShape)) {
-				// totally replace
-				chunkData = new context.TypedArray(chunkSize);
-				// optimization: we are completely replacing the chunk, so no need
-				// to access the exisiting chunk data
-				if (typeof value === "object") {
-					// Otherwise data just contiguous TypedArray
-					const chunk = setter.prepare(
-						chunkData,
-						chunkShape.slice(),
-						chunkStride.slice(),
-					);
-					// @ts-expect-error - Value is not a scalar
-					setter.setFromChunk(chunk, value, flipped);
-				} else {
-					// @ts-expect-error - Value is a scalar
-					chunkData.fill(value);
-				}
-			} else {
-				// partially replace the contents of this chunk
-				chunkData = await arr.getChunk(chunkCoords).then(({ data }) => data);
+		let chunkData: TypedArray<Dtype>;
 
+		if (isTotalSlice(chunkSelection, chunkShape)) {
+			// totally replace
+			chunkData = new context.TypedArray(chunkSize);
+			// optimization: we are completely replacing the chunk, so no need
+			// to access the exisiting chunk data
+			if (typeof value === "object") {
+				// Otherwise data just contiguous TypedArray
 				const chunk = setter.prepare(
 					chunkData,
 					chunkShape.slice(),
 					chunkStride.slice(),
 				);
+				copyInto(chunk, flipped);
+			} else {
+				// @ts-expect-error - Value is a scalar
+				chunkData.fill(value);
+			}
+			return chunkData;
+		}
 
-				// Modify chunk data
-				if (typeof value === "object") {
-					// @ts-expect-error - Value is not a scalar
-					setter.setFromChunk(chunk, value, flipped);
-				} else {
-					setter.setScalar(chunk, chunkSelection, value);
-				}
+		// partially replace the contents of this chunk
+		chunkData = await readExisting();
+
+		const chunk = setter.prepare(
+			chunkData,
+			chunkShape.slice(),
+			chunkStride.slice(),
+		);
+
+		// Modify chunk data
+		if (typeof value === "object") {
+			copyInto(chunk, flipped);
+		} else {
+			setter.setScalar(chunk, chunkSelection, value);
+		}
+		return chunkData;
+	}
+
+	if (context.shards) {
+		const shards = context.shards;
+		// Inner chunks are written a whole shard at a time: group the chunks
+		// touched by the selection by the shard that holds them.
+		const byShard = new Map<AbsolutePath, ChunkProjection[]>();
+		for (const projection of indexer) {
+			const shardPath = shards.resolveShardPath(projection.chunkCoords);
+			let projections = byShard.get(shardPath);
+			if (!projections) {
+				projections = [];
+				byShard.set(shardPath, projections);
 			}
-			await arr.store.set(
-				chunkPath,
-				await context.codec.encode({
-					data: chunkData,
-					shape: chunkShape,
-					stride: chunkStride,
+			projections.push(projection);
+		}
+		const gridShape = arr.shape.map((s, i) => Math.ceil(s / chunkShape[i]));
+		for (const [shardPath, projections] of byShard) {
+			queue.add(
+				tracedChunkTask(tracer, projections[0].chunkCoords, async () => {
+					signal?.throwIfAborted();
+					// Skip reading the existing shard when every inner chunk it
+					// holds (within the array bounds) is being fully replaced.
+					const overwritesShard =
+						projections.length ===
+							chunksInShard(shards, projections[0].chunkCoords, gridShape) &&
+						projections.every(({ mapping }) =>
+							isTotalSlice(mapping.map((m) => m.from), chunkShape),
+						);
+					const chunks = overwritesShard
+						? new globalThis.Array<Uint8Array | undefined>(
+								shards.indexShape.reduce((a, b) => a * b, 1),
+							)
+						: await shards.readChunks(shardPath, { signal });
+
+					// Encode the inner chunks of this shard in parallel.
+					await Promise.all(
+						projections.map(async ({ chunkCoords, mapping }) => {
+							const i = shards.innerIndex(chunkCoords);
+							const chunkData = await updateChunk(mapping, async () => {
+								const bytes = chunks[i];
+								if (bytes) {
+									const chunk = await context.codec.decode(bytes, { tracer });
+									return chunk.data;
+								}
+								const data = new context.TypedArray(chunkSize);
+								// @ts-expect-error: TS can't infer that `fillValue` is union (assumes never) but this is ok
+								data.fill(context.fillValue);
+								return data;
+							});
+							chunks[i] = await context.codec.encode(
+								{ data: chunkData, shape: chunkShape, stride: chunkStride },
+								{ tracer },
+							);
+						}),
+					);
+					const shard = await shards.encodeShard(chunks);
+					await writeBytes(arr.store, shardPath, shard, tracer);
+					shards.invalidate(shardPath);
 				}),
+				{ chunkCoords: projections[0].chunkCoords },
 			);
-		});
+		}
+		await queue.onIdle();
+		return;
+	}
+
+	// N.B., it is an important optimisation that we only visit chunks which overlap
+	// the selection. This minimises the number of iterations in the main for loop.
+	for (const { chunkCoords, mapping } of indexer) {
+		queue.add(
+			tracedChunkTask(tracer, chunkCoords, async () => {
+				signal?.throwIfAborted();
+
+				// obtain key for chunk storage
+				const chunkPath = arr.resolve(context.encodeChunkKey(chunkCoords)).path;
+				const chunkData = await updateChunk(mapping, () =>
+					arr
+						.getChunk(chunkCoords, undefined, { tracer })
+						.then(({ data }) => data),
+				);
+				const bytes = await context.codec.encode(
+					{ data: chunkData, shape: chunkShape, stride: chunkStride },
+					{ tracer },
+				);
+				await writeBytes(arr.store, chunkPath, bytes, tracer);
+			}),
+			{ chunkCoords },
+		);
 	}
 	await queue.onIdle();
 }
 
-function isTotalSlice(
+/**
+ * The number of inner chunks (within the array bounds) in the shard holding
+ * the chunk at `chunkCoords`.
+ */
+export function chunksInShard(
+	shards: { indexShape: number[] },
+	chunkCoords: number[],
+	gridShape: number[],
+): number {
+	return shards.indexShape.reduce((acc, n, i) => {
+		const shardStart = Math.floor(chunkCoords[i] / n) * n;
+		return acc * Math.min(n, gridShape[i] - shardStart);
+	}, 1);
+}
+
+export function isTotalSlice(
 	selection: (number | Indices)[],
 	shape: readonly number[],
 ): selection is Indices[] {
@@ -144,8 +278,8 @@ function isTotalSlice(
 	return selection.every((s, i) => {
 		// can't be a full selection
 		if (typeof s === "number") return false;
-		// explicit complete slice
+		// explicit complete slice, in either direction
 		const [start, stop, step] = s;
-		return stop - start === shape[i] && step === 1;
+		return Math.abs(step) === 1 && indicesLen(start, stop, step) === shape[i];
 	});
 }
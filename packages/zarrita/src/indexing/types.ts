@@ -1,4 +1,6 @@
+import type { DecodePool } from "../decode-pool.js";
 import type { Chunk, DataType, Scalar, TypedArray } from "../metadata.js";
+import type { Tracer } from "../tracing.js";
 
 export type Indices = [start: number, stop: number, step: number];
 
@@ -50,14 +52,53 @@ export type Options = {
 	 * signals are merged via `AbortSignal.any`.
 	 */
 	opts?: { signal?: AbortSignal };
+	/**
+	 * Receives timing spans for the call and each chunk it touches (store
+	 * reads and writes, codec steps, copies and queue waits). See
+	 * {@linkcode Tracer}.
+	 */
+	tracer?: Tracer;
 };
 
-export type GetOptions = Options;
+export type GetOptions = Options & {
+	/**
+	 * Decode chunks on a {@linkcode DecodePool} instead of the calling thread.
+	 * Takes precedence over a pool attached with `withWorkerDecoding`.
+	 */
+	decodePool?: DecodePool;
+};
 
 export type SetOptions = Options;
 
 // Compatible with https://github.com/sindresorhus/p-queue
 export type ChunkQueue = {
-	add(fn: () => Promise<void>): void;
+	/**
+	 * `get` and `set` pass the coordinates of the chunk the task reads or
+	 * writes, so schedulers can order work (e.g. center-out). Queues that
+	 * don't care can ignore the second argument.
+	 */
+	add(fn: () => Promise<void>, options?: { chunkCoords?: number[] }): void;
 	onIdle(): Promise<Array<void>>;
 };
+
+/** Counters reported by {@linkcode Scheduler.stats}. */
+export interface SchedulerStats {
+	/** Tasks waiting to start. */
+	queued: number;
+	/** Tasks currently in flight. */
+	running: number;
+	/** Tasks that have settled (fulfilled or rejected). */
+	completed: number;
+	/** High-water mark of `queued`. */
+	maxQueued: number;
+	/** Sum of the time each started task spent waiting in the queue, in ms. */
+	totalWaitTime: number;
+	/** Longest time a single task spent waiting in the queue, in ms. */
+	maxWaitTime: number;
+}
+
+/** A bounded-concurrency, priority-aware {@linkcode ChunkQueue}. */
+export type Scheduler = ChunkQueue & {
+	/** A snapshot of the scheduler's counters. */
+	stats(): SchedulerStats;
+};
@@ -2,7 +2,13 @@ import type { Readable } from "@zarrita/storage";
 import { InvalidSelectionError } from "../errors.js";
 import type { Array as ZarrArray } from "../hierarchy.js";
 import type { DataType } from "../metadata.js";
-import type { ChunkQueue, Indices, Slice } from "./types.js";
+import type {
+	ChunkQueue,
+	Indices,
+	Scheduler,
+	SchedulerStats,
+	Slice,
+} from "./types.js";
 
 /** Similar to python's `range` function. Supports positive ranges only. */
 export function* range(
@@ -165,3 +171,177 @@ export function createQueue(): ChunkQueue {
 		onIdle: () => Promise.all(promises),
 	};
 }
+
+export interface SchedulerOptions {
+	/**
+	 * Maximum number of tasks in flight at once. A task stays in flight until
+	 * its chunk has been copied into (or written from) the output, so this
+	 * also bounds how many decoded chunks are held in memory.
+	 *
+	 * Default: 32.
+	 */
+	concurrency?: number;
+	/**
+	 * Rank tasks by the coordinates of their chunk; higher values start
+	 * first. Tasks with equal priority (or added without coordinates) start
+	 * in insertion order.
+	 */
+	priority?: (chunkCoords: number[]) => number;
+}
+
+interface ScheduledTask {
+	fn: () => Promise<void>;
+	priority: number;
+	seq: number;
+	enqueued: number;
+}
+
+/** True if `a` should start before `b`. */
+function before(a: ScheduledTask, b: ScheduledTask): boolean {
+	return a.priority !== b.priority ? a.priority > b.priority : a.seq < b.seq;
+}
+
+function heapPush(heap: ScheduledTask[], task: ScheduledTask): void {
+	let i = heap.push(task) - 1;
+	while (i > 0) {
+		let parent = (i - 1) >> 1;
+		if (!before(heap[i], heap[parent])) break;
+		[heap[i], heap[parent]] = [heap[parent], heap[i]];
+		i = parent;
+	}
+}
+
+function heapPop(heap: ScheduledTask[]): ScheduledTask | undefined {
+	let top = heap[0];
+	let last = heap.pop();
+	if (heap.length === 0 || !last) return top;
+	heap[0] = last;
+	for (let i = 0; ; ) {
+		let left = 2 * i + 1;
+		let right = left + 1;
+		let next = i;
+		if (left < heap.length && before(heap[left], heap[next])) next = left;
+		if (right < heap.length && before(heap[right], heap[next])) next = right;
+		if (next === i) break;
+		[heap[i], heap[next]] = [heap[next], heap[i]];
+		i = next;
+	}
+	return top;
+}
+
+/**
+ * A bounded-concurrency, priority-aware queue for `get` and `set`.
+ *
+ * The built-in queue starts every chunk request at once, which is fine for
+ * small selections but floods the network (and memory) for large ones.
+ * The scheduler caps the number of in-flight tasks and starts the
+ * highest-priority pending task whenever a slot frees up. Tasks added in the
+ * same tick are ranked together before any of them start, so a `priority`
+ * function sees the whole selection.
+ *
+ * If a task fails, pending tasks are dropped and `onIdle` rejects with the
+ * error (matching the built-in queue's `Promise.all` semantics).
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * // Fetch the chunks nearest the viewport center first, 16 at a time.
+ * let center = [12, 40];
+ * let region = await zarr.get(arr, null, {
+ *   createQueue: () =>
+ *     zarr.createScheduler({
+ *       concurrency: 16,
+ *       priority: ([i, j]) => -Math.hypot(i - center[0], j - center[1]),
+ *     }),
+ * });
+ * ```
+ *
+ * @category Utility
+ */
+export function createScheduler(options: SchedulerOptions = {}): Scheduler {
+	let concurrency = Math.max(1, options.concurrency ?? 32);
+	let { priority } = options;
+	let heap: ScheduledTask[] = [];
+	let waiters: Array<{
+		resolve: (value: void[]) => void;
+		reject: (reason: unknown) => void;
+	}> = [];
+	let failure: { reason: unknown } | undefined;
+	let scheduled = false;
+	let seq = 0;
+	let stats: SchedulerStats = {
+		queued: 0,
+		running: 0,
+		completed: 0,
+		maxQueued: 0,
+		totalWaitTime: 0,
+		maxWaitTime: 0,
+	};
+
+	function settle() {
+		if (failure) {
+			for (let waiter of waiters) waiter.reject(failure.reason);
+		} else if (!scheduled && heap.length === 0 && stats.running === 0) {
+			for (let waiter of waiters) waiter.resolve([]);
+		} else {
+			return;
+		}
+		waiters = [];
+	}
+
+	function drain() {
+		scheduled = false;
+		while (!failure && stats.running < concurrency && heap.length > 0) {
+			let task = heapPop(heap) as ScheduledTask;
+			let wait = performance.now() - task.enqueued;
+			stats.queued = heap.length;
+			stats.running++;
+			stats.totalWaitTime += wait;
+			stats.maxWaitTime = Math.max(stats.maxWaitTime, wait);
+			// Wrap so a synchronous throw from `fn` is treated like a rejection.
+			Promise.resolve()
+				.then(task.fn)
+				.then(
+					() => {},
+					(reason) => {
+						if (!failure) {
+							failure = { reason };
+							heap = [];
+							stats.queued = 0;
+						}
+					},
+				)
+				.then(() => {
+					stats.running--;
+					stats.completed++;
+					drain();
+				});
+		}
+		settle();
+	}
+
+	return {
+		add(fn, { chunkCoords } = {}) {
+			if (failure) return;
+			heapPush(heap, {
+				fn,
+				priority: priority && chunkCoords ? priority(chunkCoords) : 0,
+				seq: seq++,
+				enqueued: performance.now(),
+			});
+			stats.queued = heap.length;
+			stats.maxQueued = Math.max(stats.maxQueued, heap.length);
+			if (!scheduled) {
+				scheduled = true;
+				queueMicrotask(drain);
+			}
+		},
+		onIdle() {
+			return new Promise((resolve, reject) => {
+				waiters.push({ resolve, reject });
+				settle();
+			});
+		},
+		stats: () => ({ ...stats }),
+	};
+}
@@ -20,19 +20,24 @@
  * @module
  */
 
-import type { Readable } from "@zarrita/storage";
-import { InvalidMetadataError, NotFoundError } from "./errors.js";
+import type { AbsolutePath, GetOptions, Readable } from "@zarrita/storage";
+import {
+	InvalidMetadataError,
+	NotFoundError,
+	UnsupportedError,
+} from "./errors.js";
 import type { ArrayExtension } from "./extension/define-array.js";
 import { extendArray } from "./extension/extend-array.js";
 import { Array, Group, Location } from "./hierarchy.js";
 import type {
 	ArrayMetadata,
+	ArrayMetadataV2,
 	Attributes,
 	DataType,
 	GroupMetadata,
 } from "./metadata.js";
+import { traced, type Tracer } from "./tracing.js";
 import {
-	ensureCorrectScalar,
 	jsonDecodeObject,
 	rethrowUnless,
 	v2ToV3ArrayMetadata,
@@ -82,15 +87,73 @@ function createVersionCounter() {
 	};
 }
 
-async function loadAttrs(
+/**
+ * A store that can hand out metadata documents already parsed, such as one
+ * wrapped with `withConsolidatedMetadata`. The documents may be shared
+ * between callers, so they are never mutated here.
+ */
+type MetadataReader = {
+	getMetadata(key: AbsolutePath, options?: GetOptions): Promise<unknown>;
+};
+
+function isMetadataReader(
+	store: Readable,
+): store is Readable & MetadataReader {
+	return typeof (store as Partial<MetadataReader>).getMetadata === "function";
+}
+
+/** Read and parse a metadata document, or `undefined` if it is missing. */
+async function loadMetadata<T>(
+	store: Readable,
+	path: AbsolutePath,
+	signal?: AbortSignal,
+): Promise<T | undefined> {
+	if (isMetadataReader(store)) {
+		return (await store.getMetadata(path, { signal })) as T | undefined;
+	}
+	let bytes = await store.get(path, { signal });
+	return bytes ? jsonDecodeObject(bytes) : undefined;
+}
+
+/**
+ * v2 → v3 conversions of shared metadata documents, keyed by the parsed
+ * `.zarray`/`.zgroup` document and then by its attributes (`undefined` when
+ * there is no `.zattrs`). Only documents from a {@linkcode MetadataReader}
+ * are stable enough to hit.
+ */
+let convertedV2 = new WeakMap<
+	object,
+	Map<Attributes | undefined, ArrayMetadata<DataType> | GroupMetadata>
+>();
+
+function convertV2<M extends ArrayMetadata<DataType> | GroupMetadata>(
+	store: Readable,
+	meta: object,
+	attrs: Attributes | undefined,
+	convert: (meta: never, attrs: Attributes) => M,
+): M {
+	if (!isMetadataReader(store)) {
+		return convert(meta as never, attrs ?? {});
+	}
+	let byAttrs = convertedV2.get(meta);
+	if (!byAttrs) {
+		byAttrs = new Map();
+		convertedV2.set(meta, byAttrs);
+	}
+	let converted = byAttrs.get(attrs);
+	if (!converted) {
+		converted = convert(meta as never, attrs ?? {});
+		byAttrs.set(attrs, converted);
+	}
+	return converted as M;
+}
+
+function loadAttrs(
 	location: Location<Readable>,
 	signal?: AbortSignal,
-): Promise<Attributes> {
-	let metaBytes = await location.store.get(location.resolve(".zattrs").path, {
-		signal,
-	});
-	if (!metaBytes) return {};
-	return jsonDecodeObject(metaBytes);
+): Promise<Attributes | undefined> {
+	let { path } = location.resolve(".zattrs");
+	return loadMetadata(location.store, path, signal);
 }
 
 type OpenV2Options = {
@@ -120,7 +183,7 @@ async function openV2<Store extends Readable>(
 ) {
 	let loc = "store" in location ? location : new Location(location);
 	let { signal } = options;
-	let attrs = {};
+	let attrs: Attributes | undefined;
 	if (options.attrs ?? true) attrs = await loadAttrs(loc, signal);
 	signal?.throwIfAborted();
 	if (options.kind === "array") return openArrayV2(loc, attrs, signal);
@@ -133,11 +196,11 @@ async function openV2<Store extends Readable>(
 
 async function openArrayV2<Store extends Readable>(
 	location: Location<Store>,
-	attrs: Attributes,
+	attrs: Attributes | undefined,
 	signal?: AbortSignal,
 ) {
 	let { path } = location.resolve(".zarray");
-	let meta = await location.store.get(path, { signal });
+	let meta = await loadMetadata<ArrayMetadataV2>(location.store, path, signal);
 	if (!meta) {
 		throw new NotFoundError("v2 array", { path });
 	}
@@ -146,18 +209,18 @@ async function openArrayV2<Store extends Readable>(
 		new Array(
 			location.store,
 			location.path,
-			v2ToV3ArrayMetadata(jsonDecodeObject(meta), attrs),
+			convertV2(location.store, meta, attrs, v2ToV3ArrayMetadata),
 		),
 	);
 }
 
 async function openGroupV2<Store extends Readable>(
 	location: Location<Store>,
-	attrs: Attributes,
+	attrs: Attributes | undefined,
 	signal?: AbortSignal,
 ) {
 	let { path } = location.resolve(".zgroup");
-	let meta = await location.store.get(path, { signal });
+	let meta = await loadMetadata<object>(location.store, path, signal);
 	if (!meta) {
 		throw new NotFoundError("v2 group", { path });
 	}
@@ -165,7 +228,7 @@ async function openGroupV2<Store extends Readable>(
 	return new Group(
 		location.store,
 		location.path,
-		v2ToV3GroupMetadata(jsonDecodeObject(meta), attrs),
+		convertV2(location.store, meta, attrs, v2ToV3GroupMetadata),
 	);
 }
 
@@ -174,14 +237,16 @@ async function _openV3<Store extends Readable>(
 	signal?: AbortSignal,
 ) {
 	let { store, path } = location.resolve("zarr.json");
-	let meta = await location.store.get(path, { signal });
-	if (!meta) {
+	// The `Array` constructor normalizes `fill_value` on its own copy, so the
+	// (possibly shared) document is left untouched.
+	let metaDoc = await loadMetadata<ArrayMetadata<DataType> | GroupMetadata>(
+		store,
+		path,
+		signal,
+	);
+	if (!metaDoc) {
 		throw new NotFoundError("v3 array or group", { path });
 	}
-	let metaDoc: ArrayMetadata<DataType> | GroupMetadata = jsonDecodeObject(meta);
-	if (metaDoc.node_type === "array") {
-		metaDoc.fill_value = ensureCorrectScalar(metaDoc);
-	}
 	return metaDoc.node_type === "array"
 		? maybeExtend(new Array(store, location.path, metaDoc))
 		: new Group(store, location.path, metaDoc);
@@ -228,6 +293,8 @@ type OpenOptions = {
 	kind?: "array" | "group";
 	attrs?: boolean;
 	signal?: AbortSignal;
+	/** Receives a `zarrita.open` span for the call. See {@linkcode Tracer}. */
+	tracer?: Tracer;
 };
 
 /**
@@ -293,16 +360,19 @@ export async function open<Store extends Readable>(
 	options: OpenOptions = {},
 ): Promise<Array<DataType, Store> | Group<Store>> {
 	let store = "store" in location ? location.store : location;
+	let path = "store" in location ? location.path : "/";
 	let versionMax = VERSION_COUNTER.versionMax(store);
 	// Use the open function for the version with the most successful opens.
 	// Note that here we use the dot syntax to access the open functions
 	// because this enables us to use vi.spyOn during testing.
 	let openPrimary = versionMax === "v2" ? open.v2 : open.v3;
 	let openSecondary = versionMax === "v2" ? open.v3 : open.v2;
-	return openPrimary(location, options).catch((err) => {
-		rethrowUnless(err, NotFoundError, InvalidMetadataError);
-		return openSecondary(location, options);
-	});
+	return traced(options.tracer, "zarrita.open", { "zarrita.path": path }, () =>
+		openPrimary(location, options).catch((err) => {
+			rethrowUnless(err, NotFoundError, InvalidMetadataError);
+			return openSecondary(location, options);
+		}),
+	);
 }
 
 /**
@@ -334,3 +404,71 @@ open.v2 = openV2;
  * @category Read
  */
 open.v3 = openV3;
+
+type OpenAllOptions = {
+	signal?: AbortSignal;
+};
+
+/**
+ * Open many arrays and groups at once.
+ *
+ * `paths` are resolved against `location`. When omitted, every node below
+ * `location` listed by the store's `contents()` is opened (e.g. a store
+ * wrapped with `withConsolidatedMetadata`), using the listed kind to skip
+ * format probing. With a consolidated store, the nodes are built straight
+ * from the parsed consolidated metadata, without any JSON round-trips.
+ *
+ * @example Usage
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * let store = await zarr.withConsolidatedMetadata(
+ *   new zarr.FetchStore("https://example.com/catalog.zarr"),
+ * );
+ * let nodes = await zarr.openAll(store);
+ * for (let [path, node] of nodes) {
+ *   if (node.kind === "array") console.log(path, node.shape);
+ * }
+ * ```
+ *
+ * @param location A {@linkcode Readable} store, or a {@linkcode Location}
+ *   within one.
+ * @param paths Nodes to open, relative to `location` or absolute.
+ * @returns The opened nodes by absolute path, in the order requested.
+ * @throws {NotFoundError} If any of the nodes does not exist.
+ * @throws {UnsupportedError} If `paths` is omitted and the store can't list
+ *   its contents.
+ * @category Read
+ */
+export async function openAll<Store extends Readable>(
+	location: Location<Store> | Store,
+	paths?: string[],
+	options: OpenAllOptions = {},
+): Promise<Map<AbsolutePath, Array<DataType, Store> | Group<Store>>> {
+	let loc = "store" in location ? location : new Location(location);
+	let listing = (
+		loc.store as {
+			contents?: () => { path: AbsolutePath; kind: "array" | "group" }[];
+		}
+	).contents?.();
+	let kinds = new Map(listing?.map((entry) => [entry.path, entry.kind]));
+	let targets: Location<Store>[];
+	if (paths) {
+		targets = paths.map((p) => loc.resolve(p));
+	} else if (listing) {
+		let prefix = loc.path.endsWith("/") ? loc.path : `${loc.path}/`;
+		targets = listing
+			.filter(
+				(entry) => entry.path === loc.path || entry.path.startsWith(prefix),
+			)
+			.map((entry) => new Location(loc.store, entry.path));
+	} else {
+		throw new UnsupportedError("openAll without paths requires contents()");
+	}
+	let nodes = await Promise.all(
+		targets.map((target) =>
+			open(target, { kind: kinds.get(target.path), signal: options.signal }),
+		),
+	);
+	return new Map(targets.map((target, i) => [target.path, nodes[i]]));
+}
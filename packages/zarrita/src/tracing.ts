@@ -0,0 +1,225 @@
+/** A value that can be attached to a {@linkcode TraceSpan}. */
+export type TraceAttributeValue = string | number | boolean;
+
+/**
+ * A timed operation started by a {@linkcode Tracer}. A subset of the
+ * OpenTelemetry `Span` interface, so an OpenTelemetry span can be returned
+ * as is.
+ */
+export interface TraceSpan {
+	setAttribute(key: string, value: TraceAttributeValue): unknown;
+	end(): void;
+}
+
+/**
+ * Receives spans for the work done by `open`, `get` and `set`. A subset of
+ * the OpenTelemetry `Tracer` interface, so `trace.getTracer("zarrita")` from
+ * `@opentelemetry/api` can be passed directly; {@linkcode createTraceRecorder}
+ * returns one that keeps the spans in memory and summarizes them.
+ *
+ * Spans are named:
+ *
+ * - `zarrita.open`, `zarrita.get`, `zarrita.set`: one per call.
+ * - `zarrita.chunk`: the processing of one chunk. `zarrita.queue_wait_ms` is
+ *   the time the task waited in the chunk queue before starting.
+ * - `zarrita.fetch`: reading a chunk's bytes from the store.
+ *   `zarrita.bytes` is the number of bytes returned.
+ * - `zarrita.decode`, `zarrita.encode`: one codec step, named by
+ *   `zarrita.codec`.
+ * - `zarrita.copy`: copying between a chunk and the selection.
+ * - `zarrita.fill`: writing a missing chunk's fill value to the selection
+ *   (skipped when the fill value is zero).
+ * - `zarrita.write`: writing a chunk's bytes to the store.
+ *
+ * Chunk-level spans carry the chunk coordinates as `zarrita.chunk`, e.g.
+ * `"0,3"`.
+ */
+export interface Tracer {
+	startSpan(
+		name: string,
+		options?: { attributes?: Record<string, TraceAttributeValue> },
+	): TraceSpan;
+}
+
+/** A finished span kept by a {@linkcode TraceRecorder}. */
+export interface RecordedSpan {
+	name: string;
+	/** `performance.now()` when the span started, in ms. */
+	start: number;
+	/** Duration in ms. */
+	duration: number;
+	attributes: Record<string, TraceAttributeValue>;
+}
+
+/** Aggregated timings for one kind of span. */
+export interface SpanSummary {
+	count: number;
+	/** Sum of the durations, in ms. */
+	total: number;
+	/** Mean duration, in ms. */
+	mean: number;
+	/** 99th percentile of the durations, in ms. */
+	p99: number;
+	/** Longest duration, in ms. */
+	max: number;
+	/** Sum of the `zarrita.bytes` attributes. */
+	bytes: number;
+}
+
+/**
+ * Span timings grouped by span name, with codec steps split by codec, e.g.
+ * `"zarrita.fetch"` or `"zarrita.decode gzip"`.
+ */
+export interface TraceSummary {
+	spans: Record<string, SpanSummary>;
+	/** Time chunk tasks spent queued, summed, in ms. */
+	queueWait: number;
+}
+
+/** A {@linkcode Tracer} that records every span it is handed. */
+export interface TraceRecorder extends Tracer {
+	/** The finished spans, in the order they ended. */
+	readonly spans: readonly RecordedSpan[];
+	/** Aggregate the recorded spans. */
+	summary(): TraceSummary;
+	/** Forget the recorded spans. */
+	clear(): void;
+}
+
+/** Start a span, or do nothing if there is no tracer. */
+export function startSpan(
+	tracer: Tracer | undefined,
+	name: string,
+	attributes?: Record<string, TraceAttributeValue>,
+): TraceSpan | undefined {
+	return tracer?.startSpan(name, attributes && { attributes });
+}
+
+/** Run `fn` inside a span (ended even if `fn` throws). */
+export async function traced<T>(
+	tracer: Tracer | undefined,
+	name: string,
+	attributes: Record<string, TraceAttributeValue>,
+	fn: (span?: TraceSpan) => Promise<T> | T,
+): Promise<T> {
+	if (!tracer) return fn();
+	let span = tracer.startSpan(name, { attributes });
+	try {
+		return await fn(span);
+	} finally {
+		span.end();
+	}
+}
+
+/**
+ * Wrap a chunk queue task in a `zarrita.chunk` span, which also records how
+ * long the task waited in the queue before it started.
+ */
+export function tracedChunkTask(
+	tracer: Tracer | undefined,
+	chunkCoords: number[],
+	task: () => Promise<void>,
+): () => Promise<void> {
+	if (!tracer) return task;
+	let queued = performance.now();
+	return () =>
+		traced(
+			tracer,
+			"zarrita.chunk",
+			{
+				"zarrita.chunk": chunkCoords.join(","),
+				"zarrita.queue_wait_ms": performance.now() - queued,
+			},
+			task,
+		);
+}
+
+function summaryKey(span: RecordedSpan): string {
+	let codec = span.attributes["zarrita.codec"];
+	return codec === undefined ? span.name : `${span.name} ${codec}`;
+}
+
+/**
+ * Create a {@linkcode Tracer} that keeps finished spans in memory, timed
+ * with `performance.now()`, and aggregates them into a
+ * {@linkcode TraceSummary}.
+ *
+ * ```ts
+ * import * as zarr from "zarrita";
+ *
+ * let tracer = zarr.createTraceRecorder();
+ * await zarr.get(arr, null, { tracer });
+ * let { spans } = tracer.summary();
+ * spans["zarrita.fetch"].p99; // store latency
+ * spans["zarrita.decode gzip"].total; // time spent in gzip
+ * ```
+ *
+ * With `mark: true`, each span is also recorded with `performance.measure`,
+ * so it shows up in browser and Node.js performance timelines.
+ *
+ * @category Utility
+ */
+export function createTraceRecorder(
+	options: { mark?: boolean } = {},
+): TraceRecorder {
+	let spans: RecordedSpan[] = [];
+	return {
+		get spans() {
+			return spans;
+		},
+		startSpan(name, { attributes = {} } = {}) {
+			let start = performance.now();
+			let attrs = { ...attributes };
+			return {
+				setAttribute(key, value) {
+					attrs[key] = value;
+					return this;
+				},
+				end() {
+					let end = performance.now();
+					spans.push({ name, start, duration: end - start, attributes: attrs });
+					if (options.mark) {
+						performance.measure(name, { start, end, detail: attrs });
+					}
+				},
+			};
+		},
+		summary() {
+			let byKey = new Map<string, RecordedSpan[]>();
+			let queueWait = 0;
+			for (let span of spans) {
+				let key = summaryKey(span);
+				let group = byKey.get(key);
+				if (!group) {
+					group = [];
+					byKey.set(key, group);
+				}
+				group.push(span);
+				let wait = span.attributes["zarrita.queue_wait_ms"];
+				if (typeof wait === "number") queueWait += wait;
+			}
+			let summary: Record<string, SpanSummary> = {};
+			for (let [key, group] of byKey) {
+				let durations = group.map((s) => s.duration).sort((a, b) => a - b);
+				let total = durations.reduce((a, b) => a + b, 0);
+				let bytes = 0;
+				for (let span of group) {
+					let n = span.attributes["zarrita.bytes"];
+					if (typeof n === "number") bytes += n;
+				}
+				summary[key] = {
+					count: durations.length,
+					total,
+					mean: total / durations.length,
+					p99: durations[Math.ceil(durations.length * 0.99) - 1],
+					max: durations[durations.length - 1],
+					bytes,
+				};
+			}
+			return { spans: summary, queueWait };
+		},
+		clear() {
+			spans = [];
+		},
+	};
+}
@@ -6,6 +6,7 @@ import type {
 	ArrayMetadataV2,
 	BigintDataType,
 	Bool,
+	Chunk,
 	CodecMetadata,
 	DataType,
 	GroupMetadata,
@@ -39,6 +40,36 @@ export function jsonEncodeObject(o: Record<string, unknown>): Uint8Array {
 	return new TextEncoder().encode(str);
 }
 
+const sharedChunkData = new WeakSet<object>();
+
+/**
+ * Flag a chunk whose data is retained and handed to other readers (e.g. by a
+ * cache). `get` never returns such data as its result, since the caller
+ * would then own (and could mutate) memory it shares with others.
+ */
+export function markSharedChunk(chunk: Chunk<DataType>): void {
+	sharedChunkData.add(chunk.data);
+}
+
+export function isSharedChunk(chunk: Chunk<DataType>): boolean {
+	return sharedChunkData.has(chunk.data);
+}
+
+const fillChunkData = new WeakSet<object>();
+
+/**
+ * Flag a chunk that stands in for a missing one: its single fill value
+ * broadcast over the chunk shape (every stride is 0). `get` writes the fill
+ * value straight into its output instead of copying from it.
+ */
+export function markFillChunk(chunk: Chunk<DataType>): void {
+	fillChunkData.add(chunk.data);
+}
+
+export function isFillChunk(chunk: Chunk<DataType>): boolean {
+	return fillChunkData.has(chunk.data);
+}
+
 export function assertSharedArrayBufferAvailable(): void {
 	if (typeof SharedArrayBuffer === "undefined") {
 		throw new Error(
@@ -519,31 +550,190 @@ export function assert(
 	}
 }
 
+/** Join byte chunks into one buffer (without copying a single chunk). */
+function concatBytes(chunks: Uint8Array[], size: number): Uint8Array {
+	if (chunks.length === 1) {
+		return chunks[0];
+	}
+	let out = new Uint8Array(size);
+	let offset = 0;
+	for (let chunk of chunks) {
+		out.set(chunk, offset);
+		offset += chunk.byteLength;
+	}
+	return out;
+}
+
+/**
+ * Compress data using the given format via the Web Streams API.
+ *
+ * The input is written straight into a `CompressionStream` and the output
+ * chunks are collected into a single buffer as they are produced, so there is
+ * no intermediate `Response` copy. Views backed by a SharedArrayBuffer are
+ * copied first, since streams do not accept shared memory.
+ */
+export async function compress(
+	data: Uint8Array,
+	{ format }: { format: CompressionFormat },
+): Promise<Uint8Array> {
+	let stream = new CompressionStream(format);
+	let writer = stream.writable.getWriter();
+	// Not awaited here: the readable side has to be drained concurrently,
+	// otherwise backpressure stalls the write.
+	let written = writer
+		.write(data.buffer instanceof ArrayBuffer ? data : data.slice())
+		.then(() => writer.close());
+	let reader = stream.readable.getReader();
+	let chunks: Uint8Array[] = [];
+	let size = 0;
+	for (;;) {
+		let { done, value } = await reader.read();
+		if (done) break;
+		chunks.push(value);
+		size += value.byteLength;
+	}
+	await written;
+	return concatBytes(chunks, size);
+}
+
+type DecompressOptions = {
+	format: CompressionFormat;
+	signal?: AbortSignal;
+	/**
+	 * Where to write the decompressed bytes, when the decoded size is known
+	 * up front (e.g. from the chunk shape and data type). May be backed by a
+	 * SharedArrayBuffer. If the output turns out not to match its length, a
+	 * separately allocated buffer is returned instead.
+	 */
+	out?: Uint8Array;
+	/**
+	 * The expected decompressed size, when known but there is no `out`:
+	 * the output buffer is sized for it, so it is allocated only once.
+	 */
+	size?: number;
+};
+
+/**
+ * Decompress with the Web Streams API, writing output chunks directly into
+ * `out` as they are produced (no intermediate `Response` or concatenation).
+ */
+export async function decompressWithStreams(
+	data: Uint8Array,
+	{ format, signal, out, size: expected }: DecompressOptions,
+): Promise<Uint8Array> {
+	if (!out && expected !== undefined) {
+		out = new Uint8Array(expected);
+	}
+	let stream = new DecompressionStream(format);
+	let writer = stream.writable.getWriter();
+	let written = writer
+		.write(data.buffer instanceof ArrayBuffer ? data : data.slice())
+		.then(() => writer.close());
+	// Failures surface through the reader; don't report them twice.
+	written.catch(() => {});
+	let reader = stream.readable.getReader();
+	let onAbort = () => {
+		reader.cancel(signal?.reason).catch(() => {});
+	};
+	signal?.addEventListener("abort", onAbort, { once: true });
+	try {
+		// Chunks are copied into `out` while they fit; on overflow, switch to
+		// collecting them (the part already in `out` becomes the first chunk).
+		let chunks: Uint8Array[] | undefined = out ? undefined : [];
+		let size = 0;
+		for (;;) {
+			let { done, value } = await reader.read();
+			if (done) break;
+			if (!chunks && out && size + value.byteLength <= out.byteLength) {
+				out.set(value, size);
+			} else {
+				chunks ??= [out?.subarray(0, size) ?? new Uint8Array()];
+				chunks.push(value);
+			}
+			size += value.byteLength;
+		}
+		signal?.throwIfAborted();
+		await written;
+		if (!chunks && out) {
+			return size === out.byteLength ? out : out.subarray(0, size);
+		}
+		return concatBytes(chunks ?? [], size);
+	} finally {
+		signal?.removeEventListener("abort", onAbort);
+	}
+}
+
+type NodeZlib = Record<
+	"gunzip" | "inflate" | "inflateRaw",
+	(
+		buffer: Uint8Array,
+		options: { chunkSize?: number },
+		callback: (error: Error | null, result: Uint8Array) => void,
+	) => void
+>;
+
+let nodeZlib: Promise<NodeZlib | undefined> | undefined;
+
+/** `node:zlib` when running under Node, otherwise `undefined`. */
+function loadNodeZlib(): Promise<NodeZlib | undefined> {
+	if (!nodeZlib) {
+		let runtime = globalThis as { process?: { versions?: { node?: string } } };
+		// Keep the specifier opaque so browser bundlers don't try to resolve it.
+		let specifier = "node:zlib";
+		nodeZlib = runtime.process?.versions?.node
+			? import(/* @vite-ignore */ specifier).catch(() => undefined)
+			: Promise.resolve(undefined);
+	}
+	return nodeZlib;
+}
+
+const NODE_ZLIB_METHOD = {
+	gzip: "gunzip",
+	deflate: "inflate",
+	"deflate-raw": "inflateRaw",
+} as const;
+
 /**
- * Decompress data using the given format via the Web Streams API.
- * Views backed by a SharedArrayBuffer are copied into a regular ArrayBuffer
- * since the Response constructor does not accept shared memory.
+ * Decompress data in the given format.
+ *
+ * Under Node this uses the asynchronous `node:zlib` API, which inflates on
+ * the libuv thread pool; when the decoded size is known (`size`, or the
+ * length of `out`), the output chunk size is set to it so zlib allocates
+ * exactly once. Elsewhere the Web Streams
+ * `DecompressionStream` is used (see {@linkcode decompressWithStreams}).
+ *
+ * Either way, pass `out` to receive the bytes in a preallocated (optionally
+ * shared) buffer.
  */
 export async function decompress(
-	data: ArrayBuffer | ArrayBufferView,
-	{ format, signal }: { format: CompressionFormat; signal?: AbortSignal },
-): Promise<ArrayBuffer> {
-	let response: Response;
-	if (data instanceof ArrayBuffer) {
-		response = new Response(data);
-	} else {
-		let bytes = new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
-		response = new Response(bytes.slice().buffer);
-	}
-	assert(response.body, "Response does not contain body.");
+	data: Uint8Array,
+	options: DecompressOptions,
+): Promise<Uint8Array> {
+	let { format, signal, out, size } = options;
+	signal?.throwIfAborted();
 	try {
-		const decompressedResponse = new Response(
-			response.body.pipeThrough(new DecompressionStream(format), { signal }),
-		);
-		const buffer = await decompressedResponse.arrayBuffer();
-		return buffer;
-	} catch {
+		let zlib = await loadNodeZlib();
+		if (!zlib) {
+			return await decompressWithStreams(data, options);
+		}
+		let hint = out?.byteLength ?? size;
+		let result = await new Promise<Uint8Array>((resolve, reject) => {
+			zlib[NODE_ZLIB_METHOD[format]](
+				data,
+				hint === undefined ? {} : { chunkSize: Math.max(hint, 64) },
+				(error, result) => (error ? reject(error) : resolve(result)),
+			);
+		});
+		signal?.throwIfAborted();
+		// zlib can't write into `out`, so copy only when it is the caller's
+		// destination; otherwise its own buffer is the result.
+		if (out && result.byteLength === out.byteLength) {
+			out.set(result);
+			return out;
+		}
+		return new Uint8Array(result.buffer, result.byteOffset, result.byteLength);
+	} catch (cause) {
 		signal?.throwIfAborted();
-		throw new Error(`Failed to decode ${format}`);
+		throw new Error(`Failed to decode ${format}`, { cause });
 	}
 }
@@ -0,0 +1,164 @@
+import { spawnSync } from "node:child_process";
+import * as fs from "node:fs/promises";
+import * as os from "node:os";
+import * as path from "node:path";
+import { parseArgs } from "node:util";
+
+/**
+ * Run the benchmarks in each package's `__bench__` directory and compare them
+ * with a stored baseline, exiting with status 1 if any got slower, or now
+ * allocates more, than the thresholds allow.
+ *
+ *     pnpm bench:compare --save  # record a baseline
+ *     pnpm bench:compare         # compare against it
+ *     pnpm bench:compare read    # only benchmarks in matching files
+ *
+ * A run is only a regression if it is slower than `--threshold` and than the
+ * two runs' combined margin of error, so noisy benchmarks don't fail.
+ * Baselines are specific to the machine they were recorded on.
+ */
+
+/**
+ * @typedef Result
+ * @property {number} mean Milliseconds per run.
+ * @property {number} rme Relative margin of error, in percent.
+ * @property {number} [bytes] Decoded bytes per run.
+ * @property {number} [chunks] Chunks per run.
+ * @property {number} [alloc] Bytes allocated by one run (approximate).
+ * @property {number} [peakRss] Peak resident set size during one run.
+ */
+
+/**
+ * @typedef Baseline
+ * @property {string} node
+ * @property {string} date
+ * @property {Record<string, Result>} benchmarks
+ */
+
+const root = path.resolve(import.meta.dirname, "..");
+const { values: args, positionals: filters } = parseArgs({
+	options: {
+		baseline: {
+			type: "string",
+			default: path.join(root, "fixtures/bench/baseline.json"),
+		},
+		save: { type: "boolean", default: false },
+		threshold: { type: "string", default: "0.1" },
+		"alloc-threshold": { type: "string", default: "0.25" },
+	},
+	allowPositionals: true,
+});
+const threshold = Number(args.threshold);
+const allocThreshold = Number(args["alloc-threshold"]);
+
+const tmp = await fs.mkdtemp(path.join(os.tmpdir(), "zarrita-bench-"));
+const outputJson = path.join(tmp, "results.json");
+const memoryLog = path.join(tmp, "memory.jsonl");
+const run = spawnSync(
+	"pnpm",
+	["exec", "vitest", "bench", "--run", "--outputJson", outputJson, ...filters],
+	{
+		cwd: root,
+		stdio: "inherit",
+		env: { ...process.env, ZARRITA_BENCH_MEMORY: memoryLog },
+	},
+);
+if (run.status !== 0) {
+	process.exit(run.status ?? 1);
+}
+
+/** @type {Record<string, Result>} */
+const current = {};
+const report = JSON.parse(await fs.readFile(outputJson, "utf-8"));
+for (const file of report.files) {
+	for (const group of file.groups) {
+		for (const { name, mean, rme } of group.benchmarks) {
+			// Workloads are labelled like "read fs whole [8.0 MiB, 64 chunks]".
+			const match = /\[([\d.]+) (KiB|MiB), (\d+) chunks\]$/.exec(name);
+			const unit = match?.[2] === "KiB" ? 2 ** 10 : 2 ** 20;
+			current[name] = {
+				mean,
+				rme,
+				bytes: match ? Number(match[1]) * unit : undefined,
+				chunks: match ? Number(match[3]) : undefined,
+			};
+		}
+	}
+}
+const memory = await fs.readFile(memoryLog, "utf-8").catch(() => "");
+for (const line of memory.split("\n").filter(Boolean)) {
+	const { name, alloc, peakRss } = JSON.parse(line);
+	if (current[name]) Object.assign(current[name], { alloc, peakRss });
+}
+await fs.rm(tmp, { recursive: true, force: true });
+
+if (args.save) {
+	/** @type {Baseline} */
+	const baseline = {
+		node: process.version,
+		date: new Date().toISOString(),
+		benchmarks: current,
+	};
+	await fs.mkdir(path.dirname(args.baseline), { recursive: true });
+	const text = JSON.stringify(baseline, null, "\t");
+	await fs.writeFile(args.baseline, `${text}\n`);
+	const count = Object.keys(current).length;
+	console.log(`Saved ${count} results to ${args.baseline}`);
+}
+
+/** @type {Baseline | undefined} */
+const baseline = args.save
+	? undefined
+	: await fs
+			.readFile(args.baseline, "utf-8")
+			.then((text) => JSON.parse(text))
+			.catch(() => undefined);
+
+/** @type {string[]} */
+const regressions = [];
+const rows = Object.entries(current).map(([name, result]) => {
+	const seconds = result.mean / 1000;
+	const before = baseline?.benchmarks[name];
+	let change = "";
+	if (before) {
+		const slower = result.mean / before.mean - 1;
+		const noise = (result.rme + before.rme) / 100;
+		change = `${slower >= 0 ? "+" : ""}${(slower * 100).toFixed(1)}%`;
+		if (slower > Math.max(threshold, noise)) {
+			regressions.push(`${name}: ${change} time per run`);
+		}
+		if (
+			result.alloc !== undefined &&
+			before.alloc !== undefined &&
+			result.alloc > before.alloc * (1 + allocThreshold) &&
+			result.alloc - before.alloc > 2 ** 20
+		) {
+			regressions.push(
+				`${name}: allocates ${mib(result.alloc)}, was ${mib(before.alloc)}`,
+			);
+		}
+	}
+	return {
+		name,
+		"ms/run": result.mean.toFixed(2),
+		"MB/s": result.bytes ? (result.bytes / seconds / 1e6).toFixed(1) : "",
+		"chunks/s": result.chunks ? (result.chunks / seconds).toFixed(0) : "",
+		alloc: result.alloc === undefined ? "" : mib(result.alloc),
+		"peak RSS": result.peakRss === undefined ? "" : mib(result.peakRss),
+		"vs baseline": change,
+	};
+});
+console.table(rows);
+
+if (!args.save && !baseline) {
+	console.log(`No baseline at ${args.baseline}; record one with --save.`);
+} else if (regressions.length > 0) {
+	console.error(`\n${regressions.length} regression(s):`);
+	for (const line of regressions) console.error(`  ${line}`);
+	process.exit(1);
+}
+
+/** @param {number} bytes */
+function mib(bytes) {
+	return `${(bytes / 2 ** 20).toFixed(1)} MiB`;
+}
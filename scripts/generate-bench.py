@@ -0,0 +1,324 @@
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#     "numpy>=2",
+#     "zarr>=3.1.2",
+# ]
+#
+# [tool.uv]
+# exclude-newer = "2026-03-07T00:00:00Z"
+# ///
+"""Generate large Zarr v3 datasets for benchmarking zarrita.
+
+Unlike the conformance fixtures written by generate-v3.py, these arrays are
+sized by the caller (up to tens of GB) and cover every codec zarrita reads.
+Chunks (or whole shards) are generated with numpy and written in parallel by
+a process pool. Next to the arrays, `manifest.json` records a SHA-256 of the
+expected contents of every chunk- or shard-aligned region, so benchmarks can
+check what they read.
+
+Checksums are taken over the region's elements in C order: little-endian
+bytes for numeric types, and each string's UTF-8 bytes followed by a NUL for
+strings.
+
+    uv run scripts/generate-bench.py --size 4GiB --out /tmp/bench.zarr
+    uv run scripts/generate-bench.py --arrays f4.zstd,f4.sharded --size 512MiB
+
+Once uv has cached the dependencies, add `--offline` to `uv run`; nothing
+else is downloaded.
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import json
+import math
+import os
+import pathlib
+import re
+import shutil
+import sys
+import time
+
+import numpy as np
+import zarr
+import zarr.codecs
+import zarr.storage
+from zarr.codecs.numcodecs import LZ4 as NumcodecsLZ4
+from zarr.codecs.numcodecs import Delta as NumcodecsDelta
+from zarr.codecs.numcodecs import Shuffle as NumcodecsShuffle
+
+SELF_DIR = pathlib.Path(__file__).parent
+DEFAULT_OUT = SELF_DIR / ".." / "fixtures" / "bench" / "data.zarr"
+
+LITTLE = zarr.codecs.BytesCodec(endian="little")
+
+
+def array_specs(chunks, shards):
+    """Codec configurations keyed by array name."""
+    spatial = chunks[1:]
+    return {
+        "f4.raw": dict(dtype="float32", compressors=None),
+        "f4.gzip": dict(dtype="float32", compressors=[zarr.codecs.GzipCodec(level=1)]),
+        "f4.zstd": dict(dtype="float32", compressors=[zarr.codecs.ZstdCodec(level=3)]),
+        "f4.lz4": dict(dtype="float32", compressors=[NumcodecsLZ4()]),
+        "f4.blosc": dict(
+            dtype="float32",
+            compressors=[
+                zarr.codecs.BloscCodec(cname="lz4", shuffle="shuffle", typesize=4)
+            ],
+        ),
+        "f4.transpose.blosc": dict(
+            dtype="float32",
+            filters=[zarr.codecs.TransposeCodec(order=[2, 1, 0])],
+            compressors=[
+                zarr.codecs.BloscCodec(cname="zstd", shuffle="shuffle", typesize=4)
+            ],
+        ),
+        "i4.delta.shuffle.zstd": dict(
+            dtype="int32",
+            filters=[NumcodecsDelta(dtype="int32")],
+            compressors=[NumcodecsShuffle(elementsize=4), zarr.codecs.ZstdCodec()],
+        ),
+        # zarr-python protects the shard index with crc32c by default
+        "f4.sharded": dict(
+            dtype="float32",
+            shards=shards,
+            compressors=[zarr.codecs.ZstdCodec(level=3)],
+        ),
+        "f4.sparse": dict(
+            dtype="float32",
+            compressors=[zarr.codecs.ZstdCodec(level=3)],
+            sparse=True,
+        ),
+        "f4.sharded.sparse": dict(
+            dtype="float32",
+            shards=shards,
+            compressors=[zarr.codecs.ZstdCodec(level=3)],
+            sparse=True,
+        ),
+        "str.vlen": dict(
+            dtype=str,
+            chunks=spatial,
+            serializer=zarr.codecs.VLenUTF8Codec(),
+            compressors=[zarr.codecs.ZstdCodec()],
+        ),
+    }
+
+
+def parse_size(text):
+    """Parse a byte count such as `512MiB`, `4GB` or `1e9`."""
+    match = re.fullmatch(r"\s*([\d.e+]+)\s*([kmgt]?)(i?)b?\s*", text.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    value, prefix, binary = match.groups()
+    power = "_kmgt".index(prefix or "_")
+    return int(float(value) * (1024 if binary else 1000) ** power)
+
+
+def parse_shape(text):
+    return tuple(int(n) for n in text.split(","))
+
+
+def array_shape(size, itemsize, chunks):
+    """A shape of about `size` bytes, two chunks wide past the first axis."""
+    trailing = tuple(c * 2 for c in chunks[1:])
+    n = max(1, math.ceil(size / itemsize / math.prod(trailing)))
+    return (n, *trailing)
+
+
+def is_string(dtype):
+    return dtype.kind in "OTU"
+
+
+def tile(region, block):
+    """Split a region, given as (start, stop) pairs, into `block`-sized tiles."""
+    grid = [math.ceil((stop - start) / b) for (start, stop), b in zip(region, block)]
+    for coords in np.ndindex(*grid):
+        yield tuple(
+            (start + i * b, min(start + (i + 1) * b, stop))
+            for i, (start, stop), b in zip(coords, region, block)
+        )
+
+
+def generate(dtype, region, shape, seed):
+    """Deterministic contents of `region`: a smooth field plus noise."""
+    ranges = [np.arange(start, stop) for start, stop in region]
+    grids = np.ix_(*ranges)
+    if is_string(dtype):
+        strides = np.cumprod((1, *shape[:0:-1]))[::-1]
+        linear = sum(g * s for g, s in zip(grids, strides))
+        return np.strings.add("v", linear.astype(np.dtypes.StringDType()))
+    field = np.zeros([stop - start for start, stop in region], dtype=np.float64)
+    for axis, g in enumerate(grids):
+        field += np.sin(g * (0.013 * (axis + 1)))
+    rng = np.random.default_rng([seed, *(start for start, _ in region)])
+    field += rng.standard_normal(field.shape) * 0.05
+    if dtype.kind in "iu":
+        return (field * 1000).astype(dtype)
+    return field.astype(dtype)
+
+
+def checksum(data):
+    digest = hashlib.sha256()
+    if is_string(data.dtype):
+        for value in data.ravel():
+            digest.update(str(value).encode() + b"\0")
+    else:
+        le = data.astype(data.dtype.newbyteorder("<"), copy=False)
+        digest.update(np.ascontiguousarray(le).tobytes())
+    return digest.hexdigest()
+
+
+def is_missing(seed, chunk_region, fraction):
+    """Whether a chunk of a sparse array is left out (deterministically)."""
+    rng = np.random.default_rng([seed, 1, *(start for start, _ in chunk_region)])
+    return rng.random() < fraction
+
+
+@functools.cache
+def open_array(root, name):
+    return zarr.open_array(zarr.storage.LocalStore(root), path=name, mode="r+")
+
+
+def write_block(task):
+    """
+    Generate one region and write it. In sparse arrays, chunks picked as
+    missing hold the fill value, which zarr does not store.
+    """
+    root, name, region, seed, fraction = task
+    arr = open_array(root, name)
+    shape = [stop - start for start, stop in region]
+    chunks = list(tile(region, arr.chunks))
+    missing = [c for c in chunks if fraction and is_missing(seed, c, fraction)]
+    if len(missing) == len(chunks):
+        data = np.full(shape, arr.fill_value, dtype=arr.dtype)
+    else:
+        data = generate(arr.dtype, region, arr.shape, seed)
+        for chunk in missing:
+            local = tuple(
+                slice(c0 - start, c1 - start)
+                for (start, _), (c0, c1) in zip(region, chunk)
+            )
+            data[local] = arr.fill_value
+        arr[tuple(slice(start, stop) for start, stop in region)] = data
+    return name, region, checksum(data), len(missing)
+
+
+def codec_names(arr):
+    return [codec.to_dict()["name"] for codec in arr.metadata.codecs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", type=pathlib.Path, default=DEFAULT_OUT)
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        default=parse_size("256MiB"),
+        help="decoded size of each numeric array (default: 256MiB)",
+    )
+    parser.add_argument(
+        "--chunks",
+        type=parse_shape,
+        default=(16, 256, 256),
+        help="chunk shape (default: 16,256,256)",
+    )
+    parser.add_argument(
+        "--shards",
+        type=parse_shape,
+        default=(64, 512, 512),
+        help="shard shape of the sharded arrays (default: 64,512,512)",
+    )
+    parser.add_argument(
+        "--arrays",
+        type=lambda text: text.split(","),
+        help="comma-separated array names to generate (default: all)",
+    )
+    parser.add_argument(
+        "--missing",
+        type=float,
+        default=0.5,
+        help="fraction of chunks left missing in sparse arrays (default: 0.5)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--list", action="store_true", help="list array names")
+    args = parser.parse_args(argv)
+
+    if len(args.chunks) != 3 or len(args.shards) != 3:
+        parser.error("--chunks and --shards must have three dimensions")
+    if any(s % c for s, c in zip(args.shards, args.chunks)):
+        parser.error("--shards must be a multiple of --chunks")
+
+    specs = array_specs(args.chunks, args.shards)
+    if args.list:
+        print("\n".join(specs))
+        return
+    names = args.arrays or list(specs)
+    unknown = set(names) - set(specs)
+    if unknown:
+        parser.error(f"unknown arrays: {', '.join(sorted(unknown))}")
+
+    shutil.rmtree(args.out, ignore_errors=True)
+    store = zarr.storage.LocalStore(args.out)
+    zarr.create_group(store)
+
+    tasks = []
+    manifest = {"seed": args.seed, "arrays": {}}
+    for name in names:
+        spec = dict(specs[name])
+        sparse = spec.pop("sparse", False)
+        dtype = spec.pop("dtype")
+        chunks = spec.pop("chunks", args.chunks)
+        if dtype is str:
+            # Strings are slow to encode: a sixteenth of the size, assuming
+            # about 16 bytes per element.
+            shape = array_shape(args.size // 16, 16, chunks)
+        else:
+            shape = array_shape(args.size, np.dtype(dtype).itemsize, chunks)
+        spec.setdefault("serializer", LITTLE)
+        arr = zarr.create_array(
+            store, name=name, shape=shape, chunks=chunks, dtype=dtype, **spec
+        )
+        # Regions are written whole shards at a time, so that no two workers
+        # write to the same shard.
+        block = spec.get("shards") or chunks
+        fraction = args.missing if sparse else 0.0
+        manifest["arrays"][name] = {
+            "shape": list(shape),
+            "chunks": list(chunks),
+            "shards": list(spec["shards"]) if "shards" in spec else None,
+            "dtype": str(arr.dtype),
+            "fill_value": arr.fill_value.item()
+            if hasattr(arr.fill_value, "item")
+            else arr.fill_value,
+            "codecs": codec_names(arr),
+            "regions": [],
+        }
+        for region in tile([(0, n) for n in shape], block):
+            tasks.append((str(args.out), name, region, args.seed, fraction))
+
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        results = pool.map(write_block, tasks, chunksize=4)
+        for i, (name, region, digest, missing) in enumerate(results, 1):
+            manifest["arrays"][name]["regions"].append(
+                {
+                    "selection": [list(r) for r in region],
+                    "sha256": digest,
+                    "missing_chunks": missing,
+                }
+            )
+            if i % 100 == 0 or i == len(tasks):
+                elapsed = time.perf_counter() - start
+                print(f"{i}/{len(tasks)} regions ({elapsed:.1f}s)", file=sys.stderr)
+
+    with open(args.out / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"wrote {len(names)} arrays to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -41,7 +41,7 @@ for (const pkg of packageDirs) {
 				value,
 			]),
 			publish: {
-				exclude: ["package.json", "__tests__"],
+				exclude: ["package.json", "__tests__", "__bench__"],
 			},
 		};
 	}
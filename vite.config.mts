@@ -11,5 +11,8 @@ export default defineConfig({
 		api: true,
 		setupFiles: ["tintype/setup"],
 		include: ["packages/**/__tests__/**/*.test.ts"],
+		benchmark: {
+			include: ["packages/**/__bench__/**/*.bench.ts"],
+		},
 	},
 });